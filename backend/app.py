@@ -25,6 +25,8 @@ from controllers.material_controller import material_bp, material_global_bp
 from controllers.reference_file_controller import reference_file_bp
 from controllers.settings_controller import settings_bp
 from controllers import project_bp, page_bp, template_bp, user_template_bp, export_bp, file_bp
+from utils.upload_utils import UploadRequest
+from utils.json_provider import ORJSONProvider
 
 
 # Enable SQLite WAL mode for all connections
@@ -51,6 +53,10 @@ def set_sqlite_pragma(dbapi_conn, connection_record):
 def create_app():
     """Application factory"""
     app = Flask(__name__)
+    # Spool uploads into UPLOAD_FOLDER so they can be linked into place instead of copied
+    app.request_class = UploadRequest
+    # Serialize JSON responses with orjson when available
+    app.json = ORJSONProvider(app)
     
     # Load configuration from Config class
     app.config.from_object(Config)
@@ -40,6 +40,11 @@ class Config:
     MAX_CONTENT_LENGTH = 200 * 1024 * 1024  # 200MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
     ALLOWED_REFERENCE_FILE_EXTENSIONS = {'pdf', 'docx', 'doc', 'xlsx', 'xls', 'csv', 'txt', 'md'}
+    # 由前置Web服务器（Apache mod_xsendfile / lighttpd）直接发送文件，Python 只返回 X-Sendfile 头
+    # 未部署在支持 X-Sendfile 的服务器后面时保持关闭，send_from_directory 会走 wsgi.file_wrapper（sendfile）
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'false').strip().lower() in ('1', 'true', 'yes')
+    # 图片打包导出交给 nginx mod_zip 组装（需要编译了 mod_zip 的 nginx），Python 只返回文件清单
+    EXPORT_USE_NGINX_MOD_ZIP = os.getenv('EXPORT_USE_NGINX_MOD_ZIP', 'false').strip().lower() in ('1', 'true', 'yes')
     
     # AI服务配置
     GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY', '')
@@ -65,6 +70,11 @@ class Config:
     OPENAI_API_BASE = os.getenv('OPENAI_API_BASE', 'https://yunwu.ai/v1')
     OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', '300.0'))  # 增加到 5 分钟（生成清洁背景图需要很长时间）
     OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '2'))  # 减少重试次数，避免过多重试导致累积超时
+    # chat.completions 生图使用流式响应（避免 Cloudflare 代理长时间无响应返回 524），代理不支持时自动回退
+    OPENAI_IMAGE_STREAM = os.getenv('OPENAI_IMAGE_STREAM', 'false').strip().lower() in ('1', 'true', 'yes')
+    # Images API（/v1/images/*）主动限速：最大并发请求数、请求间最小间隔（秒），0 表示不限制
+    OPENAI_IMAGES_API_MAX_INFLIGHT = int(os.getenv('OPENAI_IMAGES_API_MAX_INFLIGHT', '0'))
+    OPENAI_IMAGES_API_MIN_INTERVAL = float(os.getenv('OPENAI_IMAGES_API_MIN_INTERVAL', '0'))
 
     
     # AI 模型配置
@@ -3,24 +3,190 @@ Export Controller - handles file export endpoints (Ecommerce version)
 
 电商版本：不再支持 PPTX/PDF 导出，仅保留图片打包下载功能
 """
+import hashlib
 import logging
 import os
+import uuid
 import io
+import json
+import time
 import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from urllib.parse import quote
 
-from flask import Blueprint, request, current_app, send_file
+from flask import Blueprint, Response, request, current_app, send_from_directory
 from models import db, Project, Page, Task
 from utils import (
     error_response, not_found, bad_request, success_response,
     parse_page_ids_from_query, parse_page_ids_from_body, get_filtered_pages
 )
-from services import FileService
+from services import get_file_service
 
 logger = logging.getLogger(__name__)
 
 export_bp = Blueprint('export', __name__, url_prefix='/api/projects')
 
+# Already-compressed formats gain nothing from DEFLATE, store them as-is
+_STORED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+_ZIP_STORED = zipfile.ZIP_STORED
+_ZIP_DEFLATED = zipfile.ZIP_DEFLATED
+
+# Number of image files read ahead of the ZIP writer
+_EXPORT_READ_WORKERS = 4
+
+# Cached ZIP archives kept per project (oldest are evicted first)
+_EXPORT_CACHE_MAX_FILES = 5
+_EXPORT_CACHE_PREFIX = 'images_cache_'
+
+
+class _ZipStreamSink(io.RawIOBase):
+    """
+    Unseekable write-only sink for zipfile.
+
+    zipfile falls back to data-descriptor mode when the target cannot seek,
+    so each archive member can be flushed to the client as soon as it is written.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def _read_zip_entry(file_path, arcname):
+    """Read a file and build its ZipInfo from the open descriptor (no extra path stat)"""
+    with open(file_path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        data = f.read()
+    zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime(st.st_mtime)[:6])
+    zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+    zinfo.file_size = st.st_size
+    zinfo.compress_type = _ZIP_STORED if arcname.lower().endswith(_STORED_EXTENSIONS) else _ZIP_DEFLATED
+    return zinfo, data
+
+
+def _iter_zip_stream(image_files):
+    """
+    Yield a ZIP archive of (abs_path, arcname) entries chunk by chunk.
+
+    Files are read by a small thread pool so disk latency overlaps with writing
+    earlier entries; at most _EXPORT_READ_WORKERS files are buffered at a time
+    and entries keep their original order.
+    """
+    sink = _ZipStreamSink()
+    with ThreadPoolExecutor(max_workers=_EXPORT_READ_WORKERS) as executor, \
+            zipfile.ZipFile(sink, 'w', _ZIP_DEFLATED) as zip_file:
+        pending = deque()
+
+        def write_next():
+            zip_file.writestr(*pending.popleft().result())
+            return sink.drain()
+
+        for file_path, arcname in image_files:
+            pending.append(executor.submit(_read_zip_entry, file_path, arcname))
+            if len(pending) >= _EXPORT_READ_WORKERS:
+                yield from write_next()
+        while pending:
+            yield from write_next()
+    # Central directory is written on close
+    yield from sink.drain()
+
+
+def _export_cache_key(project_id, pages, image_files):
+    """Cache key over the selected images and the latest page update"""
+    max_updated_at = max((page.updated_at for page in pages if page.updated_at), default=None)
+    key_source = '\n'.join(
+        [project_id, str(max_updated_at)] + [f"{arcname}={path}" for path, arcname in image_files]
+    )
+    return hashlib.sha1(key_source.encode('utf-8')).hexdigest()
+
+
+def _prune_export_cache(cache_dir):
+    """Keep only the most recent cached archives of a project"""
+    try:
+        entries = [
+            entry for entry in os.scandir(cache_dir)
+            if entry.name.startswith(_EXPORT_CACHE_PREFIX) and entry.name.endswith('.zip')
+        ]
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in entries[_EXPORT_CACHE_MAX_FILES:]:
+            os.remove(entry.path)
+    except OSError as e:
+        logger.warning(f"Failed to prune export cache {cache_dir}: {e}")
+
+
+def _tee_to_cache(chunks, cache_path):
+    """
+    Pass chunks through to the client while writing them to cache_path.
+
+    The archive is written to a temp file and atomically renamed once complete,
+    so an interrupted download never leaves a truncated cache entry behind.
+    """
+    tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+        os.replace(tmp_path, cache_path)
+        _prune_export_cache(os.path.dirname(cache_path))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@lru_cache(maxsize=1024)
+def _file_crc32(file_path, size, mtime_ns):
+    """
+    CRC32 of a file, cached per process.
+
+    size and mtime_ns are only part of the cache key so a rewritten file is rehashed.
+    """
+    crc = 0
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def _mod_zip_response(project_id, image_files, filename):
+    """
+    Let nginx mod_zip assemble the archive.
+
+    The body is a manifest of "<crc32> <size> <location> <name>" lines; nginx fetches
+    each location via subrequest and writes the ZIP itself, so no image bytes pass
+    through Python. Supplying the CRC up front lets mod_zip skip hashing and serve
+    Range requests; page images have unique filenames, so repeat exports hit the cache.
+    """
+    lines = []
+    for file_path, arcname in image_files:
+        st = os.stat(file_path)
+        crc = _file_crc32(file_path, st.st_size, st.st_mtime_ns)
+        location = quote(f"/files/{project_id}/pages/{os.path.basename(file_path)}")
+        lines.append(f"{crc:08x} {st.st_size} {location} {arcname}\n")
+    return Response(
+        ''.join(lines),
+        mimetype='text/plain',
+        headers={
+            'X-Archive-Files': 'zip',
+            'Content-Disposition': f'attachment; filename="{filename}"',
+        }
+    )
+
 
 @export_bp.route('/<project_id>/export/images', methods=['GET'])
 def export_images_zip(project_id):
@@ -34,48 +200,51 @@ def export_images_zip(project_id):
         ZIP file containing all generated images
     """
     try:
-        project = Project.query.get(project_id)
-        
-        if not project:
-            return not_found('Project')
-        
         # Get page_ids from query params and fetch filtered pages
         selected_page_ids = parse_page_ids_from_query(request)
         pages = get_filtered_pages(project_id, selected_page_ids if selected_page_ids else None)
         
         if not pages:
+            # Only pay for the project lookup when there is nothing to export
+            project_exists = db.session.query(Project.id).filter_by(id=project_id).first() is not None
+            if not project_exists:
+                return not_found('Project')
             return bad_request("No pages found for project")
         
         # Get image paths
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service(current_app.config['UPLOAD_FOLDER'])
         
         image_files = []
         for page in pages:
             if page.generated_image_path:
                 abs_path = file_service.get_absolute_path(page.generated_image_path)
                 if os.path.exists(abs_path):
-                    image_files.append((abs_path, f"page_{page.page_index:02d}.jpg"))
+                    image_files.append((abs_path, f"page_{page.order_index + 1:02d}.jpg"))
         
         if not image_files:
             return bad_request("No generated images found for project")
         
-        # Create ZIP in memory
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for file_path, arcname in image_files:
-                zip_file.write(file_path, arcname)
-        
-        zip_buffer.seek(0)
-        
         # Generate filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"images_{project_id}_{timestamp}.zip"
         
-        return send_file(
-            zip_buffer,
+        if current_app.config.get('EXPORT_USE_NGINX_MOD_ZIP'):
+            return _mod_zip_response(project_id, image_files, filename)
+        
+        # Serve a previously built archive for an identical selection
+        cache_dir = file_service.get_exports_dir(project_id)
+        cache_name = f"{_EXPORT_CACHE_PREFIX}{_export_cache_key(project_id, pages, image_files)}.zip"
+        if os.path.isfile(os.path.join(cache_dir, cache_name)):
+            return send_from_directory(
+                cache_dir, cache_name,
+                mimetype='application/zip', as_attachment=True, download_name=filename, conditional=True
+            )
+        
+        # Stream the ZIP instead of building it in memory, caching it on the way out
+        return Response(
+            _tee_to_cache(_iter_zip_stream(image_files), os.path.join(cache_dir, cache_name)),
             mimetype='application/zip',
-            as_attachment=True,
-            download_name=filename
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
         )
     
     except Exception as e:
@@ -83,25 +252,22 @@ def export_images_zip(project_id):
         return error_response('SERVER_ERROR', str(e), 500)
 
 
-@export_bp.route('/<project_id>/export/pptx', methods=['GET'])
-def export_pptx(project_id):
-    """
-    PPTX export is not supported in ecommerce version.
-    """
-    return bad_request("PPTX export is not available in this version. Please use /export/images for image download.")
-
-
-@export_bp.route('/<project_id>/export/pdf', methods=['GET'])
-def export_pdf(project_id):
-    """
-    PDF export is not supported in ecommerce version.
-    """
-    return bad_request("PDF export is not available in this version. Please use /export/images for image download.")
+# Pre-serialized bodies for export formats dropped in the ecommerce version
+_UNSUPPORTED_EXPORT_BODIES = {
+    kind: json.dumps({
+        "success": False,
+        "error": {
+            "code": "INVALID_REQUEST",
+            "message": f"{label} export is not available in this version. Please use /export/images for image download."
+        }
+    }).encode('utf-8')
+    for kind, label in (('pptx', 'PPTX'), ('pdf', 'PDF'), ('editable-pptx', 'Editable PPTX'))
+}
 
 
-@export_bp.route('/<project_id>/export/editable-pptx', methods=['POST'])
-def export_editable_pptx(project_id):
+@export_bp.route('/<project_id>/export/<any(pptx, pdf, "editable-pptx"):kind>', methods=['GET', 'POST'])
+def export_unsupported(project_id, kind):
     """
-    Editable PPTX export is not supported in ecommerce version.
+    PPTX / PDF / editable PPTX export is not supported in ecommerce version.
     """
-    return bad_request("Editable PPTX export is not available in this version. Please use /export/images for image download.")
+    return Response(_UNSUPPORTED_EXPORT_BODIES[kind], status=400, mimetype='application/json')
@@ -5,11 +5,58 @@ from flask import Blueprint, send_from_directory, current_app
 from utils import error_response, not_found
 from utils.path_utils import find_file_with_prefix
 import os
+from collections import namedtuple
+from functools import lru_cache
 from pathlib import Path
 from werkzeug.utils import secure_filename
 
 file_bp = Blueprint('files', __name__, url_prefix='/files')
 
+# Project files (e.g. template.png) may be overwritten in place, so browsers must
+# revalidate them every time; the ETag check turns unchanged files into a 304.
+# Other uploads get unique filenames and can be served from cache for a while.
+CACHEABLE_MAX_AGE = 3600
+STALE_WHILE_REVALIDATE = 86400
+
+
+UploadRoots = namedtuple('UploadRoots', ['upload', 'materials', 'user_templates', 'mineru'])
+
+
+@lru_cache(maxsize=8)
+def _get_upload_roots(upload_folder):
+    """Resolve the per-blueprint root directories once per UPLOAD_FOLDER value"""
+    upload_root = os.path.abspath(upload_folder)
+    return UploadRoots(
+        upload=upload_root,
+        materials=os.path.join(upload_root, 'materials'),
+        user_templates=os.path.join(upload_root, 'user-templates'),
+        mineru=os.path.join(upload_root, 'mineru_files'),
+    )
+
+
+@lru_cache(maxsize=1024)
+def _resolve_mineru_root(mineru_dir, extract_id):
+    """
+    Resolve the directory of a MinerU extract once per extract_id.
+
+    Returns None if extract_id itself escapes the mineru_files directory.
+    """
+    resolved_mineru_dir = Path(mineru_dir).resolve()
+    root = (resolved_mineru_dir / extract_id).resolve()
+    if root.parent != resolved_mineru_dir:
+        return None
+    return root
+
+
+def _send_static_file(directory, filename, max_age=None):
+    """Serve a file with Last-Modified/ETag so conditional GETs return 304"""
+    response = send_from_directory(directory, filename, conditional=True, etag=True, max_age=max_age)
+    if max_age:
+        response.headers['Cache-Control'] = (
+            f'public, max-age={max_age}, stale-while-revalidate={STALE_WHILE_REVALIDATE}'
+        )
+    return response
+
 
 @file_bp.route('/<project_id>/<file_type>/<filename>', methods=['GET'])
 def serve_file(project_id, file_type, filename):
@@ -26,23 +73,15 @@ def serve_file(project_id, file_type, filename):
             return not_found('File')
         
         # Construct file path
-        file_dir = os.path.join(
-            current_app.config['UPLOAD_FOLDER'],
-            project_id,
-            file_type
-        )
+        roots = _get_upload_roots(current_app.config['UPLOAD_FOLDER'])
+        file_dir = os.path.join(roots.upload, project_id, file_type)
         
-        # Check if directory exists
-        if not os.path.exists(file_dir):
-            return not_found('File')
-        
-        # Check if file exists
-        file_path = os.path.join(file_dir, filename)
-        if not os.path.exists(file_path):
+        # Single stat: a missing directory or file both fail here
+        if not os.path.isfile(os.path.join(file_dir, filename)):
             return not_found('File')
         
         # Serve file
-        return send_from_directory(file_dir, filename)
+        return _send_static_file(file_dir, filename)
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -59,23 +98,15 @@ def serve_user_template(template_id, filename):
     """
     try:
         # Construct file path
-        file_dir = os.path.join(
-            current_app.config['UPLOAD_FOLDER'],
-            'user-templates',
-            template_id
-        )
-        
-        # Check if directory exists
-        if not os.path.exists(file_dir):
-            return not_found('File')
+        roots = _get_upload_roots(current_app.config['UPLOAD_FOLDER'])
+        file_dir = os.path.join(roots.user_templates, template_id)
         
-        # Check if file exists
-        file_path = os.path.join(file_dir, filename)
-        if not os.path.exists(file_path):
+        # Single stat: a missing directory or file both fail here
+        if not os.path.isfile(os.path.join(file_dir, filename)):
             return not_found('File')
         
         # Serve file
-        return send_from_directory(file_dir, filename)
+        return _send_static_file(file_dir, filename, max_age=CACHEABLE_MAX_AGE)
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -92,22 +123,14 @@ def serve_global_material(filename):
     try:
         safe_filename = secure_filename(filename)
         # Construct file path
-        file_dir = os.path.join(
-            current_app.config['UPLOAD_FOLDER'],
-            'materials'
-        )
-        
-        # Check if directory exists
-        if not os.path.exists(file_dir):
-            return not_found('File')
+        file_dir = _get_upload_roots(current_app.config['UPLOAD_FOLDER']).materials
         
-        # Check if file exists
-        file_path = os.path.join(file_dir, safe_filename)
-        if not os.path.exists(file_path):
+        # Single stat: a missing directory or file both fail here
+        if not os.path.isfile(os.path.join(file_dir, safe_filename)):
             return not_found('File')
         
         # Serve file
-        return send_from_directory(file_dir, safe_filename)
+        return _send_static_file(file_dir, safe_filename, max_age=CACHEABLE_MAX_AGE)
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -123,38 +146,33 @@ def serve_mineru_file(extract_id, filepath):
         filepath: Relative file path within the extract
     """
     try:
-        root_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'mineru_files', extract_id)
-        full_path = Path(root_dir) / filepath
+        roots = _get_upload_roots(current_app.config['UPLOAD_FOLDER'])
+        resolved_root_dir = _resolve_mineru_root(roots.mineru, extract_id)
+        if resolved_root_dir is None:
+            return error_response('INVALID_PATH', 'Invalid file path', 403)
 
         # This prevents path traversal attacks
-        resolved_root_dir = Path(root_dir).resolve()
-        
         try:
-            # Check if the path is trying to escape the root directory
-            resolved_full_path = full_path.resolve()
-            if not str(resolved_full_path).startswith(str(resolved_root_dir)):
-                return error_response('INVALID_PATH', 'Invalid file path', 403)
+            resolved_full_path = (resolved_root_dir / filepath).resolve()
         except Exception:
             # If we can't resolve the path at all, it's invalid
             return error_response('INVALID_PATH', 'Invalid file path', 403)
+        if not resolved_full_path.is_relative_to(resolved_root_dir):
+            return error_response('INVALID_PATH', 'Invalid file path', 403)
 
         # Try to find file with prefix matching
-        matched_path = find_file_with_prefix(full_path)
-        
-        if matched_path is not None:
-            # Additional security check for matched path
+        matched_path = find_file_with_prefix(resolved_full_path)
+        if matched_path is not None and matched_path != resolved_full_path:
+            # A prefix match may be a symlink (e.g. from an extracted archive):
+            # make sure its target is still inside the root directory
             try:
-                resolved_matched_path = matched_path.resolve(strict=True)
-                
-                # Verify the matched file is still within the root directory
-                if not str(resolved_matched_path).startswith(str(resolved_root_dir)):
-                    return error_response('INVALID_PATH', 'Invalid file path', 403)
-            except FileNotFoundError:
+                matched_path = matched_path.resolve(strict=True)
+            except OSError:
+                return not_found('File')
+            if not matched_path.is_relative_to(resolved_root_dir):
                 return not_found('File')
-            except Exception:
-                return error_response('INVALID_PATH', 'Invalid file path', 403)
-            
-            return send_from_directory(str(matched_path.parent), matched_path.name)
+        if matched_path is not None:
+            return _send_static_file(str(matched_path.parent), matched_path.name, max_age=CACHEABLE_MAX_AGE)
 
         return not_found('File')
     except Exception as e:
@@ -2,23 +2,60 @@
 Material Controller - handles standalone material image generation
 """
 from flask import Blueprint, request, current_app
+from config import get_config
 from models import db, Project, Material, Task
-from utils import success_response, error_response, not_found, bad_request
-from services import FileService
+from utils import success_response, error_response, not_found, bad_request, save_upload
+from services import get_file_service
 from services.ai_service_manager import get_ai_service
-from services.task_manager import task_manager, generate_material_image_task
-from pathlib import Path
+from services.task_manager import task_manager, generate_material_image_task, caption_materials_task
+from sqlalchemy import select, update
+from sqlalchemy.orm import load_only, raiseload
 from werkzeug.utils import secure_filename
 from typing import Optional
+import logging
+import os
+import re
+import secrets
 import tempfile
 import shutil
-import time
 
 
+logger = logging.getLogger(__name__)
+
 material_bp = Blueprint('materials', __name__, url_prefix='/api/projects')
 material_global_bp = Blueprint('materials_global', __name__, url_prefix='/api/materials')
 
-ALLOWED_MATERIAL_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.svg'}
+ALLOWED_MATERIAL_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.svg'})
+_UNSUPPORTED_MATERIAL_TYPE_MSG = f"Unsupported file type. Allowed: {', '.join(sorted(ALLOWED_MATERIAL_EXTENSIONS))}"
+
+# Fallbacks for settings missing from app.config (resolved once, not per request)
+_DEFAULT_CONFIG = get_config()
+
+# Material file URLs, either site-relative or absolute:
+#   /files/materials/<filename> and /files/<project_id>/materials/<filename>
+_RE_GLOBAL_MATERIAL_URL = re.compile(r'^(?:https?://[^/]+)?(?:.*?/)?files/materials/([^/?#]+)')
+_RE_PROJECT_MATERIAL_URL = re.compile(r'^(?:https?://[^/]+)?(?:.*?/)?files/([\w-]+)/materials/([^/?#]+)')
+
+
+def _url_to_relative_path(url: str) -> Optional[str]:
+    """Map a material file URL to its path relative to UPLOAD_FOLDER."""
+    if not url:
+        return None
+    url = str(url)
+    match = _RE_GLOBAL_MATERIAL_URL.match(url)
+    if match:
+        return f"materials/{secure_filename(match.group(1))}"
+    match = _RE_PROJECT_MATERIAL_URL.match(url)
+    if match:
+        return f"{match.group(1)}/materials/{secure_filename(match.group(2))}"
+    return None
+
+
+def _project_exists(project_id: str) -> bool:
+    """Check project existence without materializing the Project row."""
+    return db.session.execute(
+        select(Project.id).where(Project.id == project_id)
+    ).scalar_one_or_none() is not None
 
 
 def _build_material_query(filter_project_id: str):
@@ -30,14 +67,21 @@ def _build_material_query(filter_project_id: str):
     if filter_project_id == 'none':
         return query.filter(Material.project_id.is_(None)), None
 
-    project = Project.query.get(filter_project_id)
-    if not project:
+    if not _project_exists(filter_project_id):
         return None, not_found('Project')
 
     return query.filter(Material.project_id == filter_project_id), None
 
 
-def _get_materials_list(filter_project_id: str):
+# Columns read by Material.to_dict(); list queries load nothing else and
+# raise instead of lazy-loading relationships one row at a time
+_MATERIAL_LIST_COLUMNS = (
+    Material.id, Material.project_id, Material.filename, Material.url,
+    Material.relative_path, Material.created_at, Material.updated_at,
+)
+
+
+def _get_materials_list(filter_project_id: str, limit: Optional[int] = None):
     """
     Common logic to get materials list.
     Returns (materials_list, error_response)
@@ -46,7 +90,12 @@ def _get_materials_list(filter_project_id: str):
     if error:
         return None, error
     
-    materials = query.order_by(Material.created_at.desc()).all()
+    query = query.options(
+        load_only(*_MATERIAL_LIST_COLUMNS), raiseload('*')
+    ).order_by(Material.created_at.desc())
+    if limit is not None and limit > 0:
+        query = query.limit(limit)
+    materials = query.all()
     materials_list = [material.to_dict() for material in materials]
     
     return materials_list, None
@@ -87,8 +136,7 @@ def _resolve_target_project_id(raw_project_id: Optional[str], allow_none: bool =
         return None, bad_request("project_id cannot be 'all' when uploading materials")
 
     if raw_project_id:
-        project = Project.query.get(raw_project_id)
-        if not project:
+        if not _project_exists(raw_project_id):
             return None, not_found('Project')
 
     return raw_project_id, None
@@ -100,27 +148,23 @@ def _save_material_file(file, target_project_id: Optional[str]):
         return None, bad_request("file is required")
 
     filename = secure_filename(file.filename)
-    file_ext = Path(filename).suffix.lower()
+    base_name, file_ext = os.path.splitext(filename)
+    file_ext = file_ext.lower()
     if file_ext not in ALLOWED_MATERIAL_EXTENSIONS:
-        return None, bad_request(f"Unsupported file type. Allowed: {', '.join(sorted(ALLOWED_MATERIAL_EXTENSIONS))}")
+        return None, bad_request(_UNSUPPORTED_MATERIAL_TYPE_MSG)
 
-    file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-    if target_project_id:
-        materials_dir = file_service._get_materials_dir(target_project_id)
-    else:
-        materials_dir = file_service.upload_folder / "materials"
-        materials_dir.mkdir(exist_ok=True, parents=True)
+    relative_dir = f"{target_project_id}/materials" if target_project_id else "materials"
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    materials_dir = os.path.join(upload_folder, relative_dir)
+    os.makedirs(materials_dir, exist_ok=True)
 
-    timestamp = int(time.time() * 1000)
-    base_name = Path(filename).stem
-    unique_filename = f"{base_name}_{timestamp}{file_ext}"
+    unique_filename = f"{base_name}_{secrets.token_hex(8)}{file_ext}"
 
-    filepath = materials_dir / unique_filename
-    file.save(str(filepath))
+    save_upload(file, os.path.join(materials_dir, unique_filename))
 
-    relative_path = str(filepath.relative_to(file_service.upload_folder))
+    relative_path = f"{relative_dir}/{unique_filename}"
     if target_project_id:
-        image_url = file_service.get_file_url(target_project_id, 'materials', unique_filename)
+        image_url = get_file_service(upload_folder).get_file_url(target_project_id, 'materials', unique_filename)
     else:
         image_url = f"/files/materials/{unique_filename}"
 
@@ -152,14 +196,13 @@ def generate_material_image(project_id):
     
     Note: project_id can be 'none' to generate global materials (not associated with any project)
     """
+    cfg = current_app.config
     try:
         # 支持 'none' 作为特殊值，表示生成全局素材
         if project_id != 'none':
-            project = Project.query.get(project_id)
-            if not project:
+            if not _project_exists(project_id):
                 return not_found('Project')
         else:
-            project = None
             project_id = None  # 设置为None表示全局素材
 
         # Parse request data (prioritize multipart for file uploads)
@@ -191,8 +234,8 @@ def generate_material_image(project_id):
         if requested_aspect_ratio and not _is_valid_ratio(requested_aspect_ratio):
             return bad_request("Invalid aspect_ratio")
 
-        effective_aspect_ratio = requested_aspect_ratio or current_app.config['DEFAULT_ASPECT_RATIO']
-        effective_resolution = requested_resolution or current_app.config['DEFAULT_RESOLUTION']
+        effective_aspect_ratio = requested_aspect_ratio or cfg['DEFAULT_ASPECT_RATIO']
+        effective_resolution = requested_resolution or cfg['DEFAULT_RESOLUTION']
 
         if mode == 'product_replace':
             # Product replacement requires both: a reference composition image + at least one product image
@@ -203,42 +246,35 @@ def generate_material_image(project_id):
 
         # 处理project_id：对于全局素材，使用'global'作为Task的project_id
         # Task模型要求project_id不能为null，但Material可以
+        # project_id 已在函数开头校验过，无需再次查询
         task_project_id = project_id if project_id is not None else 'global'
-        
-        # 验证project_id（如果不是'global'）
-        if task_project_id != 'global':
-            project = Project.query.get(task_project_id)
-            if not project:
-                return not_found('Project')
 
         # Initialize services
         ai_service = get_ai_service()
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service(cfg['UPLOAD_FOLDER'])
+
+        ref_file = ref_file if ref_file and ref_file.filename else None
+        extra_files = [extra for extra in extra_files if extra and extra.filename]
 
-        # 创建临时目录保存参考图片（后台任务会清理）
-        temp_dir = Path(tempfile.mkdtemp(dir=current_app.config['UPLOAD_FOLDER']))
-        temp_dir_str = str(temp_dir)
+        # 仅在有参考图片时创建临时目录保存它们（后台任务会清理）
+        temp_dir = tempfile.mkdtemp(dir=cfg['UPLOAD_FOLDER']) if (ref_file or extra_files) else None
 
         try:
-            ref_path = None
+            ref_path_str = None
             # Save main reference image to temp directory if provided
-            if ref_file and ref_file.filename:
+            if ref_file:
                 ref_filename = secure_filename(ref_file.filename or 'ref.png')
-                ref_path = temp_dir / ref_filename
-                ref_file.save(str(ref_path))
-                ref_path_str = str(ref_path)
-            else:
-                ref_path_str = None
+                ref_path_str = os.path.join(temp_dir, ref_filename)
+                save_upload(ref_file, ref_path_str)
 
             # Save additional reference images to temp directory
             additional_ref_images = []
             for extra in extra_files:
-                if not extra or not extra.filename:
-                    continue
-                extra_filename = secure_filename(extra.filename)
-                extra_path = temp_dir / extra_filename
-                extra.save(str(extra_path))
-                additional_ref_images.append(str(extra_path))
+                # Prefix so extra images sharing a filename do not overwrite each other
+                extra_filename = f"{secrets.token_hex(4)}_{secure_filename(extra.filename)}"
+                extra_path = os.path.join(temp_dir, extra_filename)
+                save_upload(extra, extra_path)
+                additional_ref_images.append(extra_path)
 
             # Create async task for material generation
             task = Task(
@@ -269,7 +305,7 @@ def generate_material_image(project_id):
                 additional_ref_images if additional_ref_images else None,
                 effective_aspect_ratio,
                 effective_resolution,
-                temp_dir_str,
+                temp_dir,
                 app,
                 mode,
             )
@@ -281,8 +317,8 @@ def generate_material_image(project_id):
             }, status_code=202)
         
         except Exception as e:
-            # Clean up temp directory on error
-            if temp_dir.exists():
+            # Clean up temp directory on error (only if one was created)
+            if temp_dir is not None:
                 shutil.rmtree(temp_dir, ignore_errors=True)
             raise
 
@@ -296,11 +332,14 @@ def list_materials(project_id):
     """
     GET /api/projects/{project_id}/materials - List materials for a specific project
     
+    Query params:
+        - limit: optional maximum number of materials to return (newest first)
+    
     Returns:
         List of material images with filename, url, and metadata for the specified project
     """
     try:
-        materials_list, error = _get_materials_list(project_id)
+        materials_list, error = _get_materials_list(project_id, request.args.get('limit', type=int))
         if error:
             return error
         
@@ -338,13 +377,14 @@ def list_all_materials():
           * 'all' (default): Get all materials regardless of project
           * 'none': Get only materials without a project (global materials)
           * <project_id>: Get materials for specific project
+        - limit: optional maximum number of materials to return (newest first)
     
     Returns:
         List of material images with filename, url, and metadata
     """
     try:
         filter_project_id = request.args.get('project_id', 'all')
-        materials_list, error = _get_materials_list(filter_project_id)
+        materials_list, error = _get_materials_list(filter_project_id, request.args.get('limit', type=int))
         if error:
             return error
         
@@ -382,8 +422,8 @@ def delete_material(material_id):
         if not material:
             return not_found('Material')
 
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        material_path = Path(file_service.get_absolute_path(material.relative_path))
+        file_service = get_file_service(current_app.config['UPLOAD_FOLDER'])
+        material_path = file_service.get_absolute_path(material.relative_path)
 
         # First, delete the database record to ensure data consistency
         db.session.delete(material)
@@ -392,8 +432,9 @@ def delete_material(material_id):
         # Then, attempt to delete the file. If this fails, log the error
         # but still return a success response. This leaves an orphan file,
         try:
-            if material_path.exists():
-                material_path.unlink(missing_ok=True)
+            os.remove(material_path)
+        except FileNotFoundError:
+            pass
         except OSError as e:
             current_app.logger.warning(f"Failed to delete file for material {material_id} at {material_path}: {e}")
 
@@ -429,19 +470,20 @@ def associate_materials_to_project():
             return bad_request("material_urls must be a non-empty array")
         
         # Validate project exists
-        project = Project.query.get(project_id)
-        if not project:
+        if not _project_exists(project_id):
             return not_found('Project')
         
-        # Find materials by URLs and update their project_id
-        updated_ids = []
-        materials_to_update = Material.query.filter(
-            Material.url.in_(material_urls),
-            Material.project_id.is_(None)
-        ).all()
-        for material in materials_to_update:
-            material.project_id = project_id
-            updated_ids.append(material.id)
+        # Update matching global materials in a single UPDATE statement
+        unassigned = (Material.url.in_(material_urls), Material.project_id.is_(None))
+        stmt = update(Material).where(*unassigned).values(project_id=project_id)
+        if db.engine.dialect.update_returning:
+            updated_ids = list(db.session.scalars(stmt.returning(Material.id)))
+        else:
+            updated_ids = list(db.session.scalars(select(Material.id).where(*unassigned)))
+            if updated_ids:
+                db.session.execute(
+                    update(Material).where(Material.id.in_(updated_ids)).values(project_id=project_id)
+                )
         
         db.session.commit()
         
@@ -458,163 +500,105 @@ def associate_materials_to_project():
 @material_global_bp.route('/caption', methods=['POST'])
 def caption_materials():
     """
-    POST /api/materials/caption - Generate short captions for material images by URL.
+    POST /api/materials/caption - Generate short captions for material images by URL (async)
 
     Request body (JSON):
     {
         "material_urls": ["url1", "url2", ...],
         "prompt": "optional override prompt"
     }
+
+    Returns:
+        {
+            "success": true,
+            "data": {
+                "task_id": "...",
+                "status": "PENDING"
+            }
+        }
+    Poll /api/projects/global/tasks/<task_id>; the completed task progress
+    carries "captions" and "combined_caption".
     """
-    print("\n" + "="*60)
-    print("【产品图片识别】开始处理...")
-    print("="*60)
-    
     try:
-        from urllib.parse import urlparse
-        from PIL import Image
-        from config import get_config
-        from services.image_caption_service import caption_product_image
-
         data = request.get_json() or {}
         material_urls = data.get('material_urls') or []
         prompt = data.get('prompt')
-        
-        print(f"【产品图片识别】收到 {len(material_urls)} 个图片URL:")
-        for i, url in enumerate(material_urls):
-            print(f"  [{i+1}] {url}")
 
         if not isinstance(material_urls, list) or not material_urls:
-            print("【产品图片识别】❌ 错误: 没有提供有效的图片URL")
+            logger.warning("【产品图片识别】没有提供有效的图片URL")
             return bad_request("material_urls must be a non-empty array")
 
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-
-        def _url_to_relative_path(u: str):
-            if not u:
-                print("【产品图片识别】警告: 空URL")
-                return None
-            raw = str(u)
-            print(f"【产品图片识别】解析URL: {raw}")
-            path = urlparse(raw).path if raw.startswith('http') else raw.split('?', 1)[0]
-            parts = [p for p in path.split('/') if p]
-            print(f"【产品图片识别】URL parts: {parts}")
-            
-            # /files/materials/<filename>
-            if len(parts) >= 3 and parts[0] == 'files' and parts[1] == 'materials':
-                filename = secure_filename(parts[2])
-                result = f"materials/{filename}"
-                print(f"【产品图片识别】匹配 /files/materials/ 模式 -> {result}")
-                return result
-            # /files/<project_id>/materials/<filename>
-            if len(parts) >= 4 and parts[0] == 'files' and parts[2] == 'materials':
-                project_id = parts[1]
-                filename = secure_filename(parts[3])
-                result = f"{project_id}/materials/{filename}"
-                print(f"【产品图片识别】匹配 /files/<project_id>/materials/ 模式 -> {result}")
-                return result
-            # 尝试从路径末尾提取文件名，假设是 materials 文件夹
-            # 这是一个更宽松的匹配策略
-            if 'materials' in parts:
-                idx = parts.index('materials')
-                if idx + 1 < len(parts):
-                    # 检查前面是否有 project_id
-                    if idx > 0 and parts[idx - 1] != 'files':
-                        project_id = parts[idx - 1]
-                        filename = secure_filename(parts[idx + 1])
-                        result = f"{project_id}/materials/{filename}"
-                        print(f"【产品图片识别】匹配灵活materials模式 -> {result}")
-                        return result
-                    else:
-                        filename = secure_filename(parts[idx + 1])
-                        result = f"materials/{filename}"
-                        print(f"【产品图片识别】匹配全局materials模式 -> {result}")
-                        return result
-            
-            print(f"【产品图片识别】⚠️ 无法匹配任何URL模式: {parts}")
-            return None
-
-        provider_format = current_app.config.get('AI_PROVIDER_FORMAT', get_config().AI_PROVIDER_FORMAT)
-        model = current_app.config.get('IMAGE_CAPTION_MODEL', get_config().IMAGE_CAPTION_MODEL)
-        
-        print(f"【产品图片识别】使用 provider_format={provider_format}, model={model}")
+        logger.info(f"【产品图片识别】开始处理 {len(material_urls)} 个图片URL")
 
-        google_api_key = current_app.config.get('GOOGLE_API_KEY', '')
-        google_api_base = current_app.config.get('GOOGLE_API_BASE', '')
-        openai_api_key = current_app.config.get('OPENAI_API_KEY', '')
-        openai_api_base = current_app.config.get('OPENAI_API_BASE', '')
-        
-        print(f"【产品图片识别】API keys - google: {'已设置' if google_api_key else '未设置'}, openai: {'已设置' if openai_api_key else '未设置'}")
+        cfg = current_app.config
+        file_service = get_file_service(cfg['UPLOAD_FOLDER'])
 
-        captions = []
-        combined_parts = []
+        provider_format = cfg.get('AI_PROVIDER_FORMAT', _DEFAULT_CONFIG.AI_PROVIDER_FORMAT)
+        model = cfg.get('IMAGE_CAPTION_MODEL', _DEFAULT_CONFIG.IMAGE_CAPTION_MODEL)
 
+        google_api_key = cfg.get('GOOGLE_API_KEY', '')
+        google_api_base = cfg.get('GOOGLE_API_BASE', '')
+        openai_api_key = cfg.get('OPENAI_API_KEY', '')
+        openai_api_base = cfg.get('OPENAI_API_BASE', '')
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"【产品图片识别】provider_format={provider_format}, model={model}, "
+                f"google_key={'set' if google_api_key else 'unset'}, openai_key={'set' if openai_api_key else 'unset'}"
+            )
+
+        # Resolve files up front; unresolved URLs keep an empty caption
+        image_paths = []
         for url in material_urls:
             rel_path = _url_to_relative_path(url)
             if not rel_path:
-                print(f"【产品图片识别】❌ URL解析失败: {url}")
-                captions.append({"url": url, "caption": ""})
-                continue
-            
-            if not file_service.file_exists(rel_path):
-                print(f"【产品图片识别】❌ 文件不存在: {rel_path}")
-                captions.append({"url": url, "caption": ""})
-                continue
-            
-            print(f"【产品图片识别】✓ 文件找到: {rel_path}")
-
-            abs_path = file_service.get_absolute_path(rel_path)
-            try:
-                image = Image.open(abs_path)
-                image.load()
-                print(f"【产品图片识别】✓ 图片加载成功: {abs_path}")
-            except Exception as img_err:
-                print(f"【产品图片识别】❌ 图片加载失败: {abs_path}, 错误: {img_err}")
-                captions.append({"url": url, "caption": ""})
-                continue
-
-            print(f"【产品图片识别】⏳ 正在调用AI识别图片...")
-            caption = caption_product_image(
-                image=image,
-                provider_format=provider_format,
-                model=model,
-                google_api_key=google_api_key,
-                google_api_base=google_api_base,
-                openai_api_key=openai_api_key,
-                openai_api_base=openai_api_base,
-                prompt=prompt,
-            )
-            
-            if caption:
-                print(f"【产品图片识别】✓ AI识别结果: {caption[:100]}...")
+                logger.warning(f"【产品图片识别】无法解析图片URL: {url}")
+                image_paths.append(None)
+            elif not file_service.file_exists(rel_path):
+                logger.warning(f"【产品图片识别】文件不存在: {rel_path}")
+                image_paths.append(None)
             else:
-                print(f"【产品图片识别】❌ AI返回空结果!")
-                
-            captions.append({"url": url, "caption": caption})
-            if caption:
-                combined_parts.append(caption)
-
-        print("\n" + "-"*60)
-        print(f"【产品图片识别】完成! 识别了 {len(combined_parts)} 个图片")
-        if combined_parts:
-            print(f"【产品图片识别】综合识别结果: {';'.join(combined_parts)[:200]}")
-        else:
-            print("【产品图片识别】⚠️ 警告：没有成功识别任何图片!")
-        print("-"*60 + "\n")
-        
-        return success_response(
-            {
-                "captions": captions,
-                "combined_caption": "；".join(combined_parts),
-            }
+                image_paths.append(file_service.get_absolute_path(rel_path))
+
+        caption_options = {
+            'provider_format': provider_format,
+            'model': model,
+            'google_api_key': google_api_key,
+            'google_api_base': google_api_base,
+            'openai_api_key': openai_api_key,
+            'openai_api_base': openai_api_base,
+        }
+
+        # Global caption tasks are tracked under the special 'global' project id
+        task = Task(
+            project_id='global',
+            task_type='CAPTION_MATERIALS',
+            status='PENDING'
+        )
+        task.set_progress({
+            'total': len(material_urls),
+            'completed': 0,
+            'failed': 0
+        })
+        db.session.add(task)
+        db.session.commit()
+
+        task_manager.submit_task(
+            task.id,
+            caption_materials_task,
+            material_urls,
+            image_paths,
+            caption_options,
+            prompt,
+            current_app._get_current_object(),
         )
 
+        return success_response({
+            'task_id': task.id,
+            'status': 'PENDING'
+        }, status_code=202)
+
     except Exception as e:
-        import traceback
-        print("\n" + "!"*60)
-        print(f"【产品图片识别】💥 发生严重错误!")
-        print(f"错误信息: {str(e)}")
-        print(f"错误详情:\n{traceback.format_exc()}")
-        print("!"*60 + "\n")
+        db.session.rollback()
+        logger.exception("【产品图片识别】发生严重错误")
         return error_response('SERVER_ERROR', str(e), 500)
-
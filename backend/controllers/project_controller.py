@@ -353,8 +353,8 @@ def delete_project(project_id):
             return not_found('Project')
         
         # Delete project files
-        from services import FileService
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        from services import get_file_service
+        file_service = get_file_service(current_app.config['UPLOAD_FOLDER'])
         file_service.delete_project_files(project_id)
         
         # Delete project from database (cascade will delete pages and tasks)
@@ -743,8 +743,8 @@ def generate_images(project_id):
         # Get singleton AI service instance
         ai_service = get_ai_service()
         
-        from services import FileService
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        from services import get_file_service
+        file_service = get_file_service(current_app.config['UPLOAD_FOLDER'])
         
         # 合并额外要求和风格描述
         combined_requirements = project.extra_requirements or ""
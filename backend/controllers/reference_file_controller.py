@@ -81,6 +81,7 @@ def _parse_file_async(file_id: str, file_path: str, filename: str, app):
             else:
                 reference_file.parse_status = 'completed'
                 reference_file.markdown_content = markdown_content
+                reference_file.image_caption_failed_count = reference_file.count_failed_image_captions()
                 if failed_image_count > 0:
                     logger.warning(f"File parsing completed: {filename}, but {failed_image_count} images failed to generate captions")
                 else:
@@ -331,6 +332,7 @@ def trigger_file_parse(file_id):
             reference_file.error_message = None
             # 清空之前的解析结果，以便重新解析
             reference_file.markdown_content = None
+            reference_file.image_caption_failed_count = None
             reference_file.mineru_batch_id = None
             db.session.commit()
         
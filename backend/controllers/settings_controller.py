@@ -1,11 +1,13 @@
 """Settings Controller - handles application settings endpoints"""
 
 import logging
+import threading
+from functools import cache
+from typing import Optional, Set
 from flask import Blueprint, request, current_app
+from sqlalchemy import update
 from models import db, Settings
 from utils import success_response, error_response, bad_request
-from datetime import datetime, timezone
-from config import Config
 from utils.url_utils import normalize_openai_api_base
 
 logger = logging.getLogger(__name__)
@@ -15,6 +17,75 @@ settings_bp = Blueprint(
     "settings", __name__, url_prefix="/api/settings"
 )
 
+# app.extensions key holding the pre-encoded GET /api/settings response body.
+# The body is served until the next write through this app. Writers bump
+# "version"; a reader only stores what it loaded if no write happened in
+# between, so a slow read can never cache stale settings.
+_SETTINGS_CACHE_EXTENSION = "settings_response"
+_settings_cache_lock = threading.Lock()
+
+
+def _get_settings_cache() -> dict:
+    """Settings response cache of the current app."""
+    return current_app.extensions.setdefault(
+        _SETTINGS_CACHE_EXTENSION, {"version": 0, "body": None}
+    )
+
+
+def _encode_settings(settings: Settings) -> bytes:
+    """Encode the GET /api/settings response body."""
+    response, _ = success_response(settings.to_dict())
+    return response.get_data()
+
+
+def _cache_settings(settings: Settings):
+    """Replace the cached settings after a committed write."""
+    body = _encode_settings(settings)
+    cache = _get_settings_cache()
+    with _settings_cache_lock:
+        cache["version"] += 1
+        cache["body"] = body
+
+
+def _strip_or_none(value):
+    """Strip a string; empty values mean "clear override, fall back to env/default"."""
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _one_of(*allowed):
+    return lambda value: value in allowed
+
+
+def _between(low, high):
+    return lambda value: low <= value <= high
+
+
+# Fields accepted by PUT /api/settings: (key, normalize, is_valid, error message).
+# The key doubles as the Settings attribute name.
+_UPDATE_FIELDS = (
+    ("ai_provider_format", None, _one_of("openai", "gemini"),
+     "AI provider format must be 'openai' or 'gemini'"),
+    ("api_base_url", _strip_or_none, None, None),
+    ("api_key", None, None, None),
+    ("seedream_api_key", None, None, None),
+    ("image_resolution", None, _one_of("1K", "2K", "4K"),
+     "Resolution must be 1K, 2K, or 4K"),
+    ("image_aspect_ratio", None, None, None),
+    ("max_description_workers", int, _between(1, 20),
+     "Max description workers must be between 1 and 20"),
+    ("max_image_workers", int, _between(1, 20),
+     "Max image workers must be between 1 and 20"),
+    ("text_model", _strip_or_none, None, None),
+    ("image_model", _strip_or_none, None, None),
+    ("mineru_api_base", _strip_or_none, None, None),
+    ("mineru_token", None, None, None),
+    ("image_caption_model", _strip_or_none, None, None),
+    ("output_language", None, _one_of("zh", "en", "ja", "auto"),
+     "Output language must be 'zh', 'en', 'ja', or 'auto'"),
+)
+
 
 # Prevent redirect issues when trailing slash is missing
 @settings_bp.route("/", methods=["GET"], strict_slashes=False)
@@ -23,8 +94,15 @@ def get_settings():
     GET /api/settings - Get application settings
     """
     try:
-        settings = Settings.get_settings()
-        return success_response(settings.to_dict())
+        cache = _get_settings_cache()
+        body = cache["body"]
+        if body is None:
+            version = cache["version"]
+            body = _encode_settings(Settings.get_settings())
+            with _settings_cache_lock:
+                if cache["version"] == version:
+                    cache["body"] = body
+        return current_app.response_class(body, mimetype="application/json")
     except Exception as e:
         logger.error(f"Error getting settings: {str(e)}")
         return error_response(
@@ -52,81 +130,24 @@ def update_settings():
         if not data:
             return bad_request("Request body is required")
 
-        settings = Settings.get_settings()
+        updates = {}
+        for key, normalize, is_valid, error_message in _UPDATE_FIELDS:
+            if key not in data:
+                continue
+            value = data[key]
+            if normalize is not None:
+                value = normalize(value)
+            if is_valid is not None and not is_valid(value):
+                return bad_request(error_message)
+            updates[key] = value
 
-        # Update AI provider format configuration
-        if "ai_provider_format" in data:
-            provider_format = data["ai_provider_format"]
-            if provider_format not in ["openai", "gemini"]:
-                return bad_request("AI provider format must be 'openai' or 'gemini'")
-            settings.ai_provider_format = provider_format
-
-        # Update API configuration
-        if "api_base_url" in data:
-            raw_base_url = data["api_base_url"]
-            # Empty string from frontend means "clear override, fall back to env/default"
-            if raw_base_url is None:
-                settings.api_base_url = None
-            else:
-                value = str(raw_base_url).strip()
-                settings.api_base_url = value if value != "" else None
-
-        if "api_key" in data:
-            settings.api_key = data["api_key"]
-
-        if "seedream_api_key" in data:
-            settings.seedream_api_key = data["seedream_api_key"]
-
-        # Update image generation configuration
-        if "image_resolution" in data:
-            resolution = data["image_resolution"]
-            if resolution not in ["1K", "2K", "4K"]:
-                return bad_request("Resolution must be 1K, 2K, or 4K")
-            settings.image_resolution = resolution
-
-        if "image_aspect_ratio" in data:
-            aspect_ratio = data["image_aspect_ratio"]
-            settings.image_aspect_ratio = aspect_ratio
-
-        # Update worker configuration
-        if "max_description_workers" in data:
-            workers = int(data["max_description_workers"])
-            if workers < 1 or workers > 20:
-                return bad_request(
-                    "Max description workers must be between 1 and 20"
-                )
-            settings.max_description_workers = workers
-
-        if "max_image_workers" in data:
-            workers = int(data["max_image_workers"])
-            if workers < 1 or workers > 20:
-                return bad_request(
-                    "Max image workers must be between 1 and 20"
-                )
-            settings.max_image_workers = workers
-
-        # Update model & MinerU configuration (optional, empty values fall back to Config)
-        if "text_model" in data:
-            settings.text_model = (data["text_model"] or "").strip() or None
-
-        if "image_model" in data:
-            settings.image_model = (data["image_model"] or "").strip() or None
-
-        if "mineru_api_base" in data:
-            settings.mineru_api_base = (data["mineru_api_base"] or "").strip() or None
-
-        if "mineru_token" in data:
-            settings.mineru_token = data["mineru_token"]
-
-        if "image_caption_model" in data:
-            settings.image_caption_model = (data["image_caption_model"] or "").strip() or None
-
-        if "output_language" in data:
-            language = data["output_language"]
-            if language in ["zh", "en", "ja", "auto"]:
-                settings.output_language = language
-            else:
-                return bad_request("Output language must be 'zh', 'en', 'ja', or 'auto'")
+        settings = Settings.get_settings()
+        # Compare against loaded values; attribute history is unreliable here because
+        # reading an expired attribute autoflushes pending assignments
+        watched = set(updates) | {"api_base_url"}
+        originals = {key: getattr(settings, key) for key in watched}
+        for key, value in updates.items():
+            setattr(settings, key, value)
 
         # Normalize OpenAI base URL to ensure OpenAI SDK hits the JSON API (usually requires /v1).
         if (settings.ai_provider_format or "").lower() == "openai" and settings.api_base_url:
@@ -135,11 +156,17 @@ def update_settings():
                 logger.info("Normalized OpenAI API base URL: %s -> %s", settings.api_base_url, normalized)
                 settings.api_base_url = normalized
 
-        settings.updated_at = datetime.now(timezone.utc)
+        # Re-submitting the current values writes nothing (no UPDATE, no WAL fsync)
+        changed_fields = {key for key in watched if getattr(settings, key) != originals[key]}
+        if not changed_fields:
+            return success_response(settings.to_dict(), "No changes")
+
+        # updated_at is stamped by the column's onupdate
         db.session.commit()
+        _cache_settings(settings)
 
         # Sync to app.config
-        _sync_settings_to_config(settings)
+        _sync_settings_to_config(settings, changed_fields)
 
         logger.info("Settings updated successfully")
         return success_response(
@@ -164,36 +191,15 @@ def reset_settings():
     try:
         settings = Settings.get_settings()
 
-        # Reset to default values from Config / .env
-        # Priority logic:
-        # - Check AI_PROVIDER_FORMAT
-        # - If "openai" -> use OPENAI_API_BASE / OPENAI_API_KEY
-        # - Otherwise (default "gemini") -> use GOOGLE_API_BASE / GOOGLE_API_KEY
-        settings.ai_provider_format = Config.AI_PROVIDER_FORMAT
-
-        if (Config.AI_PROVIDER_FORMAT or "").lower() == "openai":
-            default_api_base = Config.OPENAI_API_BASE or None
-            default_api_key = Config.OPENAI_API_KEY or None
-        else:
-            default_api_base = Config.GOOGLE_API_BASE or None
-            default_api_key = Config.GOOGLE_API_KEY or None
-
-        settings.api_base_url = default_api_base
-        settings.api_key = default_api_key
-        settings.seedream_api_key = (getattr(Config, "SEEDREAM_API_KEY", "") or None)
-        settings.text_model = Config.TEXT_MODEL
-        settings.image_model = Config.IMAGE_MODEL
-        settings.mineru_api_base = Config.MINERU_API_BASE
-        settings.mineru_token = Config.MINERU_TOKEN
-        settings.image_caption_model = Config.IMAGE_CAPTION_MODEL
-        settings.output_language = 'zh'  # 重置为默认中文
-        settings.image_resolution = Config.DEFAULT_RESOLUTION
-        settings.image_aspect_ratio = Config.DEFAULT_ASPECT_RATIO
-        settings.max_description_workers = Config.MAX_DESCRIPTION_WORKERS
-        settings.max_image_workers = Config.MAX_IMAGE_WORKERS
-        settings.updated_at = datetime.now(timezone.utc)
-
+        # Reset to default values from Config / .env in a single UPDATE
+        # (updated_at is stamped by the column's onupdate)
+        db.session.execute(
+            update(Settings)
+            .where(Settings.id == settings.id)
+            .values(**Settings.default_values())
+        )
         db.session.commit()
+        _cache_settings(settings)
 
         # Sync to app.config
         _sync_settings_to_config(settings)
@@ -213,6 +219,20 @@ def reset_settings():
         )
 
 
+# Provider classes are imported lazily to avoid a circular dependency,
+# but only once rather than on every test-connection call
+@cache
+def _openai_text_provider_cls():
+    from services.ai_providers.text.openai_provider import OpenAITextProvider
+    return OpenAITextProvider
+
+
+@cache
+def _genai_text_provider_cls():
+    from services.ai_providers.text.genai_provider import GenAITextProvider
+    return GenAITextProvider
+
+
 @settings_bp.route("/test-connection", methods=["POST"], strict_slashes=False)
 def test_connection():
     """
@@ -242,16 +262,13 @@ def test_connection():
         logger.info(f"Testing connection for provider: {provider_format}, base: {api_base}, model: {model}")
         
         if provider_format == "openai":
-            # Lazy import to avoid circular dependency
-            from services.ai_providers.text.openai_provider import OpenAITextProvider
-            
             test_base = normalize_openai_api_base(api_base) if api_base else None
             if api_base and test_base and test_base != api_base:
                 logger.info(f"Normalized base URL for testing: {api_base} -> {test_base}")
                 
             try:
                 # Use a very short prompt to test
-                provider = OpenAITextProvider(api_key=api_key, api_base=test_base, model=model)
+                provider = _openai_text_provider_cls()(api_key=api_key, api_base=test_base, model=model)
                 # Set a shorter timeout for testing
                 provider.client.timeout = 20.0
 
@@ -266,11 +283,8 @@ def test_connection():
                 return error_response("TEST_CONNECTION_ERROR", f"OpenAI connection failed: {str(e)}", 400)
                 
         elif provider_format == "gemini":
-            # Lazy import to avoid circular dependency
-            from services.ai_providers.text.genai_provider import GenAITextProvider
-            
             try:
-                provider = GenAITextProvider(api_key=api_key, api_base=api_base, model=model)
+                provider = _genai_text_provider_cls()(api_key=api_key, api_base=api_base, model=model)
                 # Note: GenAI SDK doesn't easily expose timeout but we try
                 result = provider.generate_text("你好，请回复：连接成功")
                 if result:
@@ -292,104 +306,119 @@ def test_connection():
         )
 
 
-def _sync_settings_to_config(settings: Settings):
-    """Sync settings to Flask app config and clear AI service cache if needed"""
+# Settings copied straight into app.config: (attribute, config key, should_sync).
+# should_sync=None always syncs; otherwise the value is synced only if it passes.
+_PLAIN_CONFIG_FIELDS = (
+    ("image_resolution", "DEFAULT_RESOLUTION", None),
+    ("image_aspect_ratio", "DEFAULT_ASPECT_RATIO", None),
+    ("max_description_workers", "MAX_DESCRIPTION_WORKERS", None),
+    ("max_image_workers", "MAX_IMAGE_WORKERS", None),
+    ("mineru_api_base", "MINERU_API_BASE", bool),
+    ("mineru_token", "MINERU_TOKEN", lambda value: value is not None),
+    ("image_caption_model", "IMAGE_CAPTION_MODEL", bool),
+    ("output_language", "OUTPUT_LANGUAGE", bool),
+)
+
+
+def _sync_settings_to_config(settings: Settings, changed_fields: Optional[Set[str]] = None):
+    """
+    Sync settings to Flask app config and clear AI service cache if needed
+
+    Args:
+        settings: The committed settings row
+        changed_fields: Settings attributes changed by the caller; only their
+            config entries are synced. None syncs everything (e.g. after reset).
+    """
+    def _changed(*fields):
+        return changed_fields is None or not changed_fields.isdisjoint(fields)
+
+    cfg = current_app.config
+    # Skip building log messages when INFO is filtered out (the usual production level)
+    info_enabled = logger.isEnabledFor(logging.INFO)
+    # Collect the new values and apply them in one update at the end
+    new_vals = {}
+    pops = []
     # Track if AI-related settings changed
     ai_config_changed = False
-    
-    # Sync AI provider format (always sync, has default value)
-    if settings.ai_provider_format:
-        old_format = current_app.config.get("AI_PROVIDER_FORMAT")
-        if old_format != settings.ai_provider_format:
-            ai_config_changed = True
-            logger.info(f"AI provider format changed: {old_format} -> {settings.ai_provider_format}")
-        current_app.config["AI_PROVIDER_FORMAT"] = settings.ai_provider_format
-    
-    # Sync API configuration (sync to both GOOGLE_* and OPENAI_* to ensure DB settings override env vars)
-    if settings.api_base_url is not None:
-        api_base_value = settings.api_base_url
-        if (settings.ai_provider_format or "").lower() == "openai" and api_base_value:
-            api_base_value = normalize_openai_api_base(api_base_value)
 
-        old_base = current_app.config.get("GOOGLE_API_BASE")
-        if old_base != api_base_value:
-            ai_config_changed = True
-            logger.info(f"API base URL changed: {old_base} -> {api_base_value}")
-        current_app.config["GOOGLE_API_BASE"] = api_base_value
-        current_app.config["OPENAI_API_BASE"] = api_base_value
-    else:
-        # Remove overrides, fall back to env variables or defaults
-        if "GOOGLE_API_BASE" in current_app.config or "OPENAI_API_BASE" in current_app.config:
+    # Sync AI provider format (always has a value)
+    if _changed("ai_provider_format") and settings.ai_provider_format:
+        old_format = cfg.get("AI_PROVIDER_FORMAT")
+        if old_format != settings.ai_provider_format:
             ai_config_changed = True
-            logger.info("API base URL cleared, falling back to defaults")
-        current_app.config.pop("GOOGLE_API_BASE", None)
-        current_app.config.pop("OPENAI_API_BASE", None)
+            if info_enabled:
+                logger.info(f"AI provider format changed: {old_format} -> {settings.ai_provider_format}")
+        new_vals["AI_PROVIDER_FORMAT"] = settings.ai_provider_format
 
-    if settings.api_key is not None:
-        old_key = current_app.config.get("GOOGLE_API_KEY")
-        if old_key != settings.api_key:
-            ai_config_changed = True
-            logger.info("API key updated")
-        current_app.config["GOOGLE_API_KEY"] = settings.api_key
-        current_app.config["OPENAI_API_KEY"] = settings.api_key
-    else:
-        # Remove overrides, fall back to env variables or defaults
-        if "GOOGLE_API_KEY" in current_app.config or "OPENAI_API_KEY" in current_app.config:
-            ai_config_changed = True
-            logger.info("API key cleared, falling back to defaults")
-        current_app.config.pop("GOOGLE_API_KEY", None)
-        current_app.config.pop("OPENAI_API_KEY", None)
+    # Sync API configuration (sync to both GOOGLE_* and OPENAI_* to ensure DB settings override env vars)
+    if _changed("api_base_url", "ai_provider_format"):
+        if settings.api_base_url is not None:
+            # Already normalized by update_settings / Settings.default_values()
+            api_base_value = settings.api_base_url
+            old_base = cfg.get("GOOGLE_API_BASE")
+            if old_base != api_base_value:
+                ai_config_changed = True
+                if info_enabled:
+                    logger.info(f"API base URL changed: {old_base} -> {api_base_value}")
+            new_vals["GOOGLE_API_BASE"] = api_base_value
+            new_vals["OPENAI_API_BASE"] = api_base_value
+        else:
+            # Remove overrides, fall back to env variables or defaults
+            if "GOOGLE_API_BASE" in cfg or "OPENAI_API_BASE" in cfg:
+                ai_config_changed = True
+                logger.info("API base URL cleared, falling back to defaults")
+            pops += ["GOOGLE_API_BASE", "OPENAI_API_BASE"]
+
+    if _changed("api_key"):
+        if settings.api_key is not None:
+            if cfg.get("GOOGLE_API_KEY") != settings.api_key:
+                ai_config_changed = True
+                logger.info("API key updated")
+            new_vals["GOOGLE_API_KEY"] = settings.api_key
+            new_vals["OPENAI_API_KEY"] = settings.api_key
+        else:
+            # Remove overrides, fall back to env variables or defaults
+            if "GOOGLE_API_KEY" in cfg or "OPENAI_API_KEY" in cfg:
+                ai_config_changed = True
+                logger.info("API key cleared, falling back to defaults")
+            pops += ["GOOGLE_API_KEY", "OPENAI_API_KEY"]
+
+    if _changed("seedream_api_key"):
+        if settings.seedream_api_key is not None:
+            if cfg.get("SEEDREAM_API_KEY") != settings.seedream_api_key:
+                ai_config_changed = True
+                logger.info("Seedream API key updated")
+            new_vals["SEEDREAM_API_KEY"] = settings.seedream_api_key
+        else:
+            if "SEEDREAM_API_KEY" in cfg:
+                ai_config_changed = True
+                logger.info("Seedream API key cleared, falling back to defaults")
+            pops.append("SEEDREAM_API_KEY")
 
-    if settings.seedream_api_key is not None:
-        old_seedream_key = current_app.config.get("SEEDREAM_API_KEY")
-        if old_seedream_key != settings.seedream_api_key:
-            ai_config_changed = True
-            logger.info("Seedream API key updated")
-        current_app.config["SEEDREAM_API_KEY"] = settings.seedream_api_key
-    else:
-        if "SEEDREAM_API_KEY" in current_app.config:
-            ai_config_changed = True
-            logger.info("Seedream API key cleared, falling back to defaults")
-        current_app.config.pop("SEEDREAM_API_KEY", None)
-    
     # Check model changes
-    if settings.text_model is not None:
-        old_model = current_app.config.get("TEXT_MODEL")
-        if old_model != settings.text_model:
-            ai_config_changed = True
-            logger.info(f"Text model changed: {old_model} -> {settings.text_model}")
-        current_app.config["TEXT_MODEL"] = settings.text_model
-    
-    if settings.image_model is not None:
-        old_model = current_app.config.get("IMAGE_MODEL")
-        if old_model != settings.image_model:
+    for field, key in (("text_model", "TEXT_MODEL"), ("image_model", "IMAGE_MODEL")):
+        model = getattr(settings, field)
+        if not _changed(field) or model is None:
+            continue
+        old_model = cfg.get(key)
+        if old_model != model:
             ai_config_changed = True
-            logger.info(f"Image model changed: {old_model} -> {settings.image_model}")
-        current_app.config["IMAGE_MODEL"] = settings.image_model
-
-    # Sync image generation settings
-    current_app.config["DEFAULT_RESOLUTION"] = settings.image_resolution
-    current_app.config["DEFAULT_ASPECT_RATIO"] = settings.image_aspect_ratio
-
-    # Sync worker settings
-    current_app.config["MAX_DESCRIPTION_WORKERS"] = settings.max_description_workers
-    current_app.config["MAX_IMAGE_WORKERS"] = settings.max_image_workers
-    logger.info(f"Updated worker settings: desc={settings.max_description_workers}, img={settings.max_image_workers}")
-
-    # Sync MinerU settings (optional, fall back to Config defaults if None)
-    if settings.mineru_api_base:
-        current_app.config["MINERU_API_BASE"] = settings.mineru_api_base
-        logger.info(f"Updated MINERU_API_BASE to: {settings.mineru_api_base}")
-    if settings.mineru_token is not None:
-        current_app.config["MINERU_TOKEN"] = settings.mineru_token
-        logger.info("Updated MINERU_TOKEN from settings")
-    if settings.image_caption_model:
-        current_app.config["IMAGE_CAPTION_MODEL"] = settings.image_caption_model
-        logger.info(f"Updated IMAGE_CAPTION_MODEL to: {settings.image_caption_model}")
-    if settings.output_language:
-        current_app.config["OUTPUT_LANGUAGE"] = settings.output_language
-        logger.info(f"Updated OUTPUT_LANGUAGE to: {settings.output_language}")
-    
+            if info_enabled:
+                logger.info(f"{key} changed: {old_model} -> {model}")
+        new_vals[key] = model
+
+    # Plain values; optional ones keep the Config default when unset
+    for field, key, should_sync in _PLAIN_CONFIG_FIELDS:
+        value = getattr(settings, field)
+        if _changed(field) and (should_sync is None or should_sync(value)):
+            new_vals[key] = value
+
+    cfg.update(new_vals)
+    for key in pops:
+        cfg.pop(key, None)
+    if info_enabled and (new_vals or pops):
+        logger.info(f"Synced settings to app config: {sorted(new_vals)}, cleared: {pops}")
+
     # Clear AI service cache if AI-related configuration changed
     if ai_config_changed:
         try:
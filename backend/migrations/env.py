@@ -1,9 +1,11 @@
 import os
 import sys
+from functools import lru_cache
 from logging.config import fileConfig
 
 from alembic import context
-from sqlalchemy import engine_from_config, pool
+from flask import current_app, has_app_context
+from sqlalchemy import engine_from_config, event, pool
 
 # Add the backend directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -23,9 +25,15 @@ if config.config_file_name is not None:
 target_metadata = db.metadata
 
 
+@lru_cache(maxsize=None)
 def get_url() -> str:
-    """Get database URL from Flask application config."""
-    app = create_app()
+    """
+    Get database URL from Flask application config.
+
+    Under `flask db ...` the running app is reused; plain `alembic` builds
+    the app once.
+    """
+    app = current_app if has_app_context() else create_app()
     return app.config["SQLALCHEMY_DATABASE_URI"]
 
 
@@ -45,18 +53,34 @@ def run_migrations_offline() -> None:
 
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
-    app = create_app()
     connectable = engine_from_config(
-        {"sqlalchemy.url": app.config["SQLALCHEMY_DATABASE_URI"]},
+        {"sqlalchemy.url": get_url()},
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
     )
 
+    if connectable.dialect.name == "sqlite":
+        # pysqlite only opens transactions before DML, so every DDL statement would
+        # autocommit (and fsync) on its own. Let SQLAlchemy emit BEGIN itself so the
+        # whole upgrade runs in one transaction. WAL/synchronous PRAGMAs come from
+        # the Engine connect hook registered in app.py.
+        @event.listens_for(connectable, "connect")
+        def _disable_pysqlite_transactions(dbapi_conn, connection_record):
+            dbapi_conn.isolation_level = None
+
+        @event.listens_for(connectable, "begin")
+        def _begin_sqlite_transaction(conn):
+            conn.exec_driver_sql("BEGIN")
+
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
+            # Alembic's SQLite impl defaults to transactional_ddl=False, which makes
+            # begin_transaction() a no-op and commits after every revision
+            transactional_ddl=connectable.dialect.name == "sqlite" or None,
+            transaction_per_migration=False,
         )
 
         with context.begin_transaction():
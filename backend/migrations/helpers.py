@@ -0,0 +1,75 @@
+"""
+Helpers shared by the idempotent migrations in versions/
+
+SQLite has no ADD/DROP COLUMN IF [NOT] EXISTS, so revisions check the live
+schema first. Column names are cached per migration run, so an upgrade from
+an empty database issues one PRAGMA table_info per table instead of one per
+check. The add/drop wrappers keep the cache in sync with the schema.
+
+This module lives outside versions/ because Alembic loads every module in
+that directory as a revision.
+"""
+import weakref
+from typing import FrozenSet, Iterable
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# {MigrationContext: {table_name: frozenset of column names}}
+_columns_cache = weakref.WeakKeyDictionary()
+
+
+def _table_cache() -> dict:
+    return _columns_cache.setdefault(op.get_context(), {})
+
+
+def table_columns(table_name: str) -> FrozenSet[str]:
+    """Column names of a table, queried once per migration run."""
+    cache = _table_cache()
+    columns = cache.get(table_name)
+    if columns is None:
+        inspector = inspect(op.get_bind())
+        columns = frozenset(col["name"] for col in inspector.get_columns(table_name))
+        cache[table_name] = columns
+    return columns
+
+
+def column_exists(table_name: str, column_name: str) -> bool:
+    """Check if column exists (idempotent migrations for SQLite)."""
+    return column_name in table_columns(table_name)
+
+
+def index_exists(table_name: str, index_name: str) -> bool:
+    """Check if index exists (idempotent migrations for SQLite)."""
+    inspector = inspect(op.get_bind())
+    return any(idx["name"] == index_name for idx in inspector.get_indexes(table_name))
+
+
+def add_column(table_name: str, column: sa.Column) -> None:
+    """op.add_column() that keeps the column cache current."""
+    op.add_column(table_name, column)
+    _table_cache().pop(table_name, None)
+
+
+def add_missing_columns(table_name: str, columns: Iterable[sa.Column]) -> None:
+    """
+    Add the columns a table does not have yet, in one batch operation.
+
+    recreate="never" keeps this a series of ALTER TABLE ADD COLUMN statements,
+    so SQLite never copies the table.
+    """
+    existing = table_columns(table_name)
+    missing = [column for column in columns if column.name not in existing]
+    if not missing:
+        return
+    with op.batch_alter_table(table_name, recreate="never") as batch_op:
+        for column in missing:
+            batch_op.add_column(column)
+    _table_cache().pop(table_name, None)
+
+
+def drop_column(table_name: str, column_name: str) -> None:
+    """op.drop_column() that keeps the column cache current."""
+    op.drop_column(table_name, column_name)
+    _table_cache().pop(table_name, None)
@@ -5,9 +5,9 @@ Revises: 38292967f3ca
 Create Date: 2025-12-27 00:00:00.000000
 
 """
-from alembic import op
 import sqlalchemy as sa
-from sqlalchemy import inspect
+
+from migrations.helpers import add_column, column_exists, drop_column
 
 
 # revision identifiers, used by Alembic.
@@ -22,19 +22,16 @@ def upgrade() -> None:
     Add template_style field to projects table.
     This field stores the style description when user chooses template-free mode.
     """
-    bind = op.get_bind()
-    inspector = inspect(bind)
-    columns = [col["name"] for col in inspector.get_columns("projects")]
-    if "template_style" in columns:
+    if column_exists("projects", "template_style"):
         return
 
     # Add template_style column (nullable, defaults to None)
-    op.add_column('projects', sa.Column('template_style', sa.Text(), nullable=True))
+    add_column('projects', sa.Column('template_style', sa.Text(), nullable=True))
 
 
 def downgrade() -> None:
     """
     Remove template_style field from projects table.
     """
-    op.drop_column('projects', 'template_style')
+    drop_column('projects', 'template_style')
 
@@ -6,9 +6,9 @@ Create Date: 2026-01-02 00:00:00.000000
 
 """
 
-from alembic import op
 import sqlalchemy as sa
-from sqlalchemy import inspect
+
+from migrations.helpers import add_missing_columns, drop_column, table_columns
 
 
 # revision identifiers, used by Alembic.
@@ -18,59 +18,23 @@ branch_labels = None
 depends_on = None
 
 
-def _column_exists(table_name: str, column_name: str) -> bool:
-    """Check if column exists (idempotent migrations for SQLite)."""
-    bind = op.get_bind()
-    inspector = inspect(bind)
-    columns = [col["name"] for col in inspector.get_columns(table_name)]
-    return column_name in columns
-
-
 def upgrade() -> None:
     """
     Add project_type + aspect ratio settings to projects table.
     """
-    if not _column_exists("projects", "project_type"):
-        op.add_column(
-            "projects",
-                sa.Column(
-                    "project_type",
-                    sa.String(length=20),
-                    nullable=False,
-                    server_default="ecom",
-                ),
-            )
-
-    if not _column_exists("projects", "page_aspect_ratio"):
-        op.add_column(
-            "projects",
-                sa.Column(
-                    "page_aspect_ratio",
-                    sa.String(length=20),
-                    nullable=False,
-                    server_default="3:4",
-                ),
-            )
-
-    if not _column_exists("projects", "cover_aspect_ratio"):
-        op.add_column(
-            "projects",
-                sa.Column(
-                    "cover_aspect_ratio",
-                    sa.String(length=20),
-                    nullable=False,
-                    server_default="1:1",
-                ),
-            )
+    new_columns = (
+        sa.Column("project_type", sa.String(length=20), nullable=False, server_default="ecom"),
+        sa.Column("page_aspect_ratio", sa.String(length=20), nullable=False, server_default="3:4"),
+        sa.Column("cover_aspect_ratio", sa.String(length=20), nullable=False, server_default="1:1"),
+    )
+    add_missing_columns("projects", new_columns)
 
 
 def downgrade() -> None:
     """
     Remove project_type + aspect ratio settings from projects table.
     """
-    if _column_exists("projects", "cover_aspect_ratio"):
-        op.drop_column("projects", "cover_aspect_ratio")
-    if _column_exists("projects", "page_aspect_ratio"):
-        op.drop_column("projects", "page_aspect_ratio")
-    if _column_exists("projects", "project_type"):
-        op.drop_column("projects", "project_type")
+    existing = table_columns("projects")
+    for column_name in ("cover_aspect_ratio", "page_aspect_ratio", "project_type"):
+        if column_name in existing:
+            drop_column("projects", column_name)
@@ -6,9 +6,9 @@ Create Date: 2026-01-03 00:00:00.000000
 
 """
 
-from alembic import op
 import sqlalchemy as sa
-from sqlalchemy import inspect
+
+from migrations.helpers import add_column, column_exists, drop_column
 
 
 # revision identifiers, used by Alembic.
@@ -18,22 +18,14 @@ branch_labels = None
 depends_on = None
 
 
-def _column_exists(table_name: str, column_name: str) -> bool:
-    """Check if column exists (idempotent migrations for SQLite)."""
-    bind = op.get_bind()
-    inspector = inspect(bind)
-    columns = [col["name"] for col in inspector.get_columns(table_name)]
-    return column_name in columns
-
-
 def upgrade() -> None:
     """Add optional Seedream API key to settings table."""
-    if not _column_exists("settings", "seedream_api_key"):
-        op.add_column("settings", sa.Column("seedream_api_key", sa.String(length=500), nullable=True))
+    if not column_exists("settings", "seedream_api_key"):
+        add_column("settings", sa.Column("seedream_api_key", sa.String(length=500), nullable=True))
 
 
 def downgrade() -> None:
     """Remove seedream_api_key from settings table."""
-    if _column_exists("settings", "seedream_api_key"):
-        op.drop_column("settings", "seedream_api_key")
+    if column_exists("settings", "seedream_api_key"):
+        drop_column("settings", "seedream_api_key")
 
@@ -6,9 +6,9 @@ Create Date: 2026-01-03 00:00:00.000000
 
 """
 
-from alembic import op
 import sqlalchemy as sa
-from sqlalchemy import inspect
+
+from migrations.helpers import add_column, column_exists, drop_column
 
 
 # revision identifiers, used by Alembic.
@@ -18,22 +18,14 @@ branch_labels = None
 depends_on = None
 
 
-def _column_exists(table_name: str, column_name: str) -> bool:
-    """Check if column exists (idempotent migrations for SQLite)."""
-    bind = op.get_bind()
-    inspector = inspect(bind)
-    columns = [col["name"] for col in inspector.get_columns(table_name)]
-    return column_name in columns
-
-
 def upgrade() -> None:
     """Add per-project image_model override to projects table."""
-    if not _column_exists("projects", "image_model"):
-        op.add_column("projects", sa.Column("image_model", sa.String(length=100), nullable=True))
+    if not column_exists("projects", "image_model"):
+        add_column("projects", sa.Column("image_model", sa.String(length=100), nullable=True))
 
 
 def downgrade() -> None:
     """Remove image_model from projects table."""
-    if _column_exists("projects", "image_model"):
-        op.drop_column("projects", "image_model")
+    if column_exists("projects", "image_model"):
+        drop_column("projects", "image_model")
 
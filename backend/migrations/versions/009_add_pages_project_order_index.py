@@ -0,0 +1,35 @@
+"""add (project_id, order_index) index to pages
+
+Revision ID: 009_add_pages_project_order_idx
+Revises: 008_add_project_image_model
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+
+from alembic import op
+
+from migrations.helpers import index_exists
+
+
+# revision identifiers, used by Alembic.
+revision = "009_add_pages_project_order_idx"
+down_revision = "008_add_project_image_model"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index pages by project so ordered per-project page lists avoid a table scan."""
+    if not index_exists("pages", "ix_pages_project_id_order_index"):
+        op.create_index(
+            "ix_pages_project_id_order_index",
+            "pages",
+            ["project_id", "order_index"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Remove the (project_id, order_index) index from pages."""
+    if index_exists("pages", "ix_pages_project_id_order_index"):
+        op.drop_index("ix_pages_project_id_order_index", table_name="pages")
@@ -0,0 +1,35 @@
+"""add (url, project_id) index to materials
+
+Revision ID: 010_add_materials_url_index
+Revises: 009_add_pages_project_order_idx
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+
+from alembic import op
+
+from migrations.helpers import index_exists
+
+
+# revision identifiers, used by Alembic.
+revision = "010_add_materials_url_index"
+down_revision = "009_add_pages_project_order_idx"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index materials by URL so associating global materials avoids a table scan."""
+    if not index_exists("materials", "ix_materials_url_project_id"):
+        op.create_index(
+            "ix_materials_url_project_id",
+            "materials",
+            ["url", "project_id"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Remove the (url, project_id) index from materials."""
+    if index_exists("materials", "ix_materials_url_project_id"):
+        op.drop_index("ix_materials_url_project_id", table_name="materials")
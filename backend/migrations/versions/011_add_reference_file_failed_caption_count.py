@@ -0,0 +1,56 @@
+"""add image_caption_failed_count to reference_files
+
+Revision ID: 011_add_ref_file_failed_count
+Revises: 010_add_materials_url_index
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import add_column, column_exists, drop_column
+
+
+# revision identifiers, used by Alembic.
+revision = "011_add_ref_file_failed_count"
+down_revision = "010_add_materials_url_index"
+branch_labels = None
+depends_on = None
+
+# Same pattern as ReferenceFile.count_failed_image_captions (markdown images: ![alt](url))
+_MARKDOWN_IMAGE_PATTERN = re.compile(r'!\[(.*?)\]\([^\)]+\)')
+
+
+def _count_failed_image_captions(markdown: str) -> int:
+    return sum(
+        1 for match in _MARKDOWN_IMAGE_PATTERN.finditer(markdown)
+        if match.start(1) == match.end(1) or match.group(1).isspace()
+    )
+
+
+def upgrade() -> None:
+    """Store the failed image caption count so reading it no longer scans the markdown."""
+    if column_exists("reference_files", "image_caption_failed_count"):
+        return
+    add_column("reference_files", sa.Column("image_caption_failed_count", sa.Integer(), nullable=True))
+
+    # Backfill parsed files in one pass (SQLite has no regex functions to do it in SQL)
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, markdown_content FROM reference_files "
+        "WHERE parse_status = 'completed' AND markdown_content IS NOT NULL"
+    )).all()
+    if rows:
+        bind.execute(
+            sa.text("UPDATE reference_files SET image_caption_failed_count = :count WHERE id = :id"),
+            [{"id": row.id, "count": _count_failed_image_captions(row.markdown_content)} for row in rows],
+        )
+
+
+def downgrade() -> None:
+    """Remove image_caption_failed_count from reference_files."""
+    if column_exists("reference_files", "image_caption_failed_count"):
+        drop_column("reference_files", "image_caption_failed_count")
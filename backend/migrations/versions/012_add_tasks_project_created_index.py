@@ -0,0 +1,35 @@
+"""add (project_id, created_at) index to tasks
+
+Revision ID: 012_add_tasks_project_index
+Revises: 011_add_ref_file_failed_count
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+
+from alembic import op
+
+from migrations.helpers import index_exists
+
+
+# revision identifiers, used by Alembic.
+revision = "012_add_tasks_project_index"
+down_revision = "011_add_ref_file_failed_count"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index tasks by project so per-project task lookups avoid a table scan."""
+    if not index_exists("tasks", "ix_tasks_project_id_created_at"):
+        op.create_index(
+            "ix_tasks_project_id_created_at",
+            "tasks",
+            ["project_id", "created_at"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Remove the (project_id, created_at) index from tasks."""
+    if index_exists("tasks", "ix_tasks_project_id_created_at"):
+        op.drop_index("ix_tasks_project_id_created_at", table_name="tasks")
@@ -5,9 +5,9 @@ Revises: 003_new_fields
 Create Date: 2025-12-17 22:07:23.174881
 
 """
-from alembic import op
 import sqlalchemy as sa
-from sqlalchemy import inspect
+
+from migrations.helpers import add_column, column_exists, drop_column
 
 
 # revision identifiers, used by Alembic.
@@ -17,14 +17,6 @@ branch_labels = None
 depends_on = None
 
 
-def _column_exists(table_name: str, column_name: str) -> bool:
-    """Check if column exists"""
-    bind = op.get_bind()
-    inspector = inspect(bind)
-    columns = [col['name'] for col in inspector.get_columns(table_name)]
-    return column_name in columns
-
-
 def upgrade() -> None:
     """
     Add mineru_token column to settings table.
@@ -32,14 +24,14 @@ def upgrade() -> None:
     Idempotent: checks if column exists before adding.
     """
     # ### commands auto generated by Alembic - please adjust! ###
-    if not _column_exists('settings', 'mineru_token'):
-        op.add_column('settings', sa.Column('mineru_token', sa.String(length=500), nullable=True))
+    if not column_exists('settings', 'mineru_token'):
+        add_column('settings', sa.Column('mineru_token', sa.String(length=500), nullable=True))
     # ### end Alembic commands ###
 
 
 def downgrade() -> None:
     # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_column('settings', 'mineru_token')
+    drop_column('settings', 'mineru_token')
     # ### end Alembic commands ###
 
 
@@ -0,0 +1,57 @@
+"""
+JSON helpers for model columns stored as JSON text - use orjson when it is installed
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def json_loads(text: str) -> Any:
+    """
+    Parse a JSON column value.
+
+    Raises json.JSONDecodeError on invalid input either way
+    (orjson.JSONDecodeError subclasses it).
+    """
+    if orjson is None:
+        return json.loads(text)
+    return orjson.loads(text)
+
+
+def _copy_json(value: Any) -> Any:
+    """Copy the dicts and lists of a parsed JSON value; other JSON values are immutable."""
+    if type(value) is dict:
+        return {key: _copy_json(item) for key, item in value.items()}
+    if type(value) is list:
+        return [_copy_json(item) for item in value]
+    return value
+
+
+def memoized_json_loads(instance: Any, cache_attr: str, text: str) -> Any:
+    """
+    json_loads(text), cached on instance.<cache_attr> for as long as the column
+    still holds the very same string object.
+
+    Each call returns its own copy, so callers may mutate the result freely;
+    copying the containers is cheaper than parsing the text again.
+    """
+    cached = getattr(instance, cache_attr)
+    if cached is None or cached[0] is not text:
+        cached = (text, json_loads(text))
+        setattr(instance, cache_attr, cached)
+    return _copy_json(cached[1])
+
+
+def json_dumps(data: Any) -> str:
+    """Serialize a value for a JSON column, without escaping non-ASCII text."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            # e.g. integers beyond 64 bits
+            pass
+    return json.dumps(data, ensure_ascii=False)
@@ -11,6 +11,10 @@ class Material(db.Model):
     Material model - represents a material image
     """
     __tablename__ = 'materials'
+    __table_args__ = (
+        # associate_materials_to_project matches global materials by URL
+        db.Index('ix_materials_url_project_id', 'url', 'project_id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=True)  # Can be null, for global materials not belonging to a project
@@ -25,14 +29,16 @@ class Material(db.Model):
     
     def to_dict(self):
         """Convert to dictionary"""
+        # Read each instrumented attribute once
+        created_at, updated_at = self.created_at, self.updated_at
         return {
             'id': self.id,
             'project_id': self.project_id,
             'filename': self.filename,
             'url': self.url,
             'relative_path': self.relative_path,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': created_at.isoformat() if created_at else None,
+            'updated_at': updated_at.isoformat() if updated_at else None,
         }
     
     def __repr__(self):
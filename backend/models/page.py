@@ -5,6 +5,7 @@ import uuid
 import json
 from datetime import datetime
 from . import db
+from .json_utils import json_dumps, memoized_json_loads
 
 
 class Page(db.Model):
@@ -12,6 +13,10 @@ class Page(db.Model):
     Page model - represents a single generated image page
     """
     __tablename__ = 'pages'
+    __table_args__ = (
+        # Pages are always fetched per project in order_index order
+        db.Index('ix_pages_project_id_order_index', 'project_id', 'order_index'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
@@ -30,41 +35,50 @@ class Page(db.Model):
     image_versions = db.relationship('PageImageVersion', back_populates='page', 
                                      lazy='dynamic', cascade='all, delete-orphan',
                                      order_by='PageImageVersion.version_number.desc()')
+
+    # Parsed JSON columns as (raw string, value); plain attributes, not mapped
+    _outline_cache = None
+    _description_cache = None
     
     def get_outline_content(self):
-        """Parse outline_content from JSON string"""
+        """Parse outline_content from JSON string (memoized)"""
         if self.outline_content:
             try:
-                return json.loads(self.outline_content)
+                return memoized_json_loads(self, '_outline_cache', self.outline_content)
             except json.JSONDecodeError:
                 return None
         return None
     
     def set_outline_content(self, data):
         """Set outline_content as JSON string"""
+        self._outline_cache = None
         if data:
-            self.outline_content = json.dumps(data, ensure_ascii=False)
+            self.outline_content = json_dumps(data)
         else:
             self.outline_content = None
     
     def get_description_content(self):
-        """Parse description_content from JSON string"""
+        """Parse description_content from JSON string (memoized)"""
         if self.description_content:
             try:
-                return json.loads(self.description_content)
+                return memoized_json_loads(self, '_description_cache', self.description_content)
             except json.JSONDecodeError:
                 return None
         return None
     
     def set_description_content(self, data):
         """Set description_content as JSON string"""
+        self._description_cache = None
         if data:
-            self.description_content = json.dumps(data, ensure_ascii=False)
+            self.description_content = json_dumps(data)
         else:
             self.description_content = None
     
     def to_dict(self, include_versions=False):
         """Convert to dictionary"""
+        # Read each instrumented attribute once
+        image_path = self.generated_image_path
+        created_at, updated_at = self.created_at, self.updated_at
         data = {
             'page_id': self.id,
             'order_index': self.order_index,
@@ -72,10 +86,10 @@ class Page(db.Model):
             'aspect_ratio': self.aspect_ratio,
             'outline_content': self.get_outline_content(),
             'description_content': self.get_description_content(),
-            'generated_image_url': f'/files/{self.project_id}/pages/{self.generated_image_path.split("/")[-1]}' if self.generated_image_path else None,
+            'generated_image_url': f'/files/{self.project_id}/pages/{image_path.rpartition("/")[2]}' if image_path else None,
             'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': created_at.isoformat() if created_at else None,
+            'updated_at': updated_at.isoformat() if updated_at else None,
         }
         
         if include_versions:
@@ -35,7 +35,7 @@ class PageImageVersion(db.Model):
             'version_id': self.id,
             'page_id': self.page_id,
             'image_path': self.image_path,
-            'image_url': f'/files/{project_id}/pages/{self.image_path.split("/")[-1]}' if self.image_path and project_id else None,
+            'image_url': f'/files/{project_id}/pages/{self.image_path.rpartition("/")[2]}' if self.image_path and project_id else None,
             'version_number': self.version_number,
             'is_current': self.is_current,
             'created_at': created_at_str,
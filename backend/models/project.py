@@ -63,7 +63,7 @@ class Project(db.Model):
             'page_aspect_ratio': self.page_aspect_ratio,
             'cover_aspect_ratio': self.cover_aspect_ratio,
             'image_model': self.image_model,
-            'template_image_url': f'/files/{self.id}/template/{self.template_image_path.split("/")[-1]}' if self.template_image_path else None,
+            'template_image_url': f'/files/{self.id}/template/{self.template_image_path.rpartition("/")[2]}' if self.template_image_path else None,
             'template_style': self.template_style,
             'status': self.status,
             'created_at': created_at_str,
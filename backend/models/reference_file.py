@@ -1,10 +1,14 @@
 """
 Reference File model - stores uploaded reference files and their parsed content
 """
+import re
 import uuid
 from datetime import datetime
 from . import db
 
+# Match markdown images: ![alt](url)
+_MARKDOWN_IMAGE_PATTERN = re.compile(r'!\[(.*?)\]\([^\)]+\)')
+
 
 class ReferenceFile(db.Model):
     """
@@ -22,6 +26,7 @@ class ReferenceFile(db.Model):
     markdown_content = db.Column(db.Text, nullable=True)  # Parsed markdown with enhanced image descriptions
     error_message = db.Column(db.Text, nullable=True)  # Error message if parsing failed
     mineru_batch_id = db.Column(db.String(100), nullable=True)  # Mineru service batch ID
+    image_caption_failed_count = db.Column(db.Integer, nullable=True)  # Images without alt text, stored when parsing completes
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -34,8 +39,10 @@ class ReferenceFile(db.Model):
         
         Args:
             include_content: Whether to include markdown_content (can be large)
-            include_failed_count: Whether to calculate failed image count (can be slow)
+            include_failed_count: Whether to include the failed image count
         """
+        # Read each instrumented attribute once
+        created_at, updated_at = self.created_at, self.updated_at
         result = {
             'id': self.id,
             'project_id': self.project_id,
@@ -44,8 +51,8 @@ class ReferenceFile(db.Model):
             'file_type': self.file_type,
             'parse_status': self.parse_status,
             'error_message': self.error_message,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': created_at.isoformat() if created_at else None,
+            'updated_at': updated_at.isoformat() if updated_at else None,
         }
         
         if include_content:
@@ -53,7 +60,10 @@ class ReferenceFile(db.Model):
         
         # 只有明确要求且文件已解析完成时才计算失败数
         if include_failed_count and self.parse_status == 'completed':
-            result['image_caption_failed_count'] = self.count_failed_image_captions()
+            failed_count = self.image_caption_failed_count
+            if failed_count is None:
+                failed_count = self.count_failed_image_captions()
+            result['image_caption_failed_count'] = failed_count
         
         return result
     
@@ -67,14 +77,11 @@ class ReferenceFile(db.Model):
         if not self.markdown_content:
             return 0
         
-        import re
-        # Match markdown images: ![alt](url)
-        pattern = r'!\[(.*?)\]\([^\)]+\)'
-        matches = re.findall(pattern, self.markdown_content)
-        
-        # Count images with empty alt text
-        failed_count = sum(1 for alt_text in matches if not alt_text.strip())
-        return failed_count
+        # Count images with empty (or whitespace-only) alt text while scanning
+        return sum(
+            1 for match in _MARKDOWN_IMAGE_PATTERN.finditer(self.markdown_content)
+            if match.start(1) == match.end(1) or match.group(1).isspace()
+        )
     
     def __repr__(self):
         return f'<ReferenceFile {self.id}: {self.filename} ({self.parse_status})>'
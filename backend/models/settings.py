@@ -51,6 +51,42 @@ class Settings(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
 
+    @staticmethod
+    def default_values():
+        """
+        Column values for a fresh (or reset) settings row, taken from Config / .env.
+
+        - AI_PROVIDER_FORMAT 为 "openai" 时使用 OPENAI_API_BASE / OPENAI_API_KEY
+        - 否则（默认 gemini）使用 GOOGLE_API_BASE / GOOGLE_API_KEY
+        """
+        # 延迟导入，避免循环依赖
+        from config import Config
+        from utils.url_utils import normalize_openai_api_base
+
+        if (Config.AI_PROVIDER_FORMAT or '').lower() == 'openai':
+            default_api_base = normalize_openai_api_base(Config.OPENAI_API_BASE)
+            default_api_key = Config.OPENAI_API_KEY or None
+        else:
+            default_api_base = Config.GOOGLE_API_BASE or None
+            default_api_key = Config.GOOGLE_API_KEY or None
+
+        return {
+            'ai_provider_format': Config.AI_PROVIDER_FORMAT,
+            'api_base_url': default_api_base,
+            'api_key': default_api_key,
+            'seedream_api_key': (getattr(Config, "SEEDREAM_API_KEY", "") or None),
+            'image_resolution': Config.DEFAULT_RESOLUTION,
+            'image_aspect_ratio': Config.DEFAULT_ASPECT_RATIO,
+            'max_description_workers': Config.MAX_DESCRIPTION_WORKERS,
+            'max_image_workers': Config.MAX_IMAGE_WORKERS,
+            'text_model': Config.TEXT_MODEL,
+            'image_model': Config.IMAGE_MODEL,
+            'mineru_api_base': Config.MINERU_API_BASE,
+            'mineru_token': Config.MINERU_TOKEN,
+            'image_caption_model': Config.IMAGE_CAPTION_MODEL,
+            'output_language': 'zh',  # 默认中文
+        }
+
     @staticmethod
     def get_settings():
         """
@@ -59,39 +95,14 @@ class Settings(db.Model):
         - 首次创建时，用 Config（也就是 .env）里的值初始化，作为“系统默认值”
         - 之后所有读写都只走数据库，env 只影响初始化/重置逻辑
         """
-        settings = Settings.query.first()
+        # The row is always created with id=1, so this is normally a primary-key
+        # lookup that the session identity map can answer without a SELECT
+        settings = db.session.get(Settings, 1) or Settings.query.first()
+        needs_commit = settings is None
         if not settings:
-            # 延迟导入，避免循环依赖
-            from config import Config
-
-            # 根据 AI_PROVIDER_FORMAT 选择默认 Provider 的 env 配置
-            if (Config.AI_PROVIDER_FORMAT or '').lower() == 'openai':
-                default_api_base = Config.OPENAI_API_BASE or None
-                default_api_key = Config.OPENAI_API_KEY or None
-            else:
-                # 默认为 gemini（Google）
-                default_api_base = Config.GOOGLE_API_BASE or None
-                default_api_key = Config.GOOGLE_API_KEY or None
-
-            settings = Settings(
-                ai_provider_format=Config.AI_PROVIDER_FORMAT,
-                api_base_url=default_api_base,
-                api_key=default_api_key,
-                seedream_api_key=(getattr(Config, "SEEDREAM_API_KEY", "") or None),
-                image_resolution=Config.DEFAULT_RESOLUTION,
-                image_aspect_ratio=Config.DEFAULT_ASPECT_RATIO,
-                max_description_workers=Config.MAX_DESCRIPTION_WORKERS,
-                max_image_workers=Config.MAX_IMAGE_WORKERS,
-                text_model=Config.TEXT_MODEL,
-                image_model=Config.IMAGE_MODEL,
-                mineru_api_base=Config.MINERU_API_BASE,
-                mineru_token=Config.MINERU_TOKEN,
-                image_caption_model=Config.IMAGE_CAPTION_MODEL,
-                output_language='zh',  # 默认中文
-            )
+            settings = Settings(**Settings.default_values())
             settings.id = 1
             db.session.add(settings)
-            db.session.commit()
 
         # Backward-compat: normalize OpenAI base URL if user saved a bare domain without /v1.
         # This prevents OpenAI SDK calls from accidentally hitting a HTML website.
@@ -101,7 +112,11 @@ class Settings(db.Model):
             normalized = normalize_openai_api_base(settings.api_base_url)
             if normalized and normalized != settings.api_base_url:
                 settings.api_base_url = normalized
-                db.session.commit()
+                needs_commit = True
+
+        # Creation and normalization share a single COMMIT
+        if needs_commit:
+            db.session.commit()
         return settings
 
     def __repr__(self):
@@ -4,7 +4,14 @@ Task model for tracking async operations
 import uuid
 import json
 from datetime import datetime
+from sqlalchemy import case, func, update
 from . import db
+from .json_utils import json_dumps, memoized_json_loads
+
+
+def _supports_json_set(bind) -> bool:
+    """Whether progress can be updated in place with SQLite's json_set()."""
+    return bind.dialect.name == 'sqlite'
 
 
 class Task(db.Model):
@@ -12,6 +19,10 @@ class Task(db.Model):
     Task model - tracks asynchronous generation tasks
     """
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Project.tasks (and project deletion) looks tasks up by project
+        db.Index('ix_tasks_project_id_created_at', 'project_id', 'created_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
@@ -24,42 +35,79 @@ class Task(db.Model):
     
     # Relationships
     project = db.relationship('Project', back_populates='tasks')
+
+    # Parsed progress as (raw string, value); plain attribute, not mapped
+    _progress_cache = None
     
     def get_progress(self):
-        """Parse progress from JSON string"""
+        """Parse progress from JSON string (memoized)"""
         if self.progress:
             try:
-                return json.loads(self.progress)
+                return memoized_json_loads(self, '_progress_cache', self.progress)
             except json.JSONDecodeError:
                 return {"total": 0, "completed": 0, "failed": 0}
         return {"total": 0, "completed": 0, "failed": 0}
     
     def set_progress(self, data):
         """Set progress as JSON string"""
+        self._progress_cache = None
         if data:
-            self.progress = json.dumps(data)
+            self.progress = json_dumps(data)
         else:
             self.progress = None
     
     def update_progress(self, completed=None, failed=None):
-        """Update progress incrementally"""
-        prog = self.get_progress()
+        """
+        Update progress counters incrementally
+
+        On SQLite this runs a single UPDATE with json_set(), so the stored JSON
+        is neither parsed in Python nor rewritten as a whole; other progress keys
+        written concurrently are kept. Invalid or missing progress starts from
+        the same zero counters get_progress() falls back to. Other databases
+        use a plain read-modify-write.
+        """
+        changes = []
         if completed is not None:
-            prog['completed'] = completed
+            changes += ['$.completed', completed]
         if failed is not None:
-            prog['failed'] = failed
-        self.set_progress(prog)
+            changes += ['$.failed', failed]
+        if not changes:
+            return
+
+        if not _supports_json_set(db.session.get_bind()):
+            prog = self.get_progress()
+            if completed is not None:
+                prog['completed'] = completed
+            if failed is not None:
+                prog['failed'] = failed
+            self.set_progress(prog)
+            return
+
+        current = case(
+            (func.json_valid(Task.progress) == 1, Task.progress),
+            else_=json_dumps({"total": 0, "completed": 0, "failed": 0}),
+        )
+        db.session.execute(
+            update(Task)
+            .where(Task.id == self.id)
+            .values(progress=func.json_set(current, *changes))
+            .execution_options(synchronize_session=False)
+        )
+        # Reload the new value on next access
+        db.session.expire(self, ['progress'])
     
     def to_dict(self):
         """Convert to dictionary"""
+        # Read each instrumented attribute once
+        created_at, completed_at = self.created_at, self.completed_at
         return {
             'task_id': self.id,
             'task_type': self.task_type,
             'status': self.status,
             'progress': self.get_progress(),
             'error_message': self.error_message,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'created_at': created_at.isoformat() if created_at else None,
+            'completed_at': completed_at.isoformat() if completed_at else None,
         }
     
     def __repr__(self):
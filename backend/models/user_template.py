@@ -24,7 +24,7 @@ class UserTemplate(db.Model):
         return {
             'template_id': self.id,
             'name': self.name,
-            'template_image_url': f'/files/user-templates/{self.id}/{self.file_path.split("/")[-1]}',
+            'template_image_url': f'/files/user-templates/{self.id}/{self.file_path.rpartition("/")[2]}',
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -1,6 +1,6 @@
 """Services package"""
 from .ai_service import AIService, ProjectContext
-from .file_service import FileService
+from .file_service import FileService, get_file_service
 
-__all__ = ['AIService', 'ProjectContext', 'FileService']
+__all__ = ['AIService', 'ProjectContext', 'FileService', 'get_file_service']
 
@@ -27,8 +27,11 @@ Environment Variables:
 """
 import os
 import logging
+from functools import lru_cache
 from typing import Dict, Any
 
+from flask import current_app, has_app_context
+
 from .text import TextProvider, GenAITextProvider, OpenAITextProvider
 from .image import ImageProvider, GenAIImageProvider, OpenAIImageProvider
 from utils.url_utils import normalize_openai_api_base
@@ -38,13 +41,22 @@ logger = logging.getLogger(__name__)
 __all__ = [
     'TextProvider', 'GenAITextProvider', 'OpenAITextProvider',
     'ImageProvider', 'GenAIImageProvider', 'OpenAIImageProvider',
-    'get_text_provider', 'get_image_provider', 'get_provider_format'
+    'get_text_provider', 'get_image_provider', 'get_provider_format',
+    'clear_provider_config_cache'
 ]
 
+# app.extensions key holding the resolved provider config
+_PROVIDER_CONFIG_EXTENSION = 'ai_provider_config'
+
 
+# Model names and API bases take only a handful of distinct values,
+# so the lowercased comparisons below are computed once per input
+@lru_cache(maxsize=128)
 def _is_seedream_model(model: str) -> bool:
     return "seedream" in (model or "").lower()
 
+
+@lru_cache(maxsize=128)
 def _normalize_image_model(model: str, api_base: str = None) -> str:
     """
     Normalize/alias image model names for provider compatibility.
@@ -80,16 +92,11 @@ def get_provider_format() -> str:
         "gemini", "openai", or "vertex"
     """
     # Try to get from Flask app config first (database settings)
-    try:
-        from flask import current_app
-        if current_app and hasattr(current_app, 'config'):
-            config_value = current_app.config.get('AI_PROVIDER_FORMAT')
-            if config_value:
-                return str(config_value).lower()
-    except RuntimeError:
-        # Not in Flask application context
-        pass
-    
+    if has_app_context():
+        config_value = current_app.config.get('AI_PROVIDER_FORMAT')
+        if config_value:
+            return str(config_value).lower()
+
     # Fallback to environment variable
     return os.getenv('AI_PROVIDER_FORMAT', 'gemini').lower()
 
@@ -98,35 +105,56 @@ def _get_config_value(key: str, default: str = None) -> str:
     """
     Helper to get config value with priority: app.config > env var > default
     """
-    try:
-        from flask import current_app
-        if current_app and hasattr(current_app, 'config'):
-            # Check if key exists in config (even if value is empty string)
-            # This allows database settings to override env vars even with empty values
-            if key in current_app.config:
-                config_value = current_app.config.get(key)
-                # Return the value even if it's empty string (user explicitly set it)
-                if config_value is not None:
-                    logger.debug(f"[CONFIG] Using {key} from app.config")
-                    return str(config_value)
-            else:
-                logger.debug(f"[CONFIG] Key {key} not found in app.config, checking env var")
-    except RuntimeError as e:
-        # Not in Flask application context, fallback to env var
-        logger.debug(f"[CONFIG] Not in Flask context for {key}: {e}")
+    if has_app_context():
+        # Database settings override env vars, even with empty values
+        # (the user explicitly set them); None means "not set"
+        config_value = current_app.config.get(key)
+        if config_value is not None:
+            logger.debug("[CONFIG] Using %s from app.config", key)
+            return str(config_value)
+    else:
+        logger.debug("[CONFIG] Not in Flask context for %s", key)
     # Fallback to environment variable or default
     env_value = os.getenv(key)
     if env_value is not None:
-        logger.debug(f"[CONFIG] Using {key} from environment")
+        logger.debug("[CONFIG] Using %s from environment", key)
         return env_value
     if default is not None:
-        logger.debug(f"[CONFIG] Using {key} default: {default}")
+        logger.debug("[CONFIG] Using %s default: %s", key, default)
         return default
-    logger.debug(f"[CONFIG] No value found for {key}, returning None")
+    logger.debug("[CONFIG] No value found for %s, returning None", key)
     return None
 
 
+def _current_app_or_none():
+    return current_app._get_current_object() if has_app_context() else None
+
+
+def clear_provider_config_cache() -> None:
+    """Drop the provider config cached on the current app (call after AI settings change)"""
+    app = _current_app_or_none()
+    if app is not None:
+        app.extensions.pop(_PROVIDER_CONFIG_EXTENSION, None)
+
+
 def _get_provider_config() -> Dict[str, Any]:
+    """
+    Get provider configuration, cached on the Flask app
+
+    The config only changes through the settings API, which clears it via
+    clear_provider_config_cache(). Outside an app context it is resolved
+    on every call.
+    """
+    app = _current_app_or_none()
+    if app is not None:
+        config = app.extensions.get(_PROVIDER_CONFIG_EXTENSION)
+        if config is None:
+            config = app.extensions[_PROVIDER_CONFIG_EXTENSION] = _resolve_provider_config()
+        return config
+    return _resolve_provider_config()
+
+
+def _resolve_provider_config() -> Dict[str, Any]:
     """
     Get provider configuration based on AI_PROVIDER_FORMAT
 
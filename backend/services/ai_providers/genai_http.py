@@ -0,0 +1,47 @@
+"""
+Shared HTTP connection pool for Google GenAI SDK clients (AI Studio mode)
+
+Providers are built per request, and every genai.Client otherwise opens its
+own httpx pool, so each text/image call paid for a new TCP + TLS handshake.
+All API-key clients now send through one thread-safe httpx.Client that keeps
+connections alive between calls. Timeouts stay per client: the SDK passes
+them with every request.
+
+Vertex AI clients keep their own transport, since a custom httpx client
+disables the SDK's mTLS / google-auth session handling.
+"""
+import threading
+from typing import Optional
+
+import httpx
+from google.genai import types
+
+# Enough for the parallel page image generation plus concurrent text calls
+_MAX_CONNECTIONS = 32
+_MAX_KEEPALIVE_CONNECTIONS = 16
+
+_httpx_client = None
+_httpx_client_lock = threading.Lock()
+
+
+def _get_shared_httpx_client() -> httpx.Client:
+    global _httpx_client
+    if _httpx_client is None:
+        with _httpx_client_lock:
+            if _httpx_client is None:
+                _httpx_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=_MAX_CONNECTIONS,
+                        max_keepalive_connections=_MAX_KEEPALIVE_CONNECTIONS,
+                    )
+                )
+    return _httpx_client
+
+
+def api_key_http_options(api_base: Optional[str], timeout_ms: int) -> types.HttpOptions:
+    """HttpOptions for an AI Studio (API key) client using the shared connection pool."""
+    return types.HttpOptions(
+        base_url=api_base or None,
+        timeout=timeout_ms,
+        httpx_client=_get_shared_httpx_client(),
+    )
@@ -11,6 +11,7 @@ from google import genai
 from google.genai import types
 from PIL import Image
 from tenacity import retry, stop_after_attempt, wait_exponential
+from ..genai_http import api_key_http_options
 from .base import ImageProvider
 from config import get_config
 
@@ -52,14 +53,9 @@ class GenAIImageProvider(ImageProvider):
                 http_options=types.HttpOptions(timeout=timeout_ms)
             )
         else:
-            # AI Studio mode - uses API key
-            http_options = types.HttpOptions(
-                base_url=api_base,
-                timeout=timeout_ms
-            ) if api_base else types.HttpOptions(timeout=timeout_ms)
-
+            # AI Studio mode - uses API key, over the shared connection pool
             self.client = genai.Client(
-                http_options=http_options,
+                http_options=api_key_http_options(api_base, timeout_ms),
                 api_key=api_key
             )
 
@@ -135,7 +131,7 @@ class GenAIImageProvider(ImageProvider):
             
             for i, part in enumerate(response.parts):
                 if part.text is not None:
-                    logger.debug(f"Part {i}: TEXT - {part.text[:100] if len(part.text) > 100 else part.text}")
+                    logger.debug("Part %d: TEXT - %.100s", i, part.text)
                 else:
                     try:
                         logger.debug(f"Part {i}: Attempting to extract image...")
@@ -3,9 +3,17 @@ OpenAI SDK implementation for image generation.
 """
 import logging
 import base64
+import json
+import random
 import re
+import shutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 import requests
+from requests.adapters import HTTPAdapter
 from io import BytesIO
 from typing import Optional, List
 from openai import OpenAI
@@ -14,8 +22,112 @@ from .base import ImageProvider
 from config import get_config
 from utils.url_utils import normalize_openai_api_base
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Shared HTTP session for the Images API and image downloads: keeps connections
+# (and TLS sessions) alive across retries, pages and worker threads. Retries are
+# handled by the callers, so the adapter itself never retries.
+_http_session = requests.Session()
+_http_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0)
+_http_session.mount("https://", _http_adapter)
+_http_session.mount("http://", _http_adapter)
+
+def _dumps_json(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode('utf-8')
+
+
+def _loads_json(body: bytes):
+    """Parse a JSON response body (b64_json image payloads can be several MB)."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+class _RequestPacer:
+    """
+    Per-process pacing for Images API requests: caps how many are in flight and
+    spaces out their start times, so batch generation stays below provider
+    limits instead of reacting to 429s. A limit of 0 disables that check.
+    """
+
+    def __init__(self, max_inflight: int = 0, min_interval: float = 0.0):
+        self._slots = threading.BoundedSemaphore(max_inflight) if max_inflight > 0 else None
+        self._min_interval = max(float(min_interval or 0), 0.0)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    @contextmanager
+    def slot(self):
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            if self._min_interval:
+                with self._lock:
+                    now = time.monotonic()
+                    start = max(now, self._next_start)
+                    self._next_start = start + self._min_interval
+                if start > now:
+                    time.sleep(start - now)
+            yield
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+
+_images_api_pacer: Optional[_RequestPacer] = None
+_images_api_pacer_lock = threading.Lock()
+
+
+def _get_images_api_pacer() -> _RequestPacer:
+    global _images_api_pacer
+    if _images_api_pacer is None:
+        with _images_api_pacer_lock:
+            if _images_api_pacer is None:
+                config = get_config()
+                _images_api_pacer = _RequestPacer(
+                    config.OPENAI_IMAGES_API_MAX_INFLIGHT, config.OPENAI_IMAGES_API_MIN_INTERVAL
+                )
+    return _images_api_pacer
+
+
+# Reference images are JPEG-encoded in parallel (Pillow releases the GIL while encoding)
+MAX_REF_IMAGE_ENCODE_WORKERS = 4
+
+# Prompt sanitizing
+_XML_TAG_RE = re.compile(r"</?[^>]+>")
+_INLINE_WHITESPACE_RE = re.compile(r"[ \t]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_PAGE_DESCRIPTION_RE = re.compile(r"<page_description>\s*(.*?)\s*</page_description>", re.IGNORECASE | re.DOTALL)
+_ROLE_PREFIXES = ("你是", "you are ")
+_META_INSTRUCTION_TOKENS = ("markdown", "reference_information", "design_guidelines", "reference_images_rules")
+_FORBIDDEN_INSTRUCTION_TOKENS = ("禁止", "不要", "必须", "不得", "请勿", "务必", "严禁", "严格")
+# Any of these tokens in the lowercased prompt means some line may have to be dropped.
+# One case-sensitive alternation is faster than one substring scan per token
+# (and than re.IGNORECASE).
+_FILTERED_LINE_TOKEN_RE = re.compile(
+    "|".join(map(re.escape, _ROLE_PREFIXES + _META_INSTRUCTION_TOKENS + _FORBIDDEN_INSTRUCTION_TOKENS))
+)
+# A whole line that would be dropped: it starts with a role prefix (after
+# stripping, so "you are " needs more text behind it) or contains an
+# instruction token anywhere
+_FILTERED_LINE_RE = re.compile(
+    r"^[^\S\n]*(?:你是|you are [^\n]*?\S)[^\n]*$|^[^\n]*?(?:%s)[^\n]*$"
+    % "|".join(map(re.escape, _META_INSTRUCTION_TOKENS + _FORBIDDEN_INSTRUCTION_TOKENS)),
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Images embedded in chat completion text
+_MARKDOWN_IMAGE_URL_RE = re.compile(r"!\[.*?\]\((https?://[^\s\)]+)\)")
+_PLAIN_IMAGE_URL_RE = re.compile(r"(https?://[^\s\)\]]+\.(?:png|jpg|jpeg|gif|webp|bmp)(?:\?[^\s\)\]]*)?)", re.IGNORECASE)
+_DATA_URL_BASE64_RE = re.compile(r"data:image/[^;]+;base64,([A-Za-z0-9+/=]+)")
+
 
 class OpenAIImageProvider(ImageProvider):
     """Image generation using OpenAI SDK (compatible with Gemini via proxy)"""
@@ -38,7 +150,44 @@ class OpenAIImageProvider(ImageProvider):
             max_retries=get_config().OPENAI_MAX_RETRIES  # set max retries from config
         )
         self.model = model
+
+        # Routing depends only on the model and base URL, so classify them once
+        images_api_base = self.api_base or "https://api.openai.com/v1"
+        self._images_api_url = f"{images_api_base.rstrip('/')}/images/generations"
+        self._images_edit_url = f"{images_api_base.rstrip('/')}/images/edits"
+        self._is_yunwu = "yunwu.ai" in images_api_base.lower()
+        self._is_seedream = self._is_seedream_model(model)
+        self._use_images_api = self._prefers_images_api(model)
+        self._accepts_ref_image_uploads = self._supports_multipart_ref_images(model)
     
+    @staticmethod
+    def _download_image(url: str) -> Image.Image:
+        """
+        Download and decode an image URL.
+
+        The body is streamed straight into one BytesIO instead of being
+        materialized as bytes (response.content) and then copied again.
+        """
+        with _http_session.get(url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True  # undo gzip/deflate transfer encoding
+            buffer = BytesIO()
+            shutil.copyfileobj(response.raw, buffer, 256 * 1024)
+        buffer.seek(0)
+        image = Image.open(buffer)
+        image.load()
+        return image
+
+    @staticmethod
+    def _encode_image_to_jpeg(image: Image.Image) -> BytesIO:
+        """Encode PIL Image as JPEG into an in-memory buffer"""
+        buffered = BytesIO()
+        # Convert to RGB if necessary (e.g., RGBA images)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGB')
+        image.save(buffered, format="JPEG", quality=95)
+        return buffered
+
     def _encode_image_to_base64(self, image: Image.Image) -> str:
         """
         Encode PIL Image to base64 string
@@ -49,17 +198,33 @@ class OpenAIImageProvider(ImageProvider):
         Returns:
             Base64 encoded string
         """
-        buffered = BytesIO()
-        # Convert to RGB if necessary (e.g., RGBA images)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            image = image.convert('RGB')
-        image.save(buffered, format="JPEG", quality=95)
-        return base64.b64encode(buffered.getvalue()).decode('utf-8')
+        buffered = self._encode_image_to_jpeg(image)
+        # getbuffer() avoids copying the JPEG bytes; base64 output is pure ASCII
+        return base64.b64encode(buffered.getbuffer()).decode('ascii')
+
+    @staticmethod
+    def _encode_ref_images(encode, ref_images: List[Image.Image]) -> list:
+        """Apply an encoder to the reference images, in parallel when there are several"""
+        if len(ref_images) == 1:
+            return [encode(ref_images[0])]
+        workers = min(MAX_REF_IMAGE_ENCODE_WORKERS, len(ref_images))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(encode, ref_images))
 
     @staticmethod
     def _is_seedream_model(model: str) -> bool:
         return "seedream" in (model or "").lower()
 
+    @staticmethod
+    def _supports_multipart_ref_images(model: str) -> bool:
+        """
+        Whether reference images can be uploaded as multipart files to `/v1/images/edits`.
+
+        Only the gpt-image family takes several images there; other Images-API
+        models keep ignoring reference images.
+        """
+        return "gpt-image" in (model or "").lower()
+
     @staticmethod
     def _prefers_images_api(model: str) -> bool:
         """
@@ -109,20 +274,20 @@ class OpenAIImageProvider(ImageProvider):
 
     @staticmethod
     def _looks_like_no_channels_error(message: str) -> bool:
-        msg = (message or "").lower()
-        return ("no available channels" in msg) or ("no available channel" in msg)
+        # Also matches "no available channels"
+        return "no available channel" in (message or "").lower()
 
     @staticmethod
     def _looks_like_prompt_rejected(message: str) -> bool:
         msg = (message or "").lower()
+        # "content has been flagged" is covered by the flagged/content check
         return (
             "non-pictorial vocabulary" in msg
-            or "content has been flagged" in msg
-            or ("flagged" in msg and "content" in msg)
-            or ("policy" in msg and "content" in msg)
+            or ("content" in msg and ("flagged" in msg or "policy" in msg))
         )
 
     @staticmethod
+    @lru_cache(maxsize=128)
     def _sanitize_images_api_prompt(prompt: str, max_chars: int = 2000) -> str:
         """
         Make a long, instruction-heavy prompt more compatible with Images APIs.
@@ -134,57 +299,45 @@ class OpenAIImageProvider(ImageProvider):
             return ""
 
         text = str(prompt)
-        # Remove XML-like tags but keep their contents.
-        text = re.sub(r"</?[^>]+>", "\n", text)
-
-        lines: List[str] = []
-        for raw_line in text.splitlines():
-            line = raw_line.strip()
-            if not line:
-                continue
-
-            lower = line.lower()
-            if line.startswith("你是") or lower.startswith("you are "):
-                continue
-            # Remove explicit format/meta instructions that often trigger filters.
-            if "markdown" in lower:
-                continue
-            if "reference_information" in lower or "design_guidelines" in lower or "reference_images_rules" in lower:
-                continue
-            if any(token in line for token in ("禁止", "不要", "必须", "不得", "请勿", "务必", "严禁", "严格")):
-                continue
-
-            # Drop leading bullets.
-            line = line.lstrip("-•* ").strip()
-            if not line:
-                continue
-            lines.append(line)
-
-        cleaned = "\n".join(lines)
-        cleaned = re.sub(r"[ \t]+", " ", cleaned)
-        cleaned = re.sub(r"\n{3,}", "\n\n", cleaned).strip()
+        if "<" in text or _FILTERED_LINE_TOKEN_RE.search(text.lower()):
+            # Remove XML-like tags but keep their contents.
+            text = _XML_TAG_RE.sub("\n", text)
+            # Blank out role, format/meta and "forbidden" instruction lines, which often
+            # trigger filters. Normalize line breaks first so "line" means the same as
+            # for splitlines().
+            text = _FILTERED_LINE_RE.sub("", "\n".join(text.splitlines()))
+
+        # Drop leading bullets and empty lines.
+        lines = (line.strip().lstrip("-•* ").strip() for line in text.splitlines())
+        cleaned = "\n".join(line for line in lines if line)
+        cleaned = _INLINE_WHITESPACE_RE.sub(" ", cleaned)
+        cleaned = _BLANK_LINES_RE.sub("\n\n", cleaned).strip()
         if max_chars and len(cleaned) > max_chars:
             cleaned = cleaned[:max_chars].rstrip()
         return cleaned
 
     @staticmethod
+    @lru_cache(maxsize=128)
     def _build_seedream_fallback_prompt(prompt: str, aspect_ratio: str) -> str:
         """
         Seedream is sensitive to prompts with lots of "rules". When rejected as
         non-pictorial, fall back to a short, pictorial poster-style prompt.
+
+        Like _sanitize_images_api_prompt, memoized: retried and regenerated
+        pages reuse the same prompts.
         """
         if not prompt:
             return ""
 
         page_desc = ""
         try:
-            m = re.search(r"<page_description>\s*(.*?)\s*</page_description>", str(prompt), re.IGNORECASE | re.DOTALL)
+            m = _PAGE_DESCRIPTION_RE.search(str(prompt))
             if m:
                 page_desc = (m.group(1) or "").strip()
         except Exception:
             page_desc = ""
 
-        page_desc = re.sub(r"</?[^>]+>", "\n", page_desc)
+        page_desc = _XML_TAG_RE.sub("\n", page_desc)
         page_desc = page_desc.strip()
         page_desc = OpenAIImageProvider._sanitize_images_api_prompt(page_desc, max_chars=800)
 
@@ -198,6 +351,7 @@ class OpenAIImageProvider(ImageProvider):
         )
 
     @staticmethod
+    @lru_cache(maxsize=32)
     def _guess_images_api_size(aspect_ratio: str) -> str:
         """
         Best-effort mapping to OpenAI Images API `size` values.
@@ -218,25 +372,45 @@ class OpenAIImageProvider(ImageProvider):
         except Exception:
             return "1024x1024"
 
-    def _generate_image_via_images_api(self, prompt: str, aspect_ratio: str, resolution: str) -> Image.Image:
+    def _generate_image_via_images_api(
+        self,
+        prompt: str,
+        aspect_ratio: str,
+        resolution: str,
+        ref_images: Optional[List[Image.Image]] = None,
+    ) -> Image.Image:
         """
         Generate image via `/v1/images/generations` (DALL·E 3 style).
 
+        With reference images, `/v1/images/edits` is used instead: the images are
+        uploaded as multipart JPEG files, avoiding base64 and JSON encoding.
+
         Note: most providers ignore `resolution` here; downstream normalization will enforce it.
         """
-        base_url = self.api_base or "https://api.openai.com/v1"
-        url = f"{base_url.rstrip('/')}/images/generations"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
+        if ref_images:
+            url = self._images_edit_url
+            endpoint = "/v1/images/edits"
+            # Encoded once; every attempt re-sends the same bytes
+            ref_files = [
+                ("image[]", (f"ref_{i}.jpg", buffered.getvalue(), "image/jpeg"))
+                for i, buffered in enumerate(self._encode_ref_images(self._encode_image_to_jpeg, ref_images))
+            ]
+            headers = {"Authorization": f"Bearer {self.api_key}"}
+        else:
+            url = self._images_api_url
+            endpoint = "/v1/images/generations"
+            ref_files = None
+            headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            }
 
         # Yunwu's Images API is often stricter than OpenAI's and may reject
         # non-standard sizes or `response_format=b64_json` with 5xx.
-        is_yunwu = "yunwu.ai" in (base_url or "").lower()
+        is_yunwu = self._is_yunwu
         size = "1024x1024" if is_yunwu else self._guess_images_api_size(aspect_ratio)
         prompt_variants: List[str] = []
-        if is_yunwu and self._is_seedream_model(self.model):
+        if is_yunwu and self._is_seedream:
             seedream_fallback = self._build_seedream_fallback_prompt(prompt, aspect_ratio)
             if seedream_fallback:
                 prompt_variants.append(seedream_fallback)
@@ -262,6 +436,7 @@ class OpenAIImageProvider(ImageProvider):
         response: Optional[requests.Response] = None
         last_error_message = ""
         last_prompt_rejected = False
+        pacer = _get_images_api_pacer()
 
         for prompt_variant in prompt_variants:
             payload["prompt"] = str(prompt_variant or "").strip()
@@ -274,11 +449,21 @@ class OpenAIImageProvider(ImageProvider):
 
             for attempt in range(1, max_attempts + 1):
                 try:
-                    response = requests.post(url, headers=headers, json=payload, timeout=timeout)
+                    # Only the request itself holds a slot, not the backoff sleeps
+                    with pacer.slot():
+                        if ref_files:
+                            response = _http_session.post(
+                                url, headers=headers, data=payload, files=ref_files, timeout=timeout
+                            )
+                        else:
+                            response = _http_session.post(
+                                url, headers=headers, data=_dumps_json(payload), timeout=timeout
+                            )
                 except requests.RequestException as e:
                     if attempt >= max_attempts:
                         raise
-                    wait = min(2.0 * (2 ** (attempt - 1)), 20.0)
+                    # Full jitter keeps concurrent workers from retrying in lockstep
+                    wait = random.uniform(0, min(2.0 * (2 ** (attempt - 1)), 20.0))
                     logger.warning(
                         "Images API request error, retrying in %.1fs (attempt %s/%s): %s",
                         wait,
@@ -291,7 +476,7 @@ class OpenAIImageProvider(ImageProvider):
 
                 if response.status_code in (429, 500, 502, 503, 504):
                     try:
-                        data = response.json()
+                        data = _loads_json(response.content)
                         last_error_message = self._extract_images_api_error_message(data)
                     except Exception:
                         last_error_message = ""
@@ -314,8 +499,11 @@ class OpenAIImageProvider(ImageProvider):
                                 wait = float(str(retry_after).strip())
                             except Exception:
                                 wait = 0.0
-                        if wait <= 0:
-                            wait = min(2.0 * (2 ** (attempt - 1)), 30.0)
+                        if wait > 0:
+                            # Honor Retry-After, spreading workers that received the same value
+                            wait += random.uniform(0, 0.5)
+                        else:
+                            wait = random.uniform(0, min(2.0 * (2 ** (attempt - 1)), 30.0))
 
                         logger.warning(
                             "Images API throttled (HTTP %s), retrying in %.1fs (attempt %s/%s)%s",
@@ -342,7 +530,7 @@ class OpenAIImageProvider(ImageProvider):
             raise ValueError("Images API 请求失败：没有收到响应")
 
         try:
-            data = response.json()
+            data = _loads_json(response.content)
         except Exception:
             response.raise_for_status()
             raise ValueError("Images API returned non-JSON response")
@@ -360,7 +548,7 @@ class OpenAIImageProvider(ImageProvider):
             elif response.status_code == 403:
                 hint = "（无权限/分组无该模型权限）"
             elif response.status_code == 404:
-                hint = "（该服务可能不支持 /v1/images/generations）"
+                hint = f"（该服务可能不支持 {endpoint}）"
             elif response.status_code == 503 and self._looks_like_no_channels_error(message):
                 hint = "（该 Key/分组没有该模型的可用通道，请在云雾控制台确认权限或换模型）"
             elif self._looks_like_prompt_rejected(message):
@@ -391,14 +579,124 @@ class OpenAIImageProvider(ImageProvider):
 
         image_url = first.get("url")
         if image_url:
-            img_resp = requests.get(str(image_url), timeout=30, stream=True)
-            img_resp.raise_for_status()
-            image = Image.open(BytesIO(img_resp.content))
-            image.load()
-            return image
+            return self._download_image(str(image_url))
 
         raise ValueError("Images API did not return b64_json or url")
 
+    def _extract_image_from_text(self, content_str: str) -> Optional[Image.Image]:
+        """Find an image in a text response: Markdown image URL, plain image URL or base64 data URL."""
+        logger.debug("Response content (string): %.200s", content_str)
+
+        # Try to extract Markdown image URL: ![...](url)
+        markdown_match = _MARKDOWN_IMAGE_URL_RE.search(content_str)
+        if markdown_match:
+            image_url = markdown_match.group(1)  # Use the first image URL found
+            logger.debug("Found Markdown image URL: %s", image_url)
+            try:
+                image = self._download_image(image_url)
+                logger.debug(
+                    "Successfully downloaded image from Markdown URL: %s, %s", image.size, image.mode
+                )
+                return image
+            except Exception as download_error:
+                logger.warning(f"Failed to download image from Markdown URL: {download_error}")
+
+        # Try to extract plain URL (not in Markdown format)
+        url_match = _PLAIN_IMAGE_URL_RE.search(content_str)
+        if url_match:
+            image_url = url_match.group(1)
+            logger.debug("Found plain image URL: %s", image_url)
+            try:
+                image = self._download_image(image_url)
+                logger.debug(
+                    "Successfully downloaded image from plain URL: %s, %s", image.size, image.mode
+                )
+                return image
+            except Exception as download_error:
+                logger.warning(f"Failed to download image from plain URL: {download_error}")
+
+        # Try to extract base64 data URL from string
+        base64_match = _DATA_URL_BASE64_RE.search(content_str)
+        if base64_match:
+            base64_data = base64_match.group(1)
+            logger.debug("Found base64 image data in string")
+            try:
+                image_data = base64.b64decode(base64_data)
+                image = Image.open(BytesIO(image_data))
+                logger.debug("Successfully extracted base64 image from string: %s, %s", image.size, image.mode)
+                return image
+            except Exception as decode_error:
+                logger.warning(f"Failed to decode base64 image from string: {decode_error}")
+
+        return None
+
+    @staticmethod
+    def _extract_image_from_content_parts(parts: list) -> Optional[Image.Image]:
+        """
+        Return the first data-URL image in a list of chat content parts.
+
+        Parts are plain dicts or SDK objects depending on the proxy.
+        """
+        for part in parts:
+            if isinstance(part, dict):
+                part_type, image_url, text = part.get("type"), part.get("image_url"), part.get("text")
+            else:
+                part_type = getattr(part, "type", None)
+                image_url, text = getattr(part, "image_url", None), getattr(part, "text", None)
+
+            if part_type == "image_url":
+                if isinstance(image_url, dict):
+                    url = image_url.get("url", "")
+                else:
+                    url = getattr(image_url, "url", "")
+                if url.startswith("data:image"):
+                    # Extract base64 data from data URL
+                    image_data = base64.b64decode(url.split(",", 1)[1])
+                    image = Image.open(BytesIO(image_data))
+                    logger.debug("Successfully extracted image from content: %s, %s", image.size, image.mode)
+                    return image
+            elif part_type == "text" and text:
+                logger.debug("Response text: %.100s", text)
+        return None
+
+    def _stream_chat_completion_text(self, request: dict) -> str:
+        """
+        Run a chat completion with stream=True and return the concatenated text deltas.
+
+        Bytes keep flowing while the image is generated, so proxies behind
+        Cloudflare do not cut long generations off with a 524. Stops reading as
+        soon as a Markdown image URL is complete.
+
+        If the stream fails before any chunk arrives, returns "" so the caller
+        retries without streaming. Once chunks have arrived the (paid)
+        generation is under way, so errors are raised instead of retried.
+        """
+        parts: List[str] = []
+        chunk_received = False
+        try:
+            stream = self.client.chat.completions.create(stream=True, **request)
+            try:
+                for chunk in stream:
+                    chunk_received = True
+                    if not chunk.choices:
+                        continue
+                    delta_text = getattr(chunk.choices[0].delta, "content", None)
+                    if not isinstance(delta_text, str) or not delta_text:
+                        continue
+                    parts.append(delta_text)
+                    if ")" in delta_text and _MARKDOWN_IMAGE_URL_RE.search("".join(parts)):
+                        break
+            finally:
+                stream.close()
+        except Exception as e:
+            if chunk_received:
+                raise
+            logger.warning(
+                "Streaming chat.completions failed for model=%s, retrying without streaming: %s", self.model, e
+            )
+            return ""
+        return "".join(parts)
+
     def _generate_image_via_chat_completions(
         self,
         prompt: str,
@@ -411,8 +709,8 @@ class OpenAIImageProvider(ImageProvider):
 
         # Add reference images first (if any)
         if ref_images:
-            for ref_img in ref_images:
-                base64_image = self._encode_image_to_base64(ref_img)
+            encoded_images = self._encode_ref_images(self._encode_image_to_base64, ref_images)
+            for base64_image in encoded_images:
                 content.append(
                     {
                         "type": "image_url",
@@ -424,15 +722,16 @@ class OpenAIImageProvider(ImageProvider):
         content.append({"type": "text", "text": prompt})
 
         logger.debug(
-            f"Calling OpenAI API for image generation with {len(ref_images) if ref_images else 0} reference images..."
+            "Calling OpenAI API for image generation with %d reference images...", len(ref_images) if ref_images else 0
         )
         logger.debug(
-            f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution} (may be ignored by some OpenAI-compatible proxies)"
+            "Config - aspect_ratio: %s, resolution: %s (may be ignored by some OpenAI-compatible proxies)",
+            aspect_ratio, resolution,
         )
 
         # Note: resolution is not supported in OpenAI format, only aspect_ratio via system message
         # Modalites is removed for compatibility with proxy providers like Yunwu
-        response = self.client.chat.completions.create(
+        request = dict(
             model=self.model,
             messages=[
                 {"role": "system", "content": f"aspect_ratio={aspect_ratio};resolution={resolution}"},
@@ -441,123 +740,49 @@ class OpenAIImageProvider(ImageProvider):
             max_tokens=4096,  # Give enough tokens for multimodal response
         )
 
+        if get_config().OPENAI_IMAGE_STREAM:
+            streamed_text = self._stream_chat_completion_text(request)
+            if streamed_text:
+                image = self._extract_image_from_text(streamed_text)
+                if image is not None:
+                    return image
+                logger.warning("Unable to extract image from streamed response: %.200s", streamed_text)
+                raise ValueError("No valid multimodal response received from OpenAI API")
+            # Nothing streamed back (e.g. the image is only returned in non-text fields)
+
+        response = self.client.chat.completions.create(**request)
+
         logger.debug("OpenAI API call completed")
 
         # Extract image from response - handle different response formats
         message = response.choices[0].message
 
-        # Debug: log available attributes
-        logger.debug(f"Response message attributes: {dir(message)}")
+        logger.debug("Response message type: %s", type(message).__name__)
 
         # Try multi_mod_content first (custom format from some proxies)
         if hasattr(message, "multi_mod_content") and message.multi_mod_content:
             parts = message.multi_mod_content
             for part in parts:
                 if "text" in part:
-                    logger.debug(
-                        f"Response text: {part['text'][:100] if len(part['text']) > 100 else part['text']}"
-                    )
+                    logger.debug("Response text: %.100s", part["text"])
                 if "inline_data" in part:
                     image_data = base64.b64decode(part["inline_data"]["data"])
                     image = Image.open(BytesIO(image_data))
-                    logger.debug(f"Successfully extracted image: {image.size}, {image.mode}")
+                    logger.debug("Successfully extracted image: %s, %s", image.size, image.mode)
                     return image
 
         # Try standard OpenAI content format (list of content parts)
         if hasattr(message, "content") and message.content:
             # If content is a list (multimodal response)
             if isinstance(message.content, list):
-                for part in message.content:
-                    if isinstance(part, dict):
-                        # Handle image_url type
-                        if part.get("type") == "image_url":
-                            image_url = part.get("image_url", {}).get("url", "")
-                            if image_url.startswith("data:image"):
-                                # Extract base64 data from data URL
-                                base64_data = image_url.split(",", 1)[1]
-                                image_data = base64.b64decode(base64_data)
-                                image = Image.open(BytesIO(image_data))
-                                logger.debug(
-                                    f"Successfully extracted image from content: {image.size}, {image.mode}"
-                                )
-                                return image
-                        # Handle text type
-                        elif part.get("type") == "text":
-                            text = part.get("text", "")
-                            if text:
-                                logger.debug(f"Response text: {text[:100] if len(text) > 100 else text}")
-                    elif hasattr(part, "type"):
-                        # Handle as object with attributes
-                        if part.type == "image_url":
-                            image_url = getattr(part, "image_url", {})
-                            if isinstance(image_url, dict):
-                                url = image_url.get("url", "")
-                            else:
-                                url = getattr(image_url, "url", "")
-                            if url.startswith("data:image"):
-                                base64_data = url.split(",", 1)[1]
-                                image_data = base64.b64decode(base64_data)
-                                image = Image.open(BytesIO(image_data))
-                                logger.debug(
-                                    f"Successfully extracted image from content object: {image.size}, {image.mode}"
-                                )
-                                return image
+                image = self._extract_image_from_content_parts(message.content)
+                if image is not None:
+                    return image
             # If content is a string, try to extract image from it
             elif isinstance(message.content, str):
-                content_str = message.content
-                logger.debug(
-                    f"Response content (string): {content_str[:200] if len(content_str) > 200 else content_str}"
-                )
-
-                # Try to extract Markdown image URL: ![...](url)
-                markdown_pattern = r"!\[.*?\]\((https?://[^\s\)]+)\)"
-                markdown_matches = re.findall(markdown_pattern, content_str)
-                if markdown_matches:
-                    image_url = markdown_matches[0]  # Use the first image URL found
-                    logger.debug(f"Found Markdown image URL: {image_url}")
-                    try:
-                        response = requests.get(image_url, timeout=30, stream=True)
-                        response.raise_for_status()
-                        image = Image.open(BytesIO(response.content))
-                        image.load()  # Ensure image is fully loaded
-                        logger.debug(
-                            f"Successfully downloaded image from Markdown URL: {image.size}, {image.mode}"
-                        )
-                        return image
-                    except Exception as download_error:
-                        logger.warning(f"Failed to download image from Markdown URL: {download_error}")
-
-                # Try to extract plain URL (not in Markdown format)
-                url_pattern = r"(https?://[^\s\)\]]+\.(?:png|jpg|jpeg|gif|webp|bmp)(?:\?[^\s\)\]]*)?)"
-                url_matches = re.findall(url_pattern, content_str, re.IGNORECASE)
-                if url_matches:
-                    image_url = url_matches[0]
-                    logger.debug(f"Found plain image URL: {image_url}")
-                    try:
-                        response = requests.get(image_url, timeout=30, stream=True)
-                        response.raise_for_status()
-                        image = Image.open(BytesIO(response.content))
-                        image.load()
-                        logger.debug(
-                            f"Successfully downloaded image from plain URL: {image.size}, {image.mode}"
-                        )
-                        return image
-                    except Exception as download_error:
-                        logger.warning(f"Failed to download image from plain URL: {download_error}")
-
-                # Try to extract base64 data URL from string
-                base64_pattern = r"data:image/[^;]+;base64,([A-Za-z0-9+/=]+)"
-                base64_matches = re.findall(base64_pattern, content_str)
-                if base64_matches:
-                    base64_data = base64_matches[0]
-                    logger.debug("Found base64 image data in string")
-                    try:
-                        image_data = base64.b64decode(base64_data)
-                        image = Image.open(BytesIO(image_data))
-                        logger.debug(f"Successfully extracted base64 image from string: {image.size}, {image.mode}")
-                        return image
-                    except Exception as decode_error:
-                        logger.warning(f"Failed to decode base64 image from string: {decode_error}")
+                image = self._extract_image_from_text(message.content)
+                if image is not None:
+                    return image
 
         # Log raw response for debugging
         logger.warning(f"Unable to extract image. Raw message type: {type(message)}")
@@ -588,17 +813,20 @@ class OpenAIImageProvider(ImageProvider):
             Generated PIL Image object, or None if failed
         """
         try:
-            prefer_images_api = self._prefers_images_api(self.model)
+            prefer_images_api = self._use_images_api
+
+            # Reference images can only be sent to the Images API as multipart uploads
+            images_api_refs = ref_images if self._accepts_ref_image_uploads else None
 
             if prefer_images_api:
-                if ref_images:
+                if ref_images and not images_api_refs:
                     logger.warning(
                         "Model=%s uses /v1/images/generations; reference images will be ignored (count=%s).",
                         self.model,
                         len(ref_images),
                     )
                 try:
-                    return self._generate_image_via_images_api(prompt, aspect_ratio, resolution)
+                    return self._generate_image_via_images_api(prompt, aspect_ratio, resolution, images_api_refs)
                 except Exception as e:
                     logger.warning(
                         "Images API failed for model=%s, falling back to chat.completions: %s",
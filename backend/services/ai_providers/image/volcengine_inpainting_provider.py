@@ -132,7 +132,9 @@ class VolcengineInpaintingProvider:
             }
             
             logger.info(f"🌐 发送请求到: {url}")
-            logger.debug(f"请求体大小: {len(json.dumps(request_body))} bytes")
+            # 请求体含base64图片，只序列化一次
+            request_body_json = json.dumps(request_body)
+            logger.debug(f"请求体大小: {len(request_body_json)} bytes")
             
             # 6. 使用SDK（它会处理签名）
             from volcengine.visual.VisualService import VisualService
@@ -148,7 +150,7 @@ class VolcengineInpaintingProvider:
                 response = service.json(
                     "CVProcess",
                     {},  # query params
-                    json.dumps(request_body)  # body
+                    request_body_json  # body
                 )
                 
                 # 解析响应
@@ -171,7 +173,8 @@ class VolcengineInpaintingProvider:
                     return None
             
             # 8. 解析响应
-            logger.debug(f"API响应: {json.dumps(response, ensure_ascii=False)[:300]}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"API响应: {json.dumps(response, ensure_ascii=False)[:300]}")
             
             if response.get("code") == 10000 or response.get("status") == 10000:
                 data = response.get("data", {})
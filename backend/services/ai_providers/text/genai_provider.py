@@ -9,6 +9,7 @@ import logging
 from google import genai
 from google.genai import types
 from tenacity import retry, stop_after_attempt, wait_exponential
+from ..genai_http import api_key_http_options
 from .base import TextProvider
 from config import get_config
 
@@ -50,14 +51,9 @@ class GenAITextProvider(TextProvider):
                 http_options=types.HttpOptions(timeout=timeout_ms)
             )
         else:
-            # AI Studio mode - uses API key
-            http_options = types.HttpOptions(
-                base_url=api_base,
-                timeout=timeout_ms
-            ) if api_base else types.HttpOptions(timeout=timeout_ms)
-
+            # AI Studio mode - uses API key, over the shared connection pool
             self.client = genai.Client(
-                http_options=http_options,
+                http_options=api_key_http_options(api_base, timeout_ms),
                 api_key=api_key
             )
 
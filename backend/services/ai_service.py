@@ -13,6 +13,7 @@ from textwrap import dedent
 from PIL import Image
 from tenacity import retry, stop_after_attempt, retry_if_exception_type
 from .prompts import (
+    format_reference_files_xml,
     get_outline_parsing_prompt,
     get_image_edit_prompt,
     get_description_to_outline_prompt,
@@ -27,7 +28,7 @@ from .ecom_prompts import (
 )
 from .ai_providers import get_text_provider, get_image_provider, TextProvider, ImageProvider
 from config import get_config
-from utils.text_sanitize import sanitize_prompt_text
+from utils.text_sanitize import sanitize_prompt_text, strip_json_code_fence
 
 logger = logging.getLogger(__name__)
 
@@ -187,8 +188,24 @@ class ProjectContext:
             self.page_aspect_ratio = project_or_dict.get('page_aspect_ratio')
             self.cover_aspect_ratio = project_or_dict.get('cover_aspect_ratio')
         
-        self.reference_files_content = reference_files_content or []
+        self.reference_files_content = reference_files_content
     
+    @property
+    def reference_files_content(self) -> List[Dict[str, str]]:
+        return self._reference_files_content
+
+    @reference_files_content.setter
+    def reference_files_content(self, value: Optional[List[Dict[str, str]]]):
+        self._reference_files_content = value or []
+        self._reference_files_xml = None
+
+    @property
+    def reference_files_xml(self) -> str:
+        """参考文件的 XML 文本，首次访问时生成，逐页构建提示词时复用"""
+        if self._reference_files_xml is None:
+            self._reference_files_xml = format_reference_files_xml(self._reference_files_content)
+        return self._reference_files_xml
+
     def to_dict(self) -> Dict:
         """转换为字典，方便传递"""
         return {
@@ -313,7 +330,7 @@ class AIService:
         response_text = self.text_provider.generate_text(prompt, thinking_budget=thinking_budget)
         
         # 清理响应文本：移除markdown代码块标记和多余空白
-        cleaned_text = response_text.strip().strip("```json").strip("```").strip()
+        cleaned_text = strip_json_code_fence(response_text)
         
         try:
             return json.loads(cleaned_text)
@@ -554,9 +571,11 @@ class AIService:
             
             # 添加主参考图片（如果提供了路径）
             if ref_image_path:
-                if not os.path.exists(ref_image_path):
-                    raise FileNotFoundError(f"Reference image not found: {ref_image_path}")
-                main_ref_image = Image.open(ref_image_path)
+                # Image.open() only reads the header; providers decode or upload the image as needed
+                try:
+                    main_ref_image = Image.open(ref_image_path)
+                except FileNotFoundError:
+                    raise FileNotFoundError(f"Reference image not found: {ref_image_path}") from None
                 ref_images.append(main_ref_image)
             
             # 添加额外的参考图片
@@ -23,7 +23,7 @@ from threading import Lock
 from typing import Optional
 from flask import current_app, has_app_context
 from .ai_service import AIService
-from .ai_providers import get_text_provider, get_image_provider, TextProvider, ImageProvider
+from .ai_providers import get_text_provider, get_image_provider, clear_provider_config_cache, TextProvider, ImageProvider
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +37,7 @@ _image_provider_cache: dict = {}
 _cache_lock = Lock()
 
 
-def _get_cached_text_provider(model: str) -> TextProvider:
+def get_cached_text_provider(model: str) -> TextProvider:
     """
     Get or create a cached text provider instance
     
@@ -56,7 +56,7 @@ def _get_cached_text_provider(model: str) -> TextProvider:
         return _text_provider_cache[model]
 
 
-def _get_cached_image_provider(model: str) -> ImageProvider:
+def get_cached_image_provider(model: str) -> ImageProvider:
     """
     Get or create a cached image provider instance
     
@@ -118,8 +118,8 @@ def get_ai_service(force_new: bool = False) -> AIService:
                     image_model = config.IMAGE_MODEL
                 
                 # Get cached providers
-                text_provider = _get_cached_text_provider(text_model)
-                image_provider = _get_cached_image_provider(image_model)
+                text_provider = get_cached_text_provider(text_model)
+                image_provider = get_cached_image_provider(image_model)
                 
                 # Create AIService with cached providers
                 _ai_service_instance = AIService(
@@ -154,6 +154,7 @@ def clear_ai_service_cache():
         with _cache_lock:
             _text_provider_cache.clear()
             _image_provider_cache.clear()
+            clear_provider_config_cache()
             logger.info("Provider cache cleared")
 
 
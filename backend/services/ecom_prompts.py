@@ -12,10 +12,13 @@ from __future__ import annotations
 
 import logging
 import re
-from textwrap import dedent
-from typing import Dict, List, Optional, TYPE_CHECKING
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 
-from .prompts import get_language_instruction, get_image_text_language_instruction
+from .prompts import (
+    get_image_text_language_instruction,
+    get_language_instruction,
+)
 
 if TYPE_CHECKING:
     from services.ai_service import ProjectContext
@@ -91,40 +94,40 @@ ECOM_PAGE_TYPES = {
 }
 
 
-def _format_reference_files_xml(reference_files_content: Optional[List[Dict[str, str]]]) -> str:
-    if not reference_files_content:
-        return ""
+# 大纲提示词中的页面类型参考、页面描述提示词中的本页类型说明（ECOM_PAGE_TYPES 为常量，导入时构建）
+_PAGE_TYPES_REF = "\n".join(
+    f"   - {key}: {info['name']} - {info['description']}"
+    for key, info in ECOM_PAGE_TYPES.items()
+)
+_PAGE_TYPE_HINTS = {
+    key: f"本页类型：{info.get('name', '')} - {info.get('description', '')}"
+    for key, info in ECOM_PAGE_TYPES.items()
+}
+
+
+# 电子部件标记（如 "电子部件=无"）
+_NON_ELECTRONIC_FLAG_RE = re.compile(r"电子部件\s*=\s*无", re.IGNORECASE)
+_ELECTRONIC_FLAG_RE = re.compile(r"电子部件\s*=\s*有", re.IGNORECASE)
 
-    xml_parts = ["<uploaded_files>"]
-    for file_info in reference_files_content:
-        filename = file_info.get("filename", "unknown")
-        content = file_info.get("content", "")
-        xml_parts.append(f'  <file name="{filename}">')
-        xml_parts.append("    <content>")
-        xml_parts.append(content)
-        xml_parts.append("    </content>")
-        xml_parts.append("  </file>")
-    xml_parts.append("</uploaded_files>")
-    xml_parts.append("")
-    return "\n".join(xml_parts)
+# 常见非电子产品关键词
+_NON_ELECTRONIC_KEYWORDS = ("毛绒", "布偶", "布娃娃", "玩偶", "公仔", "抱枕", "玩具熊", "毛毯", "围巾", "帽子", "手套")
+_NON_ELECTRONIC_KEYWORD_RE = re.compile("|".join(map(re.escape, _NON_ELECTRONIC_KEYWORDS)))
 
 
+# 大纲和每一页的描述都会检测同一个项目需求，缓存检测结果
+@lru_cache(maxsize=256)
 def _detect_non_electronic(idea_prompt: str) -> bool:
     """检测是否为非电子产品（毛绒玩具、布偶等）"""
     if not idea_prompt:
         return False
     
     # 明确标记为非电子产品
-    if re.search(r"电子部件\s*=\s*无", idea_prompt, flags=re.IGNORECASE):
+    if _NON_ELECTRONIC_FLAG_RE.search(idea_prompt):
         return True
     
-    # 常见非电子产品关键词
-    non_electronic_keywords = ["毛绒", "布偶", "布娃娃", "玩偶", "公仔", "抱枕", "玩具熊", "毛毯", "围巾", "帽子", "手套"]
-    for keyword in non_electronic_keywords:
-        if keyword in idea_prompt:
-            # 但如果明确标记有电子部件，则不算
-            if not re.search(r"电子部件\s*=\s*有", idea_prompt, flags=re.IGNORECASE):
-                return True
+    # 包含非电子产品关键词，但明确标记有电子部件时不算
+    if _NON_ELECTRONIC_KEYWORD_RE.search(idea_prompt):
+        return not _ELECTRONIC_FLAG_RE.search(idea_prompt)
     
     return False
 
@@ -133,18 +136,12 @@ def _detect_non_electronic(idea_prompt: str) -> bool:
 # 产品分析提示词
 # ============================================================================
 
-def get_product_analysis_prompt(language: str = None) -> str:
-    """
-    生成产品分析提示词，用于从产品图片中提取结构化信息
-    
-    Returns:
-        产品分析提示词
-    """
-    prompt = f"""\
+# 产品分析提示词只有语言指令随调用变化，其余部分在导入时构建一次
+_PRODUCT_ANALYSIS_PROMPT_HEAD = """\
 你是一位专业的电商产品分析师。请仔细观察提供的产品图片，提取以下结构化信息。
 
 请输出严格的 JSON 格式：
-{{
+{
     "product_name": "产品名称（如能识别）",
     "category": "产品类目（如：美妆/服装/3C数码/家居/食品等）",
     "main_selling_points": ["核心卖点1", "核心卖点2", "核心卖点3"],
@@ -162,7 +159,7 @@ def get_product_analysis_prompt(language: str = None) -> str:
     "image_quality": "high/medium/low",
     "background_type": "纯色/场景/透明",
     "suggested_page_types": ["cover", "selling_point", "detail", "scene"]
-}}
+}
 
 【分析要求】
 1. 只从图片中可观察到的内容进行分析，不要虚构
@@ -171,17 +168,69 @@ def get_product_analysis_prompt(language: str = None) -> str:
 4. 卖点提取要具体、有差异化，不要泛泛而谈
 5. 建议的页面类型至少包含 cover + 2-3 个其他类型
 
-{get_language_instruction(language)}
+"""
+
+_PRODUCT_ANALYSIS_PROMPT_TAIL = """
 
 只输出 JSON，不要包含其他文字。
 """
-    return prompt
+
+
+def get_product_analysis_prompt(language: str = None) -> str:
+    """
+    生成产品分析提示词，用于从产品图片中提取结构化信息
+    
+    Returns:
+        产品分析提示词
+    """
+    return _PRODUCT_ANALYSIS_PROMPT_HEAD + get_language_instruction(language) + _PRODUCT_ANALYSIS_PROMPT_TAIL
 
 
 # ============================================================================
 # 产品替换提示词
 # ============================================================================
 
+_PRODUCT_REPLACE_PROMPT_TEMPLATE = """\
+你是一位专业的电商图片合成师，擅长"产品替换"技术。
+
+【任务】
+将模板参考图中的原产品替换为用户的产品，生成一张新的电商图片。
+
+【模板信息】
+%(template_description)s
+
+【用户产品信息】
+- 产品名：%(product_name)s
+- 产品特征：%(product_features_text)s
+- 核心卖点：
+%(selling_points_text)s
+
+【产品替换规则 - 极其重要】
+1. **保持模板构图**：完全保留模板的背景、光影、装饰元素、版式布局
+2. **替换产品主体**：将模板中的原产品移除，放入用户的产品
+3. **透视一致**：用户产品的角度、大小、位置要与模板原产品一致
+4. **光影融合**：产品的光照方向、阴影要与模板环境融合
+5. **保持产品原貌**：
+   - 产品的颜色、材质、纹理必须与产品参考图完全一致
+   - 不要改变产品的形状、logo、包装文字
+   - 不要把产品画成插画/卡通/3D
+6. **文案更新**：如果模板有文案，替换为用户产品的卖点
+
+【禁止事项】
+- 禁止保留模板中的原产品
+- 禁止改变用户产品的外观特征
+- 禁止虚构产品不具备的功能（如LED/USB/充电，除非产品信息中有）
+- 禁止保留模板中的原品牌名/logo
+
+【输出要求】
+- 比例：%(aspect_ratio)s
+- 画质：电商级高清，文字清晰锐利
+- 风格：专业电商详情页/主图风格
+
+%(image_text_language_instruction)s
+"""
+
+
 def get_product_replace_prompt(
     template_description: str,
     product_facts: Dict,
@@ -208,7 +257,7 @@ def get_product_replace_prompt(
     product_material = product_facts.get("material", "")
     selling_points = product_facts.get("main_selling_points", [])
     
-    selling_points_text = "\n".join([f"- {sp}" for sp in selling_points[:3]]) if selling_points else "- 待定"
+    selling_points_text = "- " + "\n- ".join(map(str, selling_points[:3])) if selling_points else "- 待定"
     
     # 构建产品特征描述
     product_features = []
@@ -218,49 +267,18 @@ def get_product_replace_prompt(
         product_features.append(f"风格：{product_style}")
     if product_material:
         product_features.append(f"材质：{product_material}")
-    product_features_text = "、".join(product_features) if product_features else "参见产品参考图"
+    product_features_text = "、".join(product_features) or "参见产品参考图"
     
-    prompt = f"""\
-你是一位专业的电商图片合成师，擅长"产品替换"技术。
-
-【任务】
-将模板参考图中的原产品替换为用户的产品，生成一张新的电商图片。
-
-【模板信息】
-{template_description}
-
-【用户产品信息】
-- 产品名：{product_name}
-- 产品特征：{product_features_text}
-- 核心卖点：
-{selling_points_text}
-
-【产品替换规则 - 极其重要】
-1. **保持模板构图**：完全保留模板的背景、光影、装饰元素、版式布局
-2. **替换产品主体**：将模板中的原产品移除，放入用户的产品
-3. **透视一致**：用户产品的角度、大小、位置要与模板原产品一致
-4. **光影融合**：产品的光照方向、阴影要与模板环境融合
-5. **保持产品原貌**：
-   - 产品的颜色、材质、纹理必须与产品参考图完全一致
-   - 不要改变产品的形状、logo、包装文字
-   - 不要把产品画成插画/卡通/3D
-6. **文案更新**：如果模板有文案，替换为用户产品的卖点
-
-【禁止事项】
-- 禁止保留模板中的原产品
-- 禁止改变用户产品的外观特征
-- 禁止虚构产品不具备的功能（如LED/USB/充电，除非产品信息中有）
-- 禁止保留模板中的原品牌名/logo
-
-【输出要求】
-- 比例：{aspect_ratio}
-- 画质：电商级高清，文字清晰锐利
-- 风格：专业电商详情页/主图风格
-
-{get_image_text_language_instruction(language)}
-"""
+    prompt = _PRODUCT_REPLACE_PROMPT_TEMPLATE % {
+        "template_description": template_description,
+        "product_name": product_name,
+        "product_features_text": product_features_text,
+        "selling_points_text": selling_points_text,
+        "aspect_ratio": aspect_ratio,
+        "image_text_language_instruction": get_image_text_language_instruction(language),
+    }
     
-    logger.debug(f"[get_product_replace_prompt] Final prompt:\n{prompt}")
+    logger.debug("[get_product_replace_prompt] Final prompt:\n%s", prompt)
     return prompt
 
 
@@ -273,7 +291,7 @@ def get_ecom_outline_generation_prompt(project_context: "ProjectContext", langua
     Generate an outline for an e-commerce detail image set.
     Output must be JSON only.
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = project_context.reference_files_xml
 
     idea_prompt = project_context.idea_prompt or ""
     page_ratio = project_context.page_aspect_ratio or "3:4"
@@ -287,12 +305,6 @@ def get_ecom_outline_generation_prompt(project_context: "ProjectContext", langua
         else "- 硬性规则：未明确说明有电子功能时，不要主动添加 LED/USB/充电/电池/传感器/电机/APP 等电子卖点。\n"
     )
 
-    # 构建页面类型参考
-    page_types_ref = "\n".join([
-        f"   - {key}: {info['name']} - {info['description']}"
-        for key, info in ECOM_PAGE_TYPES.items()
-    ])
-
     prompt = f"""\
 你是一位电商视觉策划专家，负责规划「主图 + 详情页」图集结构。
 
@@ -307,7 +319,7 @@ def get_ecom_outline_generation_prompt(project_context: "ProjectContext", langua
 ]
 
 【电商页面类型参考】
-{page_types_ref}
+{_PAGE_TYPES_REF}
 
 【规划规则】
 - 第 1 张必须是主图/封面（page_type: "cover"），比例 {cover_ratio}，突出产品名和核心卖点
@@ -330,7 +342,8 @@ def get_ecom_outline_generation_prompt(project_context: "ProjectContext", langua
 {files_xml}
 """
 
-    final_prompt = dedent(prompt)
+    # The template is written flush-left, so there is nothing to dedent
+    final_prompt = prompt
     logger.debug("[get_ecom_outline_generation_prompt] Final prompt length: %d", len(final_prompt))
     return final_prompt
 
@@ -351,7 +364,7 @@ def get_ecom_page_description_prompt(
     Generate a single page's copy/layout description for e-commerce.
     Output is plain text; will be fed into the image generator.
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = project_context.reference_files_xml
 
     idea_prompt = project_context.idea_prompt or ""
     page_ratio = project_context.page_aspect_ratio or "3:4"
@@ -366,12 +379,7 @@ def get_ecom_page_description_prompt(
         else "硬性约束：未明确提供电子功能时，不要主动添加 LED/USB/充电/电池/续航/智能传感/电机 等卖点。\n"
     )
 
-    # 获取页面类型信息
-    page_type = page_outline.get("page_type", "")
-    page_type_info = ECOM_PAGE_TYPES.get(page_type, {})
-    page_type_hint = ""
-    if page_type_info:
-        page_type_hint = f"本页类型：{page_type_info.get('name', '')} - {page_type_info.get('description', '')}"
+    page_type_hint = _PAGE_TYPE_HINTS.get(page_outline.get("page_type", ""), "")
 
     cover_note = ""
     if page_index == 1:
@@ -422,7 +430,7 @@ def get_ecom_page_description_prompt(
 {get_language_instruction(language)}
 """
 
-    final_prompt = files_xml + dedent(prompt)
+    final_prompt = files_xml + prompt
     logger.debug("[get_ecom_page_description_prompt] Final prompt:\n%s", final_prompt)
     return final_prompt
 
@@ -431,48 +439,29 @@ def get_ecom_page_description_prompt(
 # 电商图片生成
 # ============================================================================
 
-def get_ecom_image_generation_prompt(
-    page_desc: str,
-    outline_text: str,
-    current_section: str,
-    aspect_ratio: str,
-    has_material_images: bool = False,
-    extra_requirements: str = None,
-    language: str = None,
-    has_template: bool = True,
-    page_index: int = 1,
-) -> str:
-    """
-    Image generation prompt for a single e-commerce detail page image.
-    """
-    material_images_note = ""
-    if has_material_images:
-        material_images_note = (
-            "\n\n【产品参考图说明】\n"
-            "已提供商品/产品参考图片。生成图中的产品主体必须来自这些参考图：\n"
-            "- 保持外观一致（外形/颜色/材质/纹理/包装/Logo/文字）\n"
-            "- 不要擅自改动包装文字或商标\n"
-            "- 不要替换成别的产品\n"
-            "- 产品主体必须是写实照片级质感，禁止画成插画/卡通/3D"
-        )
-
-    extra_req_text = ""
-    if extra_requirements and extra_requirements.strip():
-        extra_req_text = f"\n\n【额外要求（务必遵循）】\n{extra_requirements}\n"
-
+_MATERIAL_IMAGES_NOTE = (
+    "\n\n【产品参考图说明】\n"
+    "已提供商品/产品参考图片。生成图中的产品主体必须来自这些参考图：\n"
+    "- 保持外观一致（外形/颜色/材质/纹理/包装/Logo/文字）\n"
+    "- 不要擅自改动包装文字或商标\n"
+    "- 不要替换成别的产品\n"
+    "- 产品主体必须是写实照片级质感，禁止画成插画/卡通/3D"
+)
+
+_COVER_NOTE = (
+    "\n\n【主图特别要求】\n"
+    "这是第 1 张图（主图/封面），要求：\n"
+    "- 突出产品名称、核心卖点\n"
+    "- 信息层级清晰，第一眼抓住注意力\n"
+    "- 采用专业的电商主图设计美学"
+)
+
+
+def _build_image_reference_block(has_template: bool, has_material_images: bool) -> Tuple[str, str, str]:
+    """返回 (模板风格要求, 模板文字禁令, 参考图规则)"""
     template_style_guideline = "配色与设计语言与模板参考图严格相似。" if has_template else "严格按风格描述进行设计。"
     forbidden_template_text_guideline = "只参考模板的风格设计，禁止出现模板图中的原始文字/品牌/Logo。" if has_template else ""
 
-    cover_note = (
-        "\n\n【主图特别要求】\n"
-        "这是第 1 张图（主图/封面），要求：\n"
-        "- 突出产品名称、核心卖点\n"
-        "- 信息层级清晰，第一眼抓住注意力\n"
-        "- 采用专业的电商主图设计美学"
-        if page_index == 1
-        else ""
-    )
-
     reference_rules = ""
     if has_template or has_material_images:
         template_rule = (
@@ -495,6 +484,40 @@ def get_ecom_image_generation_prompt(
             f"{template_rule}{product_rule}{replace_rule}"
             "</reference_images_rules>\n"
         )
+    return template_style_guideline, forbidden_template_text_guideline, reference_rules
+
+
+# (has_template, has_material_images) 只有 4 种组合，导入时全部渲染好
+_IMAGE_REFERENCE_BLOCKS = {
+    (has_template, has_material_images): _build_image_reference_block(has_template, has_material_images)
+    for has_template in (True, False)
+    for has_material_images in (True, False)
+}
+
+
+def get_ecom_image_generation_prompt(
+    page_desc: str,
+    outline_text: str,
+    current_section: str,
+    aspect_ratio: str,
+    has_material_images: bool = False,
+    extra_requirements: str = None,
+    language: str = None,
+    has_template: bool = True,
+    page_index: int = 1,
+) -> str:
+    """
+    Image generation prompt for a single e-commerce detail page image.
+    """
+    template_style_guideline, forbidden_template_text_guideline, reference_rules = _IMAGE_REFERENCE_BLOCKS[
+        (bool(has_template), bool(has_material_images))
+    ]
+    material_images_note = _MATERIAL_IMAGES_NOTE if has_material_images else ""
+    cover_note = _COVER_NOTE if page_index == 1 else ""
+
+    extra_req_text = ""
+    if extra_requirements and extra_requirements.strip():
+        extra_req_text = f"\n\n【额外要求（务必遵循）】\n{extra_requirements}\n"
 
     prompt = f"""\
 你是一位专业电商视觉设计师，负责生成"一张可直接用于电商平台的图片"。
@@ -3,6 +3,7 @@ File Service - handles all file operations
 """
 import os
 import uuid
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 from werkzeug.utils import secure_filename
@@ -159,7 +160,7 @@ class FileService:
             True if deleted successfully
         """
         filepath = self.upload_folder / image_path.replace('\\', '/')
-        if filepath.exists() and filepath.is_file():
+        if filepath.is_file():
             filepath.unlink()
             return True
         return False
@@ -193,6 +194,18 @@ class FileService:
         """
         return str(self.upload_folder / relative_path.replace('\\', '/'))
     
+    def get_exports_dir(self, project_id: str) -> str:
+        """
+        Get the exports directory of a project (created if missing)
+        
+        Args:
+            project_id: Project ID
+        
+        Returns:
+            Absolute directory path
+        """
+        return str(self._get_exports_dir(project_id))
+    
     def delete_template(self, project_id: str) -> bool:
         """
         Delete template for project
@@ -253,7 +266,7 @@ class FileService:
     def file_exists(self, relative_path: str) -> bool:
         """Check if file exists"""
         filepath = self.upload_folder / relative_path.replace('\\', '/')
-        return filepath.exists() and filepath.is_file()
+        return filepath.is_file()
     
     def get_template_path(self, project_id: str) -> Optional[str]:
         """
@@ -272,7 +285,7 @@ class FileService:
         if project and project.template_image_path:
             # template_image_path 是相对路径，需要转换为绝对路径
             template_path = self.upload_folder / project.template_image_path
-            if template_path.exists() and template_path.is_file():
+            if template_path.is_file():
                 return str(template_path)
         
         # 如果数据库中没有，回退到目录查找（兼容旧数据）
@@ -341,3 +354,14 @@ class FileService:
         
         return True
     
+
+
+@lru_cache(maxsize=None)
+def get_file_service(upload_folder: str) -> FileService:
+    """
+    Get the shared FileService for an upload folder
+
+    FileService holds no per-request state, so one instance per upload
+    folder is reused instead of re-creating it (and its mkdir) per request.
+    """
+    return FileService(upload_folder)
@@ -10,6 +10,7 @@ from __future__ import annotations
 import base64
 import io
 import logging
+import re
 from typing import Optional
 
 from PIL import Image
@@ -19,6 +20,98 @@ from utils.url_utils import looks_like_html, normalize_openai_api_base
 
 logger = logging.getLogger(__name__)
 
+_DEFAULT_CAPTION_PROMPT = "请用一句话概括这张商品图片：品类 + 关键外观特征 + 可能的材质/风格/用途。只输出描述文本，不要解释。"
+_CAPTION_JPEG_QUALITY = 85
+# Longer captions are truncated
+MAX_CAPTION_LENGTH = 2000
+# Prompts asking for single-line output get their caption lines joined with "；"
+_NO_NEWLINE_MARKERS = ("不要换行", "不换行")
+
+
+# A whitespace run containing at least one line break (same breaks as str.splitlines)
+_LINE_BREAK_RUN_RE = re.compile(r"\s*[\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]\s*")
+
+
+def _finish_caption(caption: str, join_lines: bool) -> str:
+    if join_lines:
+        caption = _LINE_BREAK_RUN_RE.sub("；", caption).strip("；").strip()
+
+    # Captions arrive stripped, so this only changes anything on truncation
+    return caption[:MAX_CAPTION_LENGTH].rstrip()
+
+
+def _caption_openai(image: Image.Image, model: str, api_key: str, api_base: str, prompt: str) -> str:
+    from openai import OpenAI
+
+    config = get_config()
+    base_url = normalize_openai_api_base(api_base) if api_base else None
+    client = OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=config.OPENAI_TIMEOUT,
+        max_retries=config.OPENAI_MAX_RETRIES,
+    )
+
+    buffered = io.BytesIO()
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGB")
+    # Captioning does not need near-lossless JPEG; 85 encodes faster and uploads smaller
+    image.save(buffered, format="JPEG", quality=_CAPTION_JPEG_QUALITY)
+    # getbuffer() avoids copying the JPEG bytes; base64 output is pure ASCII
+    base64_image = base64.b64encode(buffered.getbuffer()).decode("ascii")
+
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"},
+                    },
+                    {"type": "text", "text": prompt},
+                ],
+            }
+        ],
+        temperature=0.3,
+        max_tokens=512,
+    )
+
+    # 处理不同格式的响应（兼容部分 OpenAI 代理的非标准返回）
+    if isinstance(response, str):
+        return response.strip()
+    if isinstance(response, dict):
+        content = response.get("choices", [{}])[0].get("message", {}).get("content")
+        return (content or "").strip()
+    if hasattr(response, "choices"):
+        return (response.choices[0].message.content or "").strip()
+    logger.warning("caption_product_image: unknown response type: %s", type(response))
+    return ""
+
+
+def _caption_gemini(image: Image.Image, model: str, api_key: str, api_base: str, prompt: str) -> str:
+    from google import genai
+    from google.genai import types
+
+    client = genai.Client(
+        http_options=types.HttpOptions(base_url=api_base) if api_base else None,
+        api_key=api_key,
+    )
+    result = client.models.generate_content(
+        model=model,
+        contents=[image, prompt],
+        config=types.GenerateContentConfig(temperature=0.3),
+    )
+    return (result.text or "").strip()
+
+
+# Any format other than "openai" is served by Gemini
+_CAPTION_DISPATCH = {
+    "openai": _caption_openai,
+    "gemini": _caption_gemini,
+}
+
 
 def caption_product_image(
     image: Image.Image,
@@ -45,105 +138,29 @@ def caption_product_image(
         Caption string (may be empty on failure)
     """
     provider_format = (provider_format or "openai").lower()
-    prompt = (
-        prompt
-        or "请用一句话概括这张商品图片：品类 + 关键外观特征 + 可能的材质/风格/用途。只输出描述文本，不要解释。"
-    )
+    caption_fn = _CAPTION_DISPATCH.get(provider_format, _caption_gemini)
+    if caption_fn is _caption_openai:
+        api_key, api_base = openai_api_key, openai_api_base
+    else:
+        api_key, api_base = google_api_key, google_api_base
+    if not api_key:
+        return ""
 
+    prompt = prompt or _DEFAULT_CAPTION_PROMPT
     try:
-        if provider_format == "openai":
-            if not openai_api_key:
-                return ""
-
-            from openai import OpenAI
-
-            config = get_config()
-            base_url = normalize_openai_api_base(openai_api_base) if openai_api_base else None
-            client = OpenAI(
-                api_key=openai_api_key,
-                base_url=base_url,
-                timeout=config.OPENAI_TIMEOUT,
-                max_retries=config.OPENAI_MAX_RETRIES,
-            )
-
-            buffered = io.BytesIO()
-            if image.mode in ("RGBA", "LA", "P"):
-                image = image.convert("RGB")
-            image.save(buffered, format="JPEG", quality=95)
-            base64_image = base64.b64encode(buffered.getvalue()).decode("utf-8")
+        caption = caption_fn(image, model, api_key, api_base, prompt)
+    except Exception as e:
+        logger.warning("caption_product_image failed: %s", e, exc_info=True)
+        return ""
 
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"},
-                            },
-                            {"type": "text", "text": prompt},
-                        ],
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=512,
+    if looks_like_html(caption):
+        if caption_fn is _caption_openai:
+            logger.warning(
+                "caption_product_image: got HTML-like output; check OPENAI_API_BASE (should end with /v1)."
             )
-
-            # 处理不同格式的响应（兼容部分 OpenAI 代理的非标准返回）
-            if isinstance(response, str):
-                caption = response.strip()
-            elif isinstance(response, dict):
-                content = response.get("choices", [{}])[0].get("message", {}).get("content")
-                caption = (content or "").strip()
-            elif hasattr(response, "choices"):
-                caption = (response.choices[0].message.content or "").strip()
-            else:
-                logger.warning("caption_product_image: unknown response type: %s", type(response))
-                caption = ""
-
-            if looks_like_html(caption):
-                logger.warning(
-                    "caption_product_image: got HTML-like output; check OPENAI_API_BASE (should end with /v1)."
-                )
-                return ""
-
-            if prompt and ("不要换行" in prompt or "不换行" in prompt):
-                caption = "；".join([p.strip() for p in caption.splitlines() if p.strip()])
-                caption = caption.strip("；").strip()
-
-            if len(caption) > 2000:
-                caption = caption[:2000].rstrip()
-
-            return caption
-
-        # gemini format (default)
-        if not google_api_key:
-            return ""
-
-        from google import genai
-        from google.genai import types
-
-        client = genai.Client(
-            http_options=types.HttpOptions(base_url=google_api_base) if google_api_base else None,
-            api_key=google_api_key,
-        )
-        result = client.models.generate_content(
-            model=model,
-            contents=[image, prompt],
-            config=types.GenerateContentConfig(temperature=0.3),
-        )
-        caption = (result.text or "").strip()
-        if looks_like_html(caption):
+        else:
             logger.warning("caption_product_image(gemini): got HTML-like output; ignoring.")
-            return ""
-        if prompt and ("不要换行" in prompt or "不换行" in prompt):
-            caption = "；".join([p.strip() for p in caption.splitlines() if p.strip()])
-            caption = caption.strip("；").strip()
-        if len(caption) > 2000:
-            caption = caption[:2000].rstrip()
-        return caption
-
-    except Exception as e:
-        logger.warning("caption_product_image failed: %s", e, exc_info=True)
         return ""
+
+    join_lines = any(marker in prompt for marker in _NO_NEWLINE_MARKERS)
+    return _finish_caption(caption, join_lines)
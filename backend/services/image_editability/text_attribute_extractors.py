@@ -13,6 +13,7 @@ from dataclasses import dataclass, field, asdict
 from typing import Dict, Any, List, Optional, Tuple, Union
 from PIL import Image
 from services.prompts import get_text_attribute_extraction_prompt
+from utils.text_sanitize import strip_json_code_fence
 
 logger = logging.getLogger(__name__)
 
@@ -265,7 +266,7 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
                 return {}
             
             # 清理响应文本
-            cleaned_text = response_text.strip().strip("```json").strip("```").strip()
+            cleaned_text = strip_json_code_fence(response_text)
             return json.loads(cleaned_text)
         
         finally:
@@ -426,15 +427,8 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
                     return {}
                 
                 # 清理响应文本并解析JSON
-                cleaned_text = response_text.strip()
                 # 移除可能的 markdown 代码块标记
-                if cleaned_text.startswith("```json"):
-                    cleaned_text = cleaned_text[7:]
-                if cleaned_text.startswith("```"):
-                    cleaned_text = cleaned_text[3:]
-                if cleaned_text.endswith("```"):
-                    cleaned_text = cleaned_text[:-3]
-                cleaned_text = cleaned_text.strip()
+                cleaned_text = strip_json_code_fence(response_text)
                 
                 result_list = json.loads(cleaned_text)
                 
@@ -5,6 +5,7 @@ import json
 import logging
 from textwrap import dedent
 from typing import List, Dict, Optional, TYPE_CHECKING
+from xml.sax.saxutils import escape
 
 if TYPE_CHECKING:
     from services.ai_service import ProjectContext
@@ -99,7 +100,7 @@ def get_image_text_language_instruction(language: str = None) -> str:
         return ""  # 自动模式不添加语言限制
 
 
-def _format_reference_files_xml(reference_files_content: Optional[List[Dict[str, str]]]) -> str:
+def format_reference_files_xml(reference_files_content: Optional[List[Dict[str, str]]]) -> str:
     """
     Format reference files content as XML structure
     
@@ -114,13 +115,15 @@ def _format_reference_files_xml(reference_files_content: Optional[List[Dict[str,
     
     xml_parts = ["<uploaded_files>"]
     for file_info in reference_files_content:
-        filename = file_info.get('filename', 'unknown')
-        content = file_info.get('content', '')
-        xml_parts.append(f'  <file name="{filename}">')
-        xml_parts.append('    <content>')
-        xml_parts.append(content)
-        xml_parts.append('    </content>')
-        xml_parts.append('  </file>')
+        # Filenames are user supplied - escape them so they cannot break out of the attribute
+        filename = escape(file_info.get('filename', 'unknown'), {'"': '&quot;'})
+        xml_parts.extend((
+            f'  <file name="{filename}">',
+            '    <content>',
+            file_info.get('content', ''),
+            '    </content>',
+            '  </file>',
+        ))
     xml_parts.append('</uploaded_files>')
     xml_parts.append('')  # Empty line after XML
     
@@ -138,7 +141,7 @@ def get_outline_generation_prompt(project_context: 'ProjectContext', language: s
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = project_context.reference_files_xml
     idea_prompt = project_context.idea_prompt or ""
     
     prompt = (f"""\
@@ -175,7 +178,7 @@ The user's request: {idea_prompt}. Now generate the outline, don't include any o
 """)
     
     final_prompt = files_xml + prompt
-    logger.debug(f"[get_outline_generation_prompt] Final prompt:\n{final_prompt}")
+    logger.debug("[get_outline_generation_prompt] Final prompt:\n%s", final_prompt)
     return final_prompt
 
 
@@ -189,7 +192,7 @@ def get_outline_parsing_prompt(project_context: 'ProjectContext', language: str
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = project_context.reference_files_xml
     outline_text = project_context.outline_text or ""
     
     prompt = (f"""\
@@ -239,7 +242,7 @@ Now parse the outline text above into the structured format. Return only the JSO
 """)
     
     final_prompt = files_xml + prompt
-    logger.debug(f"[get_outline_parsing_prompt] Final prompt:\n{final_prompt}")
+    logger.debug("[get_outline_parsing_prompt] Final prompt:\n%s", final_prompt)
     return final_prompt
 
 
@@ -260,7 +263,7 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = project_context.reference_files_xml
     # 根据项目类型选择最相关的原始输入
     if project_context.creation_type == 'idea' and project_context.idea_prompt:
         original_input = project_context.idea_prompt
@@ -304,7 +307,7 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
 """)
     
     final_prompt = files_xml + prompt
-    logger.debug(f"[get_page_description_prompt] Final prompt:\n{final_prompt}")
+    logger.debug("[get_page_description_prompt] Final prompt:\n%s", final_prompt)
     return final_prompt
 
 
@@ -377,7 +380,7 @@ def get_image_generation_prompt(page_desc: str, outline_text: str,
 {"**注意：当前页面为ppt的封面页，请你采用专业的封面设计美学技巧，务必凸显出页面标题，分清主次，确保一下就能抓住观众的注意力。**" if page_index == 1 else ""}
 """)
     
-    logger.debug(f"[get_image_generation_prompt] Final prompt:\n{prompt}")
+    logger.debug("[get_image_generation_prompt] Final prompt:\n%s", prompt)
     return prompt
 
 
@@ -408,7 +411,7 @@ def get_image_edit_prompt(edit_instruction: str, original_description: str = Non
     else:
         prompt = f"根据以下指令修改这张PPT页面：{edit_instruction}\n保持原有的内容结构和设计风格，只按照指令进行修改。提供的参考图中既有新素材，也有用户手动框选出的区域，请你根据原图和参考图的关系智能判断用户意图。"
     
-    logger.debug(f"[get_image_edit_prompt] Final prompt:\n{prompt}")
+    logger.debug("[get_image_edit_prompt] Final prompt:\n%s", prompt)
     return prompt
 
 
@@ -422,7 +425,7 @@ def get_description_to_outline_prompt(project_context: 'ProjectContext', languag
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = project_context.reference_files_xml
     description_text = project_context.description_text or ""
     
     prompt = (f"""\
@@ -473,7 +476,7 @@ Now extract the outline structure from the description text above. Return only t
 """)
     
     final_prompt = files_xml + prompt
-    logger.debug(f"[get_description_to_outline_prompt] Final prompt:\n{final_prompt}")
+    logger.debug("[get_description_to_outline_prompt] Final prompt:\n%s", final_prompt)
     return final_prompt
 
 
@@ -535,7 +538,7 @@ Now split the description text into individual page descriptions. Return only th
 {get_language_instruction(language)}
 """)
     
-    logger.debug(f"[get_description_split_prompt] Final prompt:\n{prompt}")
+    logger.debug("[get_description_split_prompt] Final prompt:\n%s", prompt)
     return prompt
 
 
@@ -555,7 +558,7 @@ def get_outline_refinement_prompt(current_outline: List[Dict], user_requirement:
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = project_context.reference_files_xml
     
     # 处理空大纲的情况
     if not current_outline or len(current_outline) == 0:
@@ -628,7 +631,7 @@ You are a helpful assistant that modifies PPT outlines based on user requirement
 """)
     
     final_prompt = files_xml + prompt
-    logger.debug(f"[get_outline_refinement_prompt] Final prompt:\n{final_prompt}")
+    logger.debug("[get_outline_refinement_prompt] Final prompt:\n%s", final_prompt)
     return final_prompt
 
 
@@ -650,7 +653,7 @@ def get_descriptions_refinement_prompt(current_descriptions: List[Dict], user_re
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = project_context.reference_files_xml
     
     # 构建之前的修改历史记录
     previous_req_text = ""
@@ -735,7 +738,7 @@ You are a helpful assistant that modifies PPT page descriptions based on user re
 """)
     
     final_prompt = files_xml + prompt
-    logger.debug(f"[get_descriptions_refinement_prompt] Final prompt:\n{final_prompt}")
+    logger.debug("[get_descriptions_refinement_prompt] Final prompt:\n%s", final_prompt)
     return final_prompt
 
 
@@ -756,7 +759,7 @@ def get_clean_background_prompt() -> str:
 
 注意，**任意位置的, 所有的**文字和图表都应该被彻底移除，**输出不应该包含任何文字和图表。**
 """
-    logger.debug(f"[get_clean_background_prompt] Final prompt:\n{prompt}")
+    logger.debug("[get_clean_background_prompt] Final prompt:\n%s", prompt)
     return prompt
 
 
@@ -786,7 +789,7 @@ def get_text_attribute_extraction_prompt(content_hint: str = "") -> str:
 ```
 """.format(content_hint=content_hint)
     
-    logger.debug(f"[get_text_attribute_extraction_prompt] Final prompt:\n{prompt}")
+    logger.debug("[get_text_attribute_extraction_prompt] Final prompt:\n%s", prompt)
     return prompt
 
 
@@ -860,7 +863,7 @@ def get_batch_text_attribute_extraction_prompt(text_elements_json: str) -> str:
 ```
 """
     
-    logger.debug(f"[get_batch_text_attribute_extraction_prompt] Final prompt:\n{prompt}")
+    logger.debug("[get_batch_text_attribute_extraction_prompt] Final prompt:\n%s", prompt)
     return prompt
 
 
@@ -5,11 +5,13 @@ No need for Celery or Redis, uses in-memory task tracking
 import logging
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable, List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional
 from datetime import datetime
 from sqlalchemy import func
+from PIL import Image
 from models import db, Task, Page, Material, PageImageVersion
 from utils import get_filtered_pages
+from services.image_caption_service import caption_product_image
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -310,7 +312,7 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
 
             # Project-level overrides (image model / aspect ratio)
             from models import Project
-            from services.ai_providers import get_image_provider
+            from services.ai_service_manager import get_cached_image_provider
 
             project = Project.query.get(project_id)
             effective_aspect_ratio = aspect_ratio
@@ -322,7 +324,7 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                 project_image_model = (project.image_model or "").strip() if getattr(project, "image_model", None) else ""
                 if project_image_model:
                     logger.info(f"Using project image_model override: {project_image_model}")
-                    image_provider_override = get_image_provider(model=project_image_model)
+                    image_provider_override = get_cached_image_provider(project_image_model)
             
             # 注意：不在任务开始时获取模板路径，而是在每个子线程中动态获取
             # 这样可以确保即使用户在上传新模板后立即生成，也能使用最新模板
@@ -525,7 +527,7 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
 
             # Project-level overrides (image model / aspect ratio)
             from models import Project
-            from services.ai_providers import get_image_provider
+            from services.ai_service_manager import get_cached_image_provider
 
             project = Project.query.get(project_id)
             effective_aspect_ratio = aspect_ratio
@@ -537,11 +539,11 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
                 project_image_model = (project.image_model or "").strip() if getattr(project, "image_model", None) else ""
                 if project_image_model:
                     logger.info(f"Using project image_model override: {project_image_model}")
-                    image_provider_override = get_image_provider(model=project_image_model)
+                    image_provider_override = get_cached_image_provider(project_image_model)
 
             # Project-level overrides (image model / aspect ratio)
             from models import Project
-            from services.ai_providers import get_image_provider
+            from services.ai_service_manager import get_cached_image_provider
 
             project = Project.query.get(project_id)
             effective_aspect_ratio = aspect_ratio
@@ -553,7 +555,7 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
                 project_image_model = (project.image_model or "").strip() if getattr(project, "image_model", None) else ""
                 if project_image_model:
                     logger.info(f"Using project image_model override: {project_image_model}")
-                    image_provider_override = get_image_provider(model=project_image_model)
+                    image_provider_override = get_cached_image_provider(project_image_model)
             
             # Update page status
             page.status = 'GENERATING'
@@ -861,6 +863,95 @@ def generate_material_image_task(task_id: str, project_id: str, prompt: str,
                     shutil.rmtree(temp_dir, ignore_errors=True)
 
 
+# Upper bound on concurrent caption model calls per caption task
+MAX_CAPTION_WORKERS = 8
+
+# Images are bounded to this size before captioning; the caption model does
+# not need full-resolution product photos
+CAPTION_IMAGE_MAX_SIZE = (1024, 1024)
+
+
+def caption_materials_task(task_id: str, material_urls: List[str],
+                           image_paths: List[Optional[str]],
+                           caption_options: Dict[str, Any],
+                           prompt: str = None, app=None):
+    """
+    Background task for captioning material images
+
+    image_paths is aligned with material_urls; entries that could not be
+    resolved are None and keep an empty caption. Captions are stored in the
+    task progress together with the combined caption.
+
+    Note: app instance MUST be passed from the request context
+    """
+    if app is None:
+        raise ValueError("Flask app instance must be provided")
+
+    with app.app_context():
+        try:
+            task = Task.query.get(task_id)
+            if not task:
+                return
+
+            task.status = 'PROCESSING'
+            db.session.commit()
+
+            def _caption(abs_path):
+                try:
+                    image = Image.open(abs_path)
+                    if image.format == 'JPEG':
+                        # Let libjpeg downscale while decoding instead of decoding full size
+                        image.draft('RGB', CAPTION_IMAGE_MAX_SIZE)
+                    image.thumbnail(CAPTION_IMAGE_MAX_SIZE, Image.Resampling.LANCZOS)
+                except Exception as img_err:
+                    logger.warning(f"【产品图片识别】图片加载失败: {abs_path}, 错误: {img_err}")
+                    return ""
+                caption = caption_product_image(image=image, prompt=prompt, **caption_options)
+                if not caption:
+                    logger.warning(f"【产品图片识别】AI返回空结果: {abs_path}")
+                return caption
+
+            captions = [{"url": url, "caption": ""} for url in material_urls]
+            pending = [(index, path) for index, path in enumerate(image_paths) if path]
+
+            # Each caption is an independent model round-trip, so fan them out
+            if pending:
+                with ThreadPoolExecutor(max_workers=min(MAX_CAPTION_WORKERS, len(pending))) as executor:
+                    futures = {
+                        executor.submit(_caption, path): index
+                        for index, path in pending
+                    }
+                    for future in as_completed(futures):
+                        captions[futures[future]]["caption"] = future.result() or ""
+
+            # Keep request order in the combined caption
+            combined_parts = [item["caption"] for item in captions if item["caption"]]
+
+            task.status = 'COMPLETED'
+            task.completed_at = datetime.utcnow()
+            task.set_progress({
+                "total": len(material_urls),
+                "completed": len(combined_parts),
+                "failed": len(material_urls) - len(combined_parts),
+                "captions": captions,
+                "combined_caption": "；".join(combined_parts),
+            })
+            db.session.commit()
+
+            logger.info(f"【产品图片识别】完成，成功识别 {len(combined_parts)}/{len(material_urls)} 个图片")
+
+        except Exception as e:
+            logger.exception(f"Task {task_id} FAILED")
+
+            db.session.rollback()
+            task = Task.query.get(task_id)
+            if task:
+                task.status = 'FAILED'
+                task.error_message = str(e)
+                task.completed_at = datetime.utcnow()
+                db.session.commit()
+
+
 def export_editable_pptx_with_recursive_analysis_task(
     task_id: str, 
     project_id: str, 
@@ -4,29 +4,32 @@ pytest配置文件 - 提供测试fixtures和配置
 用于后端所有测试的共享配置和fixtures
 """
 
+import io
 import os
 import sys
 import pytest
 import tempfile
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 # 确保backend目录在Python路径中
 backend_path = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_path))
 
-# 设置测试环境变量 - 必须在导入app之前设置
-os.environ['TESTING'] = 'true'
-os.environ['USE_MOCK_AI'] = 'true'  # 标记使用mock AI服务
-os.environ['GOOGLE_API_KEY'] = os.environ.get('GOOGLE_API_KEY', 'mock-api-key-for-testing')
-os.environ['FLASK_ENV'] = 'testing'
+
+def pytest_configure(config):
+    """设置测试环境变量 - 在收集测试模块（导入app）之前只执行一次"""
+    os.environ['TESTING'] = 'true'
+    os.environ['USE_MOCK_AI'] = 'true'  # 标记使用mock AI服务
+    os.environ.setdefault('GOOGLE_API_KEY', 'mock-api-key-for-testing')
+    os.environ['FLASK_ENV'] = 'testing'
 
 
 @pytest.fixture(scope='session')
-def app():
+def app(tmp_path_factory):
     """创建Flask测试应用"""
-    # 创建临时目录用于测试
-    temp_dir = tempfile.mkdtemp()
+    # 创建临时目录用于测试（由pytest负责清理）
+    temp_dir = str(tmp_path_factory.mktemp('app'))
     temp_db = os.path.join(temp_dir, 'test.db')
     
     # 设置测试数据库路径
@@ -52,13 +55,14 @@ def app():
         db.create_all()
     
     yield test_app
-    
-    # 清理
-    import shutil
-    try:
-        shutil.rmtree(temp_dir)
-    except Exception:
-        pass
+
+
+def _clear_tables(db):
+    """清空所有表数据（表结构在app fixture中只创建一次）"""
+    db.session.rollback()
+    for table in reversed(db.metadata.sorted_tables):
+        db.session.execute(table.delete())
+    db.session.commit()
 
 
 @pytest.fixture(scope='function')
@@ -68,23 +72,19 @@ def client(app):
         with app.app_context():
             from models import db
             # 清理旧数据，保持测试隔离
-            db.session.rollback()
-            for table in reversed(db.metadata.sorted_tables):
-                db.session.execute(table.delete())
-            db.session.commit()
+            _clear_tables(db)
             yield test_client
             db.session.rollback()
 
 
 @pytest.fixture(scope='function')
 def db_session(app):
-    """创建数据库会话"""
+    """创建数据库会话（复用会话级的表结构，不再每个测试重建）"""
     with app.app_context():
         from models import db
-        db.create_all()
+        _clear_tables(db)
         yield db.session
         db.session.remove()
-        db.drop_all()
 
 
 @pytest.fixture
@@ -100,39 +100,82 @@ def sample_project(client):
     return data['data'] if data.get('success') else None
 
 
-@pytest.fixture
-def mock_ai_service():
-    """Mock AI服务，避免真实API调用（使用标准库unittest.mock）"""
-    with patch('services.ai_service.AIService') as mock:
-        # Mock实例
-        mock_instance = MagicMock()
-        mock.return_value = mock_instance
-        
+class _StubMethod:
+    """记录调用参数并返回固定值的轻量桩方法（代替MagicMock，调用开销更小）"""
+
+    def __init__(self, return_value=None):
+        self.return_value = return_value
+        self.calls = []
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+        return self.return_value
+
+    @property
+    def call_count(self):
+        return len(self.calls)
+
+    def assert_called_once_with(self, *args, **kwargs):
+        assert self.calls == [(args, kwargs)], f'期望调用一次 {(args, kwargs)}，实际为 {self.calls}'
+
+
+class _FakeAIService:
+    """AIService桩对象，只提供测试用到的方法"""
+
+    def __init__(self, test_image):
         # Mock大纲生成
-        mock_instance.generate_outline.return_value = [
+        self.generate_outline = _StubMethod([
             {'title': '测试页面1', 'points': ['要点1', '要点2']},
             {'title': '测试页面2', 'points': ['要点3', '要点4']},
-        ]
-        
+        ])
+
         # Mock扁平化大纲
-        mock_instance.flatten_outline.return_value = [
+        self.flatten_outline = _StubMethod([
             {'title': '测试页面1', 'points': ['要点1', '要点2']},
             {'title': '测试页面2', 'points': ['要点3', '要点4']},
-        ]
-        
+        ])
+
         # Mock描述生成
-        mock_instance.generate_page_description.return_value = {
+        self.generate_page_description = _StubMethod({
             'title': '测试标题',
             'text_content': ['内容1', '内容2'],
             'layout_suggestion': '居中布局'
-        }
-        
+        })
+
         # Mock图片生成 - 返回一个简单的测试图片
-        from PIL import Image
-        test_image = Image.new('RGB', (1920, 1080), color='blue')
-        mock_instance.generate_image.return_value = test_image
-        
-        yield mock_instance
+        self.generate_image = _StubMethod(test_image)
+
+
+@pytest.fixture(scope='session')
+def mock_generated_image():
+    """Mock生图结果（整个测试会话共用一张，测试只读取不修改）"""
+    from PIL import Image
+    return Image.new('RGB', (1920, 1080), color='blue')
+
+
+@pytest.fixture
+def mock_ai_service(mock_generated_image):
+    """Mock AI服务，避免真实API调用"""
+    fake_service = _FakeAIService(mock_generated_image)
+    with patch('services.ai_service.AIService', return_value=fake_service):
+        yield fake_service
+
+
+@pytest.fixture
+def orjson_modules():
+    """json_backend需切换的模块（导入了可选orjson的模块），由测试文件覆盖"""
+    return ()
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def json_backend(request, monkeypatch, orjson_modules):
+    """分别在安装orjson和未安装orjson（回退标准库）两种情况下运行"""
+    if request.param == 'stdlib':
+        for module in orjson_modules:
+            monkeypatch.setattr(module, 'orjson', None)
+    else:
+        pytest.importorskip('orjson')
+    return request.param
 
 
 @pytest.fixture
@@ -142,19 +185,22 @@ def temp_upload_dir():
         yield tmpdir
 
 
-@pytest.fixture
-def sample_image_file():
-    """创建示例图片文件"""
-    # 创建一个简单的PNG文件（1x1像素的红色图片）
-    import io
+def _encode_sample_png():
+    """编码示例PNG（100x100红色图片），只在导入时执行一次"""
     from PIL import Image
-    
-    img = Image.new('RGB', (100, 100), color='red')
+
     img_bytes = io.BytesIO()
-    img.save(img_bytes, format='PNG')
-    img_bytes.seek(0)
-    
-    return img_bytes
+    Image.new('RGB', (100, 100), color='red').save(img_bytes, format='PNG')
+    return img_bytes.getvalue()
+
+
+_SAMPLE_PNG_BYTES = _encode_sample_png()
+
+
+@pytest.fixture
+def sample_image_file():
+    """创建示例图片文件（每个测试一个新的文件对象，共用已编码的PNG字节）"""
+    return io.BytesIO(_SAMPLE_PNG_BYTES)
 
 
 # =====================================
@@ -0,0 +1,236 @@
+"""
+AI Provider工厂单元测试
+"""
+
+import pytest
+
+from services.ai_providers import _get_provider_config, clear_provider_config_cache
+
+
+class TestProviderConfigCache:
+    """Provider配置缓存测试"""
+
+    def test_config_cached_until_cleared(self, app):
+        """测试配置缓存在app上，清除后重新读取"""
+        original_key = app.config.get('GOOGLE_API_KEY')
+        with app.app_context():
+            clear_provider_config_cache()
+            try:
+                first = _get_provider_config()
+                app.config['GOOGLE_API_KEY'] = 'rotated-key'
+                assert _get_provider_config() is first
+
+                clear_provider_config_cache()
+                assert _get_provider_config()['api_key'] == 'rotated-key'
+            finally:
+                app.config['GOOGLE_API_KEY'] = original_key
+                clear_provider_config_cache()
+
+
+class TestImagesApiPromptSanitizing:
+    """Images API提示词清洗测试"""
+
+    def test_clean_prompt_only_tidied(self):
+        """测试无需过滤的提示词只整理项目符号和空白"""
+        from services.ai_providers.image.openai_provider import OpenAIImageProvider
+
+        prompt = "  - 白色背景的  产品主图\n\n\n\n* 柔和光线  "
+
+        assert OpenAIImageProvider._sanitize_images_api_prompt(prompt) == "白色背景的 产品主图\n柔和光线"
+
+    def test_drops_tags_and_instruction_lines(self):
+        """测试移除XML标签和指令性语句，保留画面描述"""
+        from services.ai_providers.image.openai_provider import OpenAIImageProvider
+
+        prompt = (
+            "你是一名电商设计师\n"
+            "<page_description>\n- 木质桌面上的咖啡杯\n</page_description>\n"
+            "Output as Markdown\n"
+            "禁止出现文字"
+        )
+
+        assert OpenAIImageProvider._sanitize_images_api_prompt(prompt) == "木质桌面上的咖啡杯"
+
+
+class TestChatCompletionsStreaming:
+    """chat.completions流式生图测试"""
+
+    def test_stream_stops_at_markdown_image(self):
+        """测试读到完整的Markdown图片链接后即停止读取"""
+        from types import SimpleNamespace
+        from unittest.mock import MagicMock
+        from services.ai_providers.image.openai_provider import OpenAIImageProvider
+
+        def chunk(text):
+            return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+        chunks = [chunk('生成完成 ![图片](https://img.example.com/'), chunk('a.png)'), chunk('不应读取')]
+        stream = MagicMock()
+        stream.__iter__.return_value = iter(chunks)
+
+        provider = OpenAIImageProvider(api_key='test-key')
+        provider.client = MagicMock()
+        provider.client.chat.completions.create.return_value = stream
+
+        text = provider._stream_chat_completion_text({'model': provider.model, 'messages': []})
+
+        assert text == '生成完成 ![图片](https://img.example.com/a.png)'
+        assert provider.client.chat.completions.create.call_args.kwargs['stream'] is True
+        stream.close.assert_called_once()
+
+    @staticmethod
+    def _chunk(text):
+        from types import SimpleNamespace
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+    def test_stream_error_before_first_chunk_falls_back(self):
+        """测试流尚未返回任何数据即失败时，回退为非流式请求"""
+        from unittest.mock import MagicMock
+        from services.ai_providers.image.openai_provider import OpenAIImageProvider
+
+        provider = OpenAIImageProvider(api_key='test-key')
+        provider.client = MagicMock()
+        provider.client.chat.completions.create.side_effect = ConnectionError('proxy refused')
+
+        assert provider._stream_chat_completion_text({'model': provider.model, 'messages': []}) == ''
+
+    def test_stream_error_after_chunk_raises(self):
+        """测试已收到数据后流中断时直接抛出，不重复发起付费生图"""
+        from unittest.mock import MagicMock
+        from services.ai_providers.image.openai_provider import OpenAIImageProvider
+
+        def broken_stream():
+            yield self._chunk('生成中')
+            raise TimeoutError('read timed out')
+
+        stream = MagicMock()
+        stream.__iter__.return_value = broken_stream()
+        provider = OpenAIImageProvider(api_key='test-key')
+        provider.client = MagicMock()
+        provider.client.chat.completions.create.return_value = stream
+
+        with pytest.raises(TimeoutError):
+            provider._stream_chat_completion_text({'model': provider.model, 'messages': []})
+        assert provider.client.chat.completions.create.call_count == 1
+        stream.close.assert_called_once()
+
+
+class TestImagesApiReferenceUploads:
+    """Images API参考图上传测试"""
+
+    def test_gpt_image_uploads_refs_as_multipart(self, monkeypatch):
+        """测试gpt-image模型将参考图以JPEG文件上传到images/edits"""
+        import base64
+        from io import BytesIO
+        from unittest.mock import MagicMock
+        from PIL import Image
+        from services.ai_providers.image import openai_provider
+        from services.ai_providers.image.openai_provider import OpenAIImageProvider
+
+        result = BytesIO()
+        Image.new('RGB', (4, 4), 'blue').save(result, format='PNG')
+        response = MagicMock(status_code=200)
+        response.content = openai_provider._dumps_json(
+            {'data': [{'b64_json': base64.b64encode(result.getvalue()).decode('ascii')}]}
+        )
+        session = MagicMock()
+        session.post.return_value = response
+        monkeypatch.setattr(openai_provider, '_http_session', session)
+
+        provider = OpenAIImageProvider(api_key='test-key', api_base='https://api.example.com/v1', model='gpt-image-1')
+        image = provider.generate_image('一杯咖啡', ref_images=[Image.new('RGBA', (8, 8)), Image.new('RGB', (8, 8))])
+
+        assert image.size == (4, 4)
+        args, kwargs = session.post.call_args
+        assert args[0] == 'https://api.example.com/v1/images/edits'
+        assert [name for name, _ in kwargs['files']] == ['image[]', 'image[]']
+        assert kwargs['files'][0][1][1][:2] == b'\xff\xd8'  # 原始JPEG字节，非base64
+        assert kwargs['data']['prompt'] == '一杯咖啡'
+
+
+class TestImagesApiRequestPacer:
+    """Images API请求限速测试"""
+
+    def test_caps_inflight_requests(self):
+        """测试同时进行的请求数不超过上限"""
+        import threading
+        import time
+        from services.ai_providers.image.openai_provider import _RequestPacer
+
+        pacer = _RequestPacer(max_inflight=2)
+        lock = threading.Lock()
+        inflight = []
+        peak = []
+
+        def request():
+            with pacer.slot():
+                with lock:
+                    inflight.append(1)
+                    peak.append(len(inflight))
+                time.sleep(0.02)
+                with lock:
+                    inflight.pop()
+
+        threads = [threading.Thread(target=request) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert max(peak) == 2
+
+    def test_spaces_out_request_starts(self, monkeypatch):
+        """测试请求开始时间之间至少间隔min_interval"""
+        from services.ai_providers.image import openai_provider
+
+        clock = [100.0]
+        sleeps = []
+        monkeypatch.setattr(openai_provider.time, 'monotonic', lambda: clock[0])
+        monkeypatch.setattr(openai_provider.time, 'sleep', sleeps.append)
+
+        pacer = openai_provider._RequestPacer(min_interval=0.5)
+        for _ in range(3):
+            with pacer.slot():
+                pass
+
+        assert sleeps == [0.5, 1.0]
+
+
+class TestGenAISharedConnectionPool:
+    """GenAI客户端连接池复用测试"""
+
+    def test_api_key_clients_share_httpx_client(self):
+        """测试AI Studio模式的文本/图片Provider共用同一个httpx连接池"""
+        from services.ai_providers.image.genai_provider import GenAIImageProvider
+        from services.ai_providers.text.genai_provider import GenAITextProvider
+
+        text_provider = GenAITextProvider(api_key='test-key', api_base='https://proxy.example.com/gemini')
+        image_provider = GenAIImageProvider(api_key='test-key')
+
+        text_api_client = text_provider.client._api_client
+        image_api_client = image_provider.client._api_client
+        assert text_api_client._httpx_client is image_api_client._httpx_client
+        assert text_api_client._http_options.base_url == 'https://proxy.example.com/gemini'
+
+
+class TestImagesApiJsonBodies:
+    """Images API请求/响应JSON编解码测试"""
+
+    @pytest.fixture
+    def orjson_modules(self):
+        """Images API请求体在未安装orjson时回退标准库"""
+        from services.ai_providers.image import openai_provider
+
+        return (openai_provider,)
+
+    @pytest.mark.usefixtures('json_backend')
+    def test_round_trip(self):
+        """测试安装与未安装orjson时请求体都为UTF-8字节，且可解析响应"""
+        from services.ai_providers.image import openai_provider
+
+        payload = {'model': 'gpt-image-1', 'prompt': '一杯咖啡', 'n': 1}
+        body = openai_provider._dumps_json(payload)
+
+        assert isinstance(body, bytes)
+        assert openai_provider._loads_json(body) == payload
+        assert openai_provider._loads_json(b'{"data": [{"b64_json": "aGk="}]}') == {'data': [{'b64_json': 'aGk='}]}
@@ -0,0 +1,28 @@
+"""
+AI服务单元测试
+"""
+
+from services.ai_service import ProjectContext
+
+
+class TestProjectContextReferenceFiles:
+    """项目上下文参考文件测试"""
+
+    def test_reference_files_xml_cached(self, monkeypatch):
+        """测试参考文件XML只生成一次，重新赋值后重新生成"""
+        import services.ai_service as ai_service
+        calls = []
+        original_format = ai_service.format_reference_files_xml
+        monkeypatch.setattr(
+            ai_service, 'format_reference_files_xml', lambda content: calls.append(content) or original_format(content)
+        )
+
+        context = ProjectContext({'idea_prompt': '保温杯'}, [{'filename': '说明书.pdf', 'content': '容量500ml'}])
+        first = context.reference_files_xml
+        assert context.reference_files_xml is first
+        assert '<file name="说明书.pdf">' in first
+        assert len(calls) == 1
+
+        context.reference_files_content = None
+        assert context.reference_files_xml == ''
+        assert len(calls) == 2
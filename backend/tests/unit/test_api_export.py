@@ -0,0 +1,119 @@
+"""
+导出API单元测试
+"""
+
+import io
+import os
+import zipfile
+import zlib
+
+import pytest
+from conftest import assert_error_response
+
+
+@pytest.fixture
+def project_with_images(app, client, sample_image_file):
+    """创建带已生成图片的项目"""
+    from models import db, Project, Page
+
+    project = Project(creation_type='idea', idea_prompt='导出测试')
+    db.session.add(project)
+    db.session.flush()
+
+    pages_dir = os.path.join(app.config['UPLOAD_FOLDER'], project.id, 'pages')
+    os.makedirs(pages_dir, exist_ok=True)
+
+    image_bytes = sample_image_file.getvalue()
+    for i in range(2):
+        page = Page(project_id=project.id, order_index=i, status='COMPLETED')
+        db.session.add(page)
+        db.session.flush()
+        filename = f'{page.id}.jpg'
+        with open(os.path.join(pages_dir, filename), 'wb') as f:
+            f.write(image_bytes)
+        page.generated_image_path = f'{project.id}/pages/{filename}'
+
+    db.session.commit()
+    return project.id, image_bytes
+
+
+class TestExportImages:
+    """图片打包导出测试"""
+
+    def test_export_images_zip(self, client, project_with_images):
+        """测试导出全部图片为ZIP"""
+        project_id, image_bytes = project_with_images
+        response = client.get(f'/api/projects/{project_id}/export/images')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/zip'
+        assert 'attachment' in response.headers['Content-Disposition']
+
+        with zipfile.ZipFile(io.BytesIO(response.get_data())) as zf:
+            assert zf.namelist() == ['page_01.jpg', 'page_02.jpg']
+            assert zf.testzip() is None
+            assert zf.read('page_01.jpg') == image_bytes
+
+    def test_export_images_project_not_found(self, client):
+        """测试导出不存在的项目"""
+        response = client.get('/api/projects/non-existent-id/export/images')
+
+        assert_error_response(response, 404)
+
+    def test_export_pptx_not_supported(self, client, project_with_images):
+        """测试PPTX导出在电商版本中不可用"""
+        project_id, _ = project_with_images
+        response = client.get(f'/api/projects/{project_id}/export/pptx')
+
+        assert_error_response(response, 400)
+
+    def test_export_images_stored_uncompressed(self, client, project_with_images):
+        """测试图片以STORED方式写入ZIP（不再重复压缩）"""
+        project_id, _ = project_with_images
+        response = client.get(f'/api/projects/{project_id}/export/images')
+
+        with zipfile.ZipFile(io.BytesIO(response.get_data())) as zf:
+            assert all(info.compress_type == zipfile.ZIP_STORED for info in zf.infolist())
+
+    def test_export_images_mod_zip_manifest(self, app, client, project_with_images):
+        """测试启用nginx mod_zip时仅返回文件清单"""
+        project_id, image_bytes = project_with_images
+        app.config['EXPORT_USE_NGINX_MOD_ZIP'] = True
+        try:
+            response = client.get(f'/api/projects/{project_id}/export/images')
+        finally:
+            app.config['EXPORT_USE_NGINX_MOD_ZIP'] = False
+
+        assert response.status_code == 200
+        assert response.headers['X-Archive-Files'] == 'zip'
+        lines = response.get_data(as_text=True).splitlines()
+        assert len(lines) == 2
+        crc, size, location, arcname = lines[0].split(' ')
+        assert crc == f'{zlib.crc32(image_bytes):08x}'
+        assert int(size) == len(image_bytes)
+        assert location.startswith(f'/files/{project_id}/pages/')
+        assert arcname == 'page_01.jpg'
+
+    def test_export_editable_pptx_not_supported(self, client, project_with_images):
+        """测试可编辑PPTX导出在电商版本中不可用"""
+        project_id, _ = project_with_images
+        response = client.post(f'/api/projects/{project_id}/export/editable-pptx', json={})
+
+        data = assert_error_response(response, 400)
+        assert data['error']['code'] == 'INVALID_REQUEST'
+        assert 'Editable PPTX' in data['error']['message']
+
+    def test_export_images_reuses_cached_zip(self, app, client, project_with_images):
+        """测试相同选择的重复导出复用缓存的ZIP"""
+        project_id, _ = project_with_images
+        first = client.get(f'/api/projects/{project_id}/export/images')
+        first_data = first.get_data()
+
+        exports_dir = os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'exports')
+        cached = [name for name in os.listdir(exports_dir) if name.endswith('.zip')]
+        assert len(cached) == 1
+
+        second = client.get(f'/api/projects/{project_id}/export/images')
+        assert second.status_code == 200
+        assert second.get_data() == first_data
+        assert 'attachment' in second.headers['Content-Disposition']
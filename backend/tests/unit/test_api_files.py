@@ -0,0 +1,122 @@
+"""
+静态文件服务API单元测试
+"""
+
+import os
+
+import pytest
+
+
+@pytest.fixture
+def page_file(app, client):
+    """在上传目录中创建一个页面图片文件"""
+    project_id = 'file-test-project'
+    pages_dir = os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'pages')
+    os.makedirs(pages_dir, exist_ok=True)
+    with open(os.path.join(pages_dir, 'page.jpg'), 'wb') as f:
+        f.write(b'fake-image-bytes')
+    return f'/files/{project_id}/pages/page.jpg'
+
+
+@pytest.fixture
+def global_material_file(app, client):
+    """在上传目录中创建一个全局素材文件"""
+    materials_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'materials')
+    os.makedirs(materials_dir, exist_ok=True)
+    with open(os.path.join(materials_dir, 'material_test.png'), 'wb') as f:
+        f.write(b'fake-material-bytes')
+    return '/files/materials/material_test.png'
+
+
+class TestServeFile:
+    """项目文件服务测试"""
+
+    def test_serve_file_success(self, client, page_file):
+        """测试返回文件内容及缓存校验头"""
+        response = client.get(page_file)
+
+        assert response.status_code == 200
+        assert response.get_data() == b'fake-image-bytes'
+        assert response.headers.get('ETag')
+        assert response.headers.get('Last-Modified')
+
+    def test_serve_file_not_modified(self, client, page_file):
+        """测试携带If-None-Match时返回304"""
+        etag = client.get(page_file).headers['ETag']
+        response = client.get(page_file, headers={'If-None-Match': etag})
+
+        assert response.status_code == 304
+        assert response.get_data() == b''
+
+    def test_serve_file_not_found(self, client):
+        """测试文件不存在"""
+        response = client.get('/files/file-test-project/pages/missing.jpg')
+
+        assert response.status_code == 404
+
+    def test_serve_file_invalid_type(self, client):
+        """测试不支持的文件类型目录"""
+        response = client.get('/files/file-test-project/secrets/page.jpg')
+
+        assert response.status_code == 404
+
+
+class TestServeGlobalMaterial:
+    """全局素材文件服务测试"""
+
+    def test_serve_global_material_cacheable(self, client, global_material_file):
+        """测试全局素材可被浏览器缓存"""
+        response = client.get(global_material_file)
+
+        assert response.status_code == 200
+        assert 'max-age=3600' in response.headers['Cache-Control']
+
+
+class TestServeMineruFile:
+    """MinerU解析文件服务测试"""
+
+    @pytest.fixture
+    def mineru_file(self, app, client):
+        extract_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'mineru_files', 'extract-test', 'images')
+        os.makedirs(extract_dir, exist_ok=True)
+        with open(os.path.join(extract_dir, 'abcdef123456.jpg'), 'wb') as f:
+            f.write(b'mineru-image-bytes')
+        return '/files/mineru/extract-test/images/abcdef123456.jpg'
+
+    def test_serve_mineru_file_success(self, client, mineru_file):
+        """测试直接路径匹配"""
+        response = client.get(mineru_file)
+
+        assert response.status_code == 200
+        assert response.get_data() == b'mineru-image-bytes'
+
+    def test_serve_mineru_file_prefix_match(self, client, mineru_file):
+        """测试文件名前缀匹配"""
+        response = client.get('/files/mineru/extract-test/images/abcdef.jpg')
+
+        assert response.status_code == 200
+        assert response.get_data() == b'mineru-image-bytes'
+
+    def test_serve_mineru_file_path_traversal(self, client, mineru_file):
+        """测试路径穿越被拒绝"""
+        response = client.get('/files/mineru/extract-test/images/..%2F..%2F..%2Ftest.db')
+
+        assert response.status_code == 403
+
+    def test_serve_mineru_file_extract_id_traversal(self, client, mineru_file):
+        """测试extract_id本身越界被拒绝"""
+        response = client.get('/files/mineru/%2E%2E/materials')
+
+        assert response.status_code == 403
+
+    def test_serve_mineru_file_prefix_match_symlink_escape(self, app, client, mineru_file):
+        """测试前缀匹配到指向根目录外的符号链接时返回404"""
+        outside = os.path.join(app.config['UPLOAD_FOLDER'], 'secret.txt')
+        with open(outside, 'wb') as f:
+            f.write(b'secret')
+        link = os.path.join(app.config['UPLOAD_FOLDER'], 'mineru_files', 'extract-test', 'images', 'secret123456.txt')
+        os.symlink(outside, link)
+
+        response = client.get('/files/mineru/extract-test/images/secret.txt')
+
+        assert response.status_code == 404
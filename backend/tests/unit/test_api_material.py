@@ -0,0 +1,277 @@
+"""
+素材管理API单元测试
+"""
+
+import io
+import os
+
+import pytest
+from conftest import assert_success_response, assert_error_response
+
+
+def _upload(client, sample_image_file, url='/api/materials/upload', filename='product.png'):
+    return client.post(
+        url,
+        data={'file': (sample_image_file, filename)},
+        content_type='multipart/form-data'
+    )
+
+
+class TestMaterialUpload:
+    """素材上传测试"""
+
+    def test_upload_global_material(self, app, client, sample_image_file):
+        """测试上传全局素材"""
+        image_bytes = sample_image_file.getvalue()
+        response = _upload(client, sample_image_file)
+
+        data = assert_success_response(response, 201)
+        material = data['data']
+        assert material['project_id'] is None
+        assert material['url'].startswith('/files/materials/product_')
+
+        saved_path = os.path.join(app.config['UPLOAD_FOLDER'], material['relative_path'])
+        with open(saved_path, 'rb') as f:
+            assert f.read() == image_bytes
+
+    def test_upload_spooled_to_disk(self, app, client, sample_image_file, monkeypatch):
+        """测试超过内存阈值的上传经临时文件落盘后被清理"""
+        import utils.upload_utils as upload_utils
+        monkeypatch.setattr(upload_utils, 'MEMORY_SPOOL_MAX_SIZE', 0)
+
+        image_bytes = sample_image_file.getvalue()
+        response = _upload(client, sample_image_file)
+
+        material = assert_success_response(response, 201)['data']
+        saved_path = os.path.join(app.config['UPLOAD_FOLDER'], material['relative_path'])
+        with open(saved_path, 'rb') as f:
+            assert f.read() == image_bytes
+        tmp_dir = os.path.join(app.config['UPLOAD_FOLDER'], upload_utils.UPLOAD_TMP_DIRNAME)
+        assert os.listdir(tmp_dir) == []
+
+    def test_upload_spooled_to_disk_honours_umask(self, app, client, sample_image_file, monkeypatch):
+        """测试硬链接保存的上传文件权限与普通保存一致（按umask，而非临时文件的0600）"""
+        import stat
+        import utils.upload_utils as upload_utils
+        monkeypatch.setattr(upload_utils, 'MEMORY_SPOOL_MAX_SIZE', 0)
+
+        response = _upload(client, sample_image_file)
+
+        material = assert_success_response(response, 201)['data']
+        saved_path = os.path.join(app.config['UPLOAD_FOLDER'], material['relative_path'])
+        umask = os.umask(0)
+        os.umask(umask)
+        assert stat.S_IMODE(os.stat(saved_path).st_mode) == 0o666 & ~umask
+
+    def test_upload_project_material(self, client, sample_project, sample_image_file):
+        """测试上传项目素材"""
+        if not sample_project:
+            pytest.skip("项目创建失败")
+
+        project_id = sample_project['project_id']
+        response = _upload(client, sample_image_file, url=f'/api/projects/{project_id}/materials/upload')
+
+        data = assert_success_response(response, 201)
+        assert data['data']['project_id'] == project_id
+        assert data['data']['url'].startswith(f'/files/{project_id}/materials/')
+
+    def test_upload_same_filename_gets_unique_names(self, client, sample_image_file):
+        """测试同名文件连续上传不会互相覆盖"""
+        image_bytes = sample_image_file.getvalue()
+        first = _upload(client, io.BytesIO(image_bytes)).get_json()['data']
+        second = _upload(client, io.BytesIO(image_bytes)).get_json()['data']
+
+        assert first['filename'] != second['filename']
+
+    def test_upload_unsupported_extension(self, client, sample_image_file):
+        """测试不支持的文件类型"""
+        response = _upload(client, sample_image_file, filename='product.exe')
+
+        data = assert_error_response(response, 400)
+        assert '.png' in data['error']['message']
+
+    def test_upload_missing_file(self, client):
+        """测试缺少文件"""
+        response = client.post('/api/materials/upload', data={}, content_type='multipart/form-data')
+
+        assert_error_response(response, 400)
+
+
+class TestMaterialList:
+    """素材列表测试"""
+
+    def test_list_all_materials(self, client, sample_image_file):
+        """测试获取全部素材"""
+        _upload(client, sample_image_file)
+        response = client.get('/api/materials')
+
+        data = assert_success_response(response)
+        assert data['data']['count'] == 1
+        assert data['data']['materials'][0]['filename'].startswith('product_')
+
+    def test_list_materials_project_not_found(self, client):
+        """测试按不存在的项目筛选"""
+        response = client.get('/api/materials?project_id=non-existent-id')
+
+        assert_error_response(response, 404)
+
+
+class TestMaterialAssociate:
+    """素材关联项目测试"""
+
+    def test_associate_materials(self, client, sample_project, sample_image_file):
+        """测试将全局素材关联到项目"""
+        if not sample_project:
+            pytest.skip("项目创建失败")
+
+        material = _upload(client, sample_image_file).get_json()['data']
+        project_id = sample_project['project_id']
+        response = client.post('/api/materials/associate', json={
+            'project_id': project_id,
+            'material_urls': [material['url']]
+        })
+
+        data = assert_success_response(response)
+        assert data['data']['updated_ids'] == [material['id']]
+
+        listed = client.get(f'/api/projects/{project_id}/materials').get_json()
+        assert listed['data']['count'] == 1
+
+    def test_associate_materials_project_not_found(self, client):
+        """测试关联到不存在的项目"""
+        response = client.post('/api/materials/associate', json={
+            'project_id': 'non-existent-id',
+            'material_urls': ['/files/materials/x.png']
+        })
+
+        assert_error_response(response, 404)
+
+
+class TestMaterialDelete:
+    """素材删除测试"""
+
+    def test_delete_material(self, app, client, sample_image_file):
+        """测试删除素材及其文件"""
+        material = _upload(client, sample_image_file).get_json()['data']
+        saved_path = os.path.join(app.config['UPLOAD_FOLDER'], material['relative_path'])
+
+        response = client.delete(f"/api/materials/{material['id']}")
+
+        assert_success_response(response)
+        assert not os.path.exists(saved_path)
+
+
+class TestMaterialListLimit:
+    """素材列表数量限制测试"""
+
+    def test_list_all_materials_with_limit(self, client, sample_image_file):
+        """测试limit参数限制返回数量"""
+        image_bytes = sample_image_file.getvalue()
+        for _ in range(2):
+            _upload(client, io.BytesIO(image_bytes))
+
+        data = assert_success_response(client.get('/api/materials?limit=1'))
+        assert data['data']['count'] == 1
+
+        data = assert_success_response(client.get('/api/materials'))
+        assert data['data']['count'] == 2
+
+
+class TestMaterialCaption:
+    """素材图片识别测试"""
+
+    @pytest.fixture
+    def fake_caption(self, monkeypatch):
+        import services.task_manager as task_manager_module
+        calls = []
+
+        def _caption(image, **kwargs):
+            calls.append(image.size)
+            return f'产品{len(calls)}'
+
+        monkeypatch.setattr(task_manager_module, 'caption_product_image', _caption)
+        # 同步执行后台任务，便于断言结果
+        monkeypatch.setattr(
+            task_manager_module.task_manager, 'submit_task',
+            lambda task_id, func, *args: func(task_id, *args)
+        )
+        return calls
+
+    def test_caption_materials(self, client, sample_image_file, fake_caption):
+        """测试识别已上传素材并通过任务返回合并结果"""
+        material = _upload(client, sample_image_file).get_json()['data']
+        response = client.post('/api/materials/caption', json={
+            'material_urls': [material['url'], '/files/materials/missing.png']
+        })
+
+        data = assert_success_response(response, 202)
+        assert data['data']['status'] == 'PENDING'
+
+        task = client.get(f"/api/projects/global/tasks/{data['data']['task_id']}").get_json()['data']
+        assert task['status'] == 'COMPLETED'
+        captions = task['progress']['captions']
+        assert captions[0] == {'url': material['url'], 'caption': '产品1'}
+        assert captions[1] == {'url': '/files/materials/missing.png', 'caption': ''}
+        assert task['progress']['combined_caption'] == '产品1'
+        assert fake_caption == [(100, 100)]
+
+    def test_caption_materials_downscales_large_images(self, client, fake_caption):
+        """测试大图在识别前被缩小"""
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (4000, 3000), color='white').save(buffer, format='JPEG')
+        buffer.seek(0)
+        material = _upload(client, buffer, filename='large.jpg').get_json()['data']
+
+        client.post('/api/materials/caption', json={'material_urls': [material['url']]})
+
+        width, height = fake_caption[0]
+        assert max(width, height) <= 1024
+
+    def test_caption_materials_requires_urls(self, client):
+        """测试缺少图片URL"""
+        response = client.post('/api/materials/caption', json={'material_urls': []})
+
+        assert_error_response(response, 400)
+
+
+class TestMaterialUrlResolution:
+    """素材URL解析测试"""
+
+    @pytest.mark.parametrize('url, expected', [
+        ('/files/materials/a.png', 'materials/a.png'),
+        ('http://localhost:5000/files/materials/a.png?t=1', 'materials/a.png'),
+        ('/files/p-1/materials/b.jpg', 'p-1/materials/b.jpg'),
+        ('/files/../materials/b.jpg', None),
+        ('/files/p-1/pages/c.jpg', None),
+        ('', None),
+    ])
+    def test_url_to_relative_path(self, url, expected):
+        """测试URL映射为上传目录内的相对路径"""
+        from controllers.material_controller import _url_to_relative_path
+
+        assert _url_to_relative_path(url) == expected
+
+
+class TestMaterialGenerate:
+    """素材生成测试"""
+
+    def test_generate_without_reference_images_skips_temp_dir(self, app, client, monkeypatch):
+        """测试无参考图片时不创建临时目录"""
+        import services.task_manager as task_manager_module
+        submitted = []
+        monkeypatch.setattr(
+            task_manager_module.task_manager, 'submit_task',
+            lambda task_id, func, *args: submitted.append(args)
+        )
+        upload_folder = app.config['UPLOAD_FOLDER']
+        before = set(os.listdir(upload_folder))
+
+        response = client.post('/api/projects/none/materials/generate', json={'prompt': '一只白色杯子'})
+
+        data = assert_success_response(response, 202)
+        assert data['data']['status'] == 'PENDING'
+        assert set(os.listdir(upload_folder)) == before
+        # temp_dir 参数为 None
+        assert submitted[0][8] is None
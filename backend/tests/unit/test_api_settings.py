@@ -0,0 +1,193 @@
+"""
+设置API单元测试
+"""
+
+import pytest
+from conftest import assert_success_response, assert_error_response
+
+
+@pytest.fixture
+def orjson_modules():
+    """设置API响应经JSON provider序列化"""
+    from utils import json_provider
+
+    return (json_provider,)
+
+
+@pytest.fixture
+def settings_client(app, client, json_backend):
+    """测试结束后恢复默认设置，避免修改的配置影响其他测试"""
+    # 测试应用在整个会话中共用，client fixture 直接清空了数据表，缓存的响应需一并丢弃
+    app.extensions.pop('settings_response', None)
+    yield client
+    client.post('/api/settings/reset')
+
+
+class TestSettingsGet:
+    """设置获取测试"""
+
+    def test_get_settings(self, settings_client):
+        """测试获取设置且不返回明文密钥"""
+        response = settings_client.get('/api/settings')
+
+        data = assert_success_response(response)
+        settings = data['data']
+        assert 'api_key' not in settings
+        assert isinstance(settings['api_key_length'], int)
+        assert isinstance(settings['updated_at'], str)
+
+
+    def test_get_settings_cached(self, app, settings_client, monkeypatch):
+        """测试重复获取设置时不再查询数据库（缓存保存在当前应用上）"""
+        from models import Settings
+
+        settings_client.get('/api/settings')
+        assert app.extensions['settings_response']['body'] is not None
+
+        def _fail():
+            raise AssertionError('settings should be served from cache')
+
+        monkeypatch.setattr(Settings, 'get_settings', staticmethod(_fail))
+        assert_success_response(settings_client.get('/api/settings'))
+
+
+class TestSettingsUpdate:
+    """设置更新测试"""
+
+    def test_update_settings(self, app, settings_client):
+        """测试更新设置并同步到应用配置"""
+        response = settings_client.put('/api/settings', json={
+            'image_resolution': '4K',
+            'max_image_workers': 3,
+            'text_model': '  custom-text-model  ',
+        })
+
+        data = assert_success_response(response)
+        assert data['data']['image_resolution'] == '4K'
+        assert data['data']['max_image_workers'] == 3
+        assert data['data']['text_model'] == 'custom-text-model'
+        assert app.config['DEFAULT_RESOLUTION'] == '4K'
+
+        data = assert_success_response(settings_client.get('/api/settings'))
+        assert data['data']['image_resolution'] == '4K'
+
+    def test_update_settings_unchanged_skips_write(self, settings_client):
+        """测试提交与当前相同的值时不写数据库"""
+        current = assert_success_response(settings_client.get('/api/settings'))['data']
+
+        response = settings_client.put('/api/settings', json={
+            'image_resolution': current['image_resolution'],
+            'output_language': current['output_language'],
+        })
+
+        data = assert_success_response(response)
+        assert data['message'] == 'No changes'
+        assert data['data']['updated_at'] == current['updated_at']
+
+    def test_update_settings_invalid_resolution(self, settings_client):
+        """测试无效的分辨率"""
+        response = settings_client.put('/api/settings', json={'image_resolution': '8K'})
+
+        assert_error_response(response, 400)
+
+    def test_update_settings_invalid_field_changes_nothing(self, settings_client):
+        """测试任一字段校验失败时不修改其他字段"""
+        response = settings_client.put('/api/settings', json={
+            'image_resolution': '4K',
+            'max_image_workers': 50,
+        })
+
+        assert_error_response(response, 400)
+        data = assert_success_response(settings_client.get('/api/settings'))
+        assert data['data']['image_resolution'] != '4K'
+
+    def test_update_settings_clears_empty_model(self, settings_client):
+        """测试空字符串模型名清除覆盖"""
+        response = settings_client.put('/api/settings', json={'image_model': '   '})
+
+        data = assert_success_response(response)
+        assert data['data']['image_model'] is None
+
+    def test_update_settings_clears_api_base_override(self, app, settings_client):
+        """测试清空API Base时移除配置覆盖"""
+        settings_client.put('/api/settings', json={'api_base_url': 'https://proxy.example.com/v1'})
+        assert app.config['GOOGLE_API_BASE'] == 'https://proxy.example.com/v1'
+
+        response = settings_client.put('/api/settings', json={'api_base_url': ''})
+
+        assert_success_response(response)
+        assert 'GOOGLE_API_BASE' not in app.config
+        assert 'OPENAI_API_BASE' not in app.config
+
+    def test_update_settings_normalizes_openai_base(self, app, settings_client):
+        """测试OpenAI格式下补全API Base的/v1"""
+        response = settings_client.put('/api/settings', json={
+            'ai_provider_format': 'openai',
+            'api_base_url': 'https://api.example.com',
+        })
+
+        data = assert_success_response(response)
+        assert data['data']['api_base_url'] == 'https://api.example.com/v1'
+        assert app.config['OPENAI_API_BASE'] == 'https://api.example.com/v1'
+
+    def test_update_settings_syncs_only_changed_fields(self, app, settings_client):
+        """测试仅同步变更字段到app.config"""
+        original_key = app.config.get('GOOGLE_API_KEY')
+        app.config['GOOGLE_API_KEY'] = 'sentinel-key'
+        try:
+            response = settings_client.put('/api/settings', json={'image_aspect_ratio': '1:1'})
+
+            assert_success_response(response)
+            assert app.config['DEFAULT_ASPECT_RATIO'] == '1:1'
+            assert app.config['GOOGLE_API_KEY'] == 'sentinel-key'
+        finally:
+            app.config['GOOGLE_API_KEY'] = original_key
+
+
+class TestSettingsReset:
+    """设置重置测试"""
+
+    def test_reset_settings(self, settings_client):
+        """测试重置为默认值"""
+        from config import Config
+
+        updated = settings_client.put('/api/settings', json={'image_resolution': '4K', 'output_language': 'en'})
+        response = settings_client.post('/api/settings/reset')
+
+        data = assert_success_response(response)
+        assert data['data']['updated_at'] > updated.get_json()['data']['updated_at']
+        assert data['data']['image_resolution'] == Config.DEFAULT_RESOLUTION
+        assert data['data']['output_language'] == 'zh'
+
+
+class TestSettingsTestConnection:
+    """连接测试接口测试"""
+
+    def test_connection_openai(self, settings_client, monkeypatch):
+        """测试OpenAI格式连接测试使用规范化后的API Base"""
+        import controllers.settings_controller as settings_controller
+        created = []
+
+        class FakeProvider:
+            def __init__(self, api_key, api_base, model):
+                created.append(api_base)
+                self.client = type('Client', (), {})()
+
+            def generate_text(self, prompt):
+                return '连接成功'
+
+        monkeypatch.setattr(settings_controller, '_openai_text_provider_cls', lambda: FakeProvider)
+        response = settings_client.post('/api/settings/test-connection', json={
+            'ai_provider_format': 'openai',
+            'api_base_url': 'https://api.example.com',
+            'api_key': 'sk-test',
+        })
+
+        assert_success_response(response)
+        assert created == ['https://api.example.com/v1']
+
+    def test_connection_requires_api_key(self, settings_client):
+        """测试缺少API Key"""
+        response = settings_client.post('/api/settings/test-connection', json={'ai_provider_format': 'openai'})
+
+        assert_error_response(response, 400)
@@ -0,0 +1,63 @@
+"""
+JSON序列化单元测试
+"""
+
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+from utils import json_provider
+
+
+@pytest.fixture
+def orjson_modules():
+    """JSON provider在未安装orjson时回退标准库"""
+    return (json_provider,)
+
+
+@pytest.mark.usefixtures('json_backend')
+class TestORJSONProvider:
+    """orjson JSON provider测试"""
+
+    def test_output_matches_default_provider(self, app):
+        """测试序列化结果与Flask默认实现一致"""
+        payload = {
+            'b': '中文',
+            'a': [1, 2.5, None, True],
+            'created_at': datetime(2024, 1, 2, 3, 4, 5),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        }
+
+        expected = json.loads(DefaultJSONProvider(app).dumps(payload))
+        assert json.loads(app.json.dumps(payload)) == expected
+
+    def test_response(self, app):
+        """测试jsonify响应"""
+        with app.app_context():
+            response = app.json.response({'success': True, 'data': {'count': 1}})
+
+        assert response.mimetype == 'application/json'
+        assert response.get_json() == {'success': True, 'data': {'count': 1}}
+
+    def test_big_integer_falls_back(self, app):
+        """测试超出64位的整数回退到标准库序列化"""
+        with app.app_context():
+            response = app.json.response({'count': 2 ** 70})
+
+        assert app.json.dumps({'count': 2 ** 70}) == '{"count": 1180591620717411303424}'
+        assert response.get_json() == {'count': 2 ** 70}
+
+    def test_debug_response_pretty_printed(self, app):
+        """测试调试模式下响应带缩进"""
+        original_debug = app.debug
+        app.debug = True
+        try:
+            with app.app_context():
+                response = app.json.response({'success': True})
+        finally:
+            app.debug = original_debug
+
+        assert response.get_data(as_text=True) == '{\n  "success": true\n}\n'
@@ -0,0 +1,153 @@
+"""
+数据模型单元测试
+"""
+
+import json
+
+import pytest
+
+from models import Page, ReferenceFile, Task, json_utils
+
+
+@pytest.fixture
+def orjson_modules():
+    """JSON列工具在未安装orjson时回退标准库"""
+    return (json_utils,)
+
+
+@pytest.mark.usefixtures('json_backend')
+class TestJsonUtils:
+    """JSON列读写工具测试"""
+
+    def test_round_trip_keeps_chinese(self):
+        """测试序列化不转义中文，且可原样解析"""
+        data = {'title': '主图', 'points': ['卖点1'], 'count': 2 ** 70, 1: None}
+        text = json_utils.json_dumps(data)
+
+        assert '主图' in text
+        assert json_utils.json_loads(text) == {'title': '主图', 'points': ['卖点1'], 'count': 2 ** 70, '1': None}
+
+    def test_invalid_json_raises_decode_error(self):
+        """测试无效JSON抛出json.JSONDecodeError"""
+        with pytest.raises(json.JSONDecodeError):
+            json_utils.json_loads('{not json')
+
+
+class TestPageJsonContent:
+    """页面JSON内容字段测试"""
+
+    def test_outline_content_round_trip(self):
+        """测试大纲内容写入后可原样读出，且不转义中文"""
+        page = Page()
+        page.set_outline_content({'title': '主图', 'points': ['卖点1', '卖点2']})
+
+        assert '主图' in page.outline_content
+        assert page.get_outline_content() == {'title': '主图', 'points': ['卖点1', '卖点2']}
+
+    def test_invalid_description_content(self):
+        """测试无效JSON返回None"""
+        page = Page(description_content='{not json')
+
+        assert page.get_description_content() is None
+
+    def test_outline_content_parsed_once(self, monkeypatch):
+        """测试内容未变时复用解析结果，重新赋值后重新解析"""
+        import models.json_utils as json_utils
+        calls = []
+        original_loads = json_utils.json_loads
+        monkeypatch.setattr(json_utils, 'json_loads', lambda text: calls.append(text) or original_loads(text))
+
+        page = Page()
+        page.set_outline_content({'title': '主图'})
+        page.get_outline_content()
+        page.get_outline_content()
+        assert len(calls) == 1
+
+        page.set_outline_content({'title': '详情'})
+        assert page.get_outline_content() == {'title': '详情'}
+        assert len(calls) == 2
+
+
+    def test_outline_content_mutation_not_shared(self):
+        """测试修改返回值不影响后续读取及相同内容的其他页面"""
+        outline = {'title': '主图', 'points': ['卖点']}
+        page = Page()
+        page.set_outline_content(outline)
+        other = Page(outline_content=page.outline_content)
+
+        data = page.get_outline_content()
+        data['part'] = '第一部分'
+        data['points'].append('新增')
+
+        assert page.get_outline_content() == outline
+        assert other.get_outline_content() == outline
+        assert other.get_outline_content() is not other.get_outline_content()
+
+class TestTaskProgress:
+    """任务进度字段测试"""
+
+    def test_update_progress(self, client):
+        """测试增量更新进度（数据库内原子更新）"""
+        from models import db
+
+        task = Task(project_id='global', task_type='GENERATE_IMAGES')
+        task.set_progress({'total': 3, 'completed': 0, 'failed': 0, 'captions': ['中文']})
+        db.session.add(task)
+        db.session.commit()
+
+        task.update_progress(completed=2)
+        db.session.commit()
+
+        assert task.get_progress() == {'total': 3, 'completed': 2, 'failed': 0, 'captions': ['中文']}
+
+    def test_update_progress_from_invalid(self, client):
+        """测试无效进度从默认值开始更新"""
+        from models import db
+
+        task = Task(project_id='global', task_type='GENERATE_IMAGES', progress='oops')
+        db.session.add(task)
+        db.session.commit()
+
+        task.update_progress(completed=1, failed=1)
+
+        assert task.get_progress() == {'total': 0, 'completed': 1, 'failed': 1}
+
+    def test_update_progress_non_sqlite(self, client, monkeypatch):
+        """测试非SQLite数据库回退为读-改-写"""
+        from models import db, task as task_module
+
+        task = Task(project_id='global', task_type='GENERATE_IMAGES')
+        task.set_progress({'total': 3, 'completed': 0, 'failed': 0})
+        db.session.add(task)
+        db.session.commit()
+
+        with monkeypatch.context() as m:
+            m.setattr(task_module, '_supports_json_set', lambda bind: False)
+            m.setattr(task_module, 'update', lambda *a: pytest.fail('json_set UPDATE used'))
+            task.update_progress(completed=2, failed=1)
+        db.session.commit()
+
+        assert task.get_progress() == {'total': 3, 'completed': 2, 'failed': 1}
+
+    def test_invalid_progress(self):
+        """测试无效JSON返回默认进度"""
+        task = Task(progress='oops')
+
+        assert task.get_progress() == {'total': 0, 'completed': 0, 'failed': 0}
+
+
+class TestReferenceFileFailedCount:
+    """参考文件图片描述失败计数测试"""
+
+    def test_count_failed_image_captions(self):
+        """测试统计缺少alt文本的图片"""
+        ref = ReferenceFile(markdown_content='![](a.png) ![猫](b.png) ![ ](c.png)')
+
+        assert ref.count_failed_image_captions() == 2
+
+    def test_to_dict_uses_stored_count(self, monkeypatch):
+        """测试已存储计数时不再扫描markdown"""
+        ref = ReferenceFile(parse_status='completed', markdown_content='![](a.png)', image_caption_failed_count=5)
+        monkeypatch.setattr(ReferenceFile, 'count_failed_image_captions', lambda self: pytest.fail('不应扫描markdown'))
+
+        assert ref.to_dict(include_failed_count=True)['image_caption_failed_count'] == 5
@@ -0,0 +1,52 @@
+"""
+路径工具单元测试
+"""
+
+import os
+
+from utils import path_utils
+from utils.path_utils import find_file_with_prefix
+
+
+class TestFindFileWithPrefix:
+    """前缀匹配查找测试"""
+
+    def test_deleted_match_not_returned(self, tmp_path, monkeypatch):
+        """测试前缀匹配的文件被删除后不再返回（目录索引随mtime失效）"""
+        monkeypatch.setattr(path_utils, '_DIR_INDEX_SETTLE_NS', -1)
+        target = tmp_path / 'image_abcdef123.jpg'
+        target.write_bytes(b'x')
+        os.utime(tmp_path, ns=(1_000_000_000, 1_000_000_000))
+        assert find_file_with_prefix(tmp_path / 'image_abc.jpg') == target
+
+        target.unlink()
+
+        assert find_file_with_prefix(tmp_path / 'image_abc.jpg') is None
+
+    def test_missing_file_not_cached(self, tmp_path):
+        """测试未找到的文件不缓存，文件出现后即可找到"""
+        assert find_file_with_prefix(tmp_path / 'page_12345.png') is None
+
+        created = tmp_path / 'page_12345_full.png'
+        created.write_bytes(b'x')
+
+        assert find_file_with_prefix(tmp_path / 'page_12345.png') == created
+
+    def test_dir_index_rebuilt_when_directory_changes(self, tmp_path, monkeypatch):
+        """测试目录索引在目录未变化时复用，目录mtime变化后重建"""
+        monkeypatch.setattr(path_utils, '_DIR_INDEX_SETTLE_NS', -1)
+        (tmp_path / 'chunk_00001.jpg').write_bytes(b'x')
+        os.utime(tmp_path, ns=(1_000_000_000, 1_000_000_000))
+        scans = []
+        original_scandir = os.scandir
+        monkeypatch.setattr(path_utils.os, 'scandir', lambda path: scans.append(path) or original_scandir(path))
+
+        assert path_utils._scan_for_prefix_match(tmp_path / 'chunk_0.jpg') == tmp_path / 'chunk_00001.jpg'
+        assert path_utils._scan_for_prefix_match(tmp_path / 'chunk_2.jpg') is None
+        assert len(scans) == 1
+
+        (tmp_path / 'chunk_20000.jpg').write_bytes(b'x')
+        os.utime(tmp_path, ns=(2_000_000_000, 2_000_000_000))
+
+        assert path_utils._scan_for_prefix_match(tmp_path / 'chunk_2.jpg') == tmp_path / 'chunk_20000.jpg'
+        assert len(scans) == 2
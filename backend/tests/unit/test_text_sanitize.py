@@ -0,0 +1,43 @@
+"""
+提示词文本清洗单元测试
+"""
+
+from utils.text_sanitize import sanitize_prompt_text, strip_json_code_fence
+
+
+class TestSanitizePromptText:
+    """sanitize_prompt_text测试"""
+
+    def test_plain_text_blank_lines_collapsed(self):
+        """测试普通文本只合并连续空行，保留正文"""
+        text = "  保温杯主图\n\n\n   \n突出不锈钢材质  \n\n"
+
+        assert sanitize_prompt_text(text) == "保温杯主图\n\n突出不锈钢材质"
+
+    def test_drops_html_documents_and_tag_lines(self):
+        """测试移除完整HTML文档和标签行，保留夹在其中的正文"""
+        text = (
+            "<!DOCTYPE html><html><body>页面</body></html>\n"
+            "产品：陶瓷马克杯\n"
+            "<meta charset=\"utf-8\">\n"
+            "\n\n"
+            "</div>\n"
+            "容量 350ml，a<b 也是正文"
+        )
+
+        assert sanitize_prompt_text(text) == "产品：陶瓷马克杯\n\n容量 350ml，a<b 也是正文"
+
+
+class TestStripJsonCodeFence:
+    """JSON代码块标记清理测试"""
+
+    def test_removes_fence(self):
+        """测试移除```json和```代码块标记"""
+        assert strip_json_code_fence('  ```json\n{"title": "主图"}\n```  ') == '{"title": "主图"}'
+        assert strip_json_code_fence('```\n[1, 2]\n```') == '[1, 2]'
+        assert strip_json_code_fence('```json\n{"a": 1}') == '{"a": 1}'
+
+    def test_keeps_json_edges(self):
+        """测试不会误删JSON首尾的j/s/o/n字符"""
+        assert strip_json_code_fence('null') == 'null'
+        assert strip_json_code_fence('"json"') == '"json"'
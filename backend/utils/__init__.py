@@ -11,6 +11,7 @@ from .response import (
 from .validators import validate_project_status, validate_page_status, allowed_file
 from .path_utils import convert_mineru_path_to_local, find_mineru_file_with_prefix, find_file_with_prefix
 from .page_utils import parse_page_ids_from_query, parse_page_ids_from_body, get_filtered_pages
+from .upload_utils import save_upload
 
 __all__ = [
     'success_response',
@@ -28,6 +29,7 @@ __all__ = [
     'find_file_with_prefix',
     'parse_page_ids_from_query',
     'parse_page_ids_from_body',
-    'get_filtered_pages'
+    'get_filtered_pages',
+    'save_upload'
 ]
 
@@ -1,6 +1,7 @@
 """
 Page utilities - shared helpers for parsing page_ids and fetching pages
 """
+from functools import lru_cache
 from typing import List, Optional, Union
 from flask import Request
 
@@ -37,6 +38,26 @@ def parse_page_ids_from_body(data: dict) -> List[str]:
     return page_ids
 
 
+@lru_cache(maxsize=None)
+def _filtered_pages_statements():
+    """
+    Build the page queries once.
+
+    Both statements use bound parameters (the ID list as an expanding bind), so
+    SQLAlchemy reuses one compiled statement regardless of how many IDs are selected.
+    """
+    from sqlalchemy import bindparam, select
+    from models import Page
+
+    all_pages = (
+        select(Page)
+        .where(Page.project_id == bindparam('project_id'))
+        .order_by(Page.order_index)
+    )
+    selected_pages = all_pages.where(Page.id.in_(bindparam('page_ids', expanding=True)))
+    return all_pages, selected_pages
+
+
 def get_filtered_pages(project_id: str, page_ids: Optional[List[str]] = None):
     """
     Fetch pages for a project, optionally filtered by page IDs.
@@ -48,13 +69,11 @@ def get_filtered_pages(project_id: str, page_ids: Optional[List[str]] = None):
     Returns:
         List of Page objects ordered by order_index
     """
-    from models import Page
+    from models import db
     
+    all_pages, selected_pages = _filtered_pages_statements()
     if page_ids:
-        return Page.query.filter(
-            Page.project_id == project_id,
-            Page.id.in_(page_ids)
-        ).order_by(Page.order_index).all()
-    else:
-        return Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
-
+        return db.session.scalars(
+            selected_pages, {'project_id': project_id, 'page_ids': list(page_ids)}
+        ).all()
+    return db.session.scalars(all_pages, {'project_id': project_id}).all()
@@ -3,11 +3,33 @@ Path utilities for handling MinerU file paths and prefix matching
 """
 import os
 import logging
+import stat
+import threading
+import time
 from pathlib import Path
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+_MINERU_URL_PREFIX = '/files/mineru/'
+
+# Project root, resolved once (this file is in backend/utils/)
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+_MINERU_FILES_DIR = _PROJECT_ROOT / 'uploads' / 'mineru_files'
+
+# Prefix lookups only happen for prefixes of at least this many characters
+_MIN_PREFIX_LENGTH = 5
+# Per-directory index of regular files, bucketed by the first lowercased
+# characters of the name: {dirpath: (st_mtime_ns, {name.lower()[:5]: [names]})}.
+# Adding, removing or renaming entries changes the directory mtime, which
+# invalidates the index. Directories modified within the last
+# _DIR_INDEX_SETTLE_NS are not indexed, because a change in the same
+# timestamp tick would not move the mtime.
+_DIR_INDEX_SIZE = 1024
+_DIR_INDEX_SETTLE_NS = 2_000_000_000
+_dir_index = {}
+_dir_index_lock = threading.RLock()
+
 
 def convert_mineru_path_to_local(mineru_path: str, project_root: Optional[Path] = None) -> Optional[Path]:
     """
@@ -21,23 +43,16 @@ def convert_mineru_path_to_local(mineru_path: str, project_root: Optional[Path]
         本地文件系统路径（Path 对象），如果转换失败则返回 None
     """
     try:
-        if not mineru_path.startswith('/files/mineru/'):
+        if not mineru_path.startswith(_MINERU_URL_PREFIX):
             return None
         
-        # Remove '/files/mineru/' prefix
-        rel_path = mineru_path.replace('/files/mineru/', '')
-        
-        # Get project root if not provided
-        if project_root is None:
-            # Navigate to project root (assuming this file is in backend/utils/)
-            current_file = Path(__file__).resolve()
-            backend_dir = current_file.parent.parent
-            project_root = backend_dir.parent
+        # Strip only the leading prefix (a later '/files/mineru/' belongs to the path)
+        rel_path = mineru_path[len(_MINERU_URL_PREFIX):]
         
         # Construct full path: {project_root}/uploads/mineru_files/{rel_path}
-        local_path = project_root / 'uploads' / 'mineru_files' / rel_path
-        
-        return local_path
+        if project_root is None:
+            return _MINERU_FILES_DIR / rel_path
+        return project_root / 'uploads' / 'mineru_files' / rel_path
     except Exception as e:
         logger.warning(f"Failed to convert MinerU path to local: {mineru_path}, error: {str(e)}")
         return None
@@ -64,11 +79,7 @@ def find_mineru_file_with_prefix(mineru_path: str, project_root: Optional[Path]
     if local_path is None:
         return None
     
-    # Direct file matching
-    if local_path.exists() and local_path.is_file():
-        return local_path
-    
-    # Try prefix match using the generic function
+    # Direct file matching, then prefix match, using the generic function
     return find_file_with_prefix(local_path)
 
 
@@ -86,27 +97,71 @@ def find_file_with_prefix(file_path: Path) -> Optional[Path]:
     Returns:
         找到的文件路径（Path 对象），如果未找到则返回 None
     """
-    # Direct file matching
-    if file_path.exists() and file_path.is_file():
+    # Direct file matching (is_file() is False for missing paths)
+    if file_path.is_file():
         return file_path
-    
+
+    # The directory index is revalidated against the directory mtime, so a
+    # deleted or renamed file is never returned
+    return _scan_for_prefix_match(file_path)
+
+
+def _build_dir_index(dirpath: str) -> dict:
+    """Bucket the regular files in dirpath by the start of their lowercased name."""
+    buckets = {}
+    # scandir reuses the directory entry type, so building the index costs no stat() per file
+    with os.scandir(dirpath) as entries:
+        for entry in entries:
+            if entry.is_file():
+                buckets.setdefault(entry.name.lower()[:_MIN_PREFIX_LENGTH], []).append(entry.name)
+    return buckets
+
+
+def _get_dir_index(dirpath: str, mtime_ns: int) -> dict:
+    """Directory index for dirpath, rebuilt whenever its mtime changes."""
+    with _dir_index_lock:
+        cached = _dir_index.get(dirpath)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+
+    buckets = _build_dir_index(dirpath)
+    if time.time_ns() - mtime_ns > _DIR_INDEX_SETTLE_NS:
+        with _dir_index_lock:
+            _dir_index.pop(dirpath, None)
+            _dir_index[dirpath] = (mtime_ns, buckets)
+            if len(_dir_index) > _DIR_INDEX_SIZE:
+                del _dir_index[next(iter(_dir_index))]
+    return buckets
+
+
+def _scan_for_prefix_match(file_path: Path) -> Optional[Path]:
+    """Look in the directory of a missing file for a name that extends its prefix."""
     # Try prefix match if not found and filename looks like a prefix with extension
     filename = file_path.name
-    dirpath = file_path.parent
-    
-    if '.' in filename and dirpath.exists() and dirpath.is_dir():
-        prefix, ext = os.path.splitext(filename)
-        if len(prefix) >= 5:
-            try:
-                for fname in os.listdir(dirpath):
-                    fp, fe = os.path.splitext(fname)
-                    if fp.lower().startswith(prefix.lower()) and fe.lower() == ext.lower():
-                        matched_path = dirpath / fname
-                        if matched_path.is_file():
-                            logger.debug(f"Prefix match found: {file_path} -> {matched_path}")
-                            return matched_path
-            except OSError as e:
-                logger.warning(f"Failed to list directory {dirpath}: {str(e)}")
-    
-    return None
+    if '.' not in filename:
+        return None
+    prefix, ext = os.path.splitext(filename)
+    if len(prefix) < _MIN_PREFIX_LENGTH:
+        return None
 
+    dirpath = str(file_path.parent)
+    try:
+        dir_stat = os.stat(dirpath)
+        if not stat.S_ISDIR(dir_stat.st_mode):
+            return None
+        buckets = _get_dir_index(dirpath, dir_stat.st_mtime_ns)
+    except OSError as e:
+        logger.warning(f"Failed to list directory {dirpath}: {str(e)}")
+        return None
+
+    prefix_lower = prefix.lower()
+    ext_lower = ext.lower()
+    # A match's lowercased name starts with prefix_lower, so it sits in that bucket
+    for name in buckets.get(prefix_lower[:_MIN_PREFIX_LENGTH], ()):
+        fp, fe = os.path.splitext(name)
+        if fp.lower().startswith(prefix_lower) and fe.lower() == ext_lower:
+            matched_path = Path(dirpath, name)
+            logger.debug("Prefix match found: %s -> %s", file_path, matched_path)
+            return matched_path
+
+    return None
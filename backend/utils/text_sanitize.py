@@ -17,6 +17,25 @@ _HTML_BLOCK_RE = re.compile(r"(?is)<html\b.*?</html>")
 _TAG_ONLY_LINE_RE = re.compile(r"(?i)^\s*</?[a-z][^>]*>\s*$")
 _META_LIKE_RE = re.compile(r"(?i)<(meta|script|link|style|head|body)\b")
 
+# looks_like_html() only inspects the first 4096 characters of a line
+_HTML_SNIFF_CHARS = 4096
+# looks_like_html(), _META_LIKE_RE and _TAG_ONLY_LINE_RE in one pass, for
+# stripped lines no longer than _HTML_SNIFF_CHARS
+_HTML_LINE_RE = re.compile(
+    r"(?i)"
+    r"<!doctype\s+html|</html>|</head>|</body>|"
+    r"<(?:html|head|meta|script|body|link|style)\b|"
+    r"^</?[a-z][^>]*>$"
+)
+
+
+def _is_html_line(stripped: str) -> bool:
+    if len(stripped) <= _HTML_SNIFF_CHARS:
+        return _HTML_LINE_RE.search(stripped) is not None
+    return bool(
+        looks_like_html(stripped) or _META_LIKE_RE.search(stripped) or _TAG_ONLY_LINE_RE.match(stripped)
+    )
+
 
 def sanitize_prompt_text(text: Optional[str], *, max_chars: int = 8000) -> str:
     """
@@ -28,30 +47,68 @@ def sanitize_prompt_text(text: Optional[str], *, max_chars: int = 8000) -> str:
     if not text:
         return ""
 
-    raw = str(text).replace("\x00", "").strip()
+    if not isinstance(text, str):
+        text = str(text)
+    if "\x00" in text:
+        text = text.replace("\x00", "")
+    raw = text.strip()
     if not raw:
         return ""
 
-    # Fast path: strip full HTML documents.
-    raw = _HTML_DOC_RE.sub("", raw)
-    raw = _HTML_BLOCK_RE.sub("", raw)
-
-    # Line-level filtering.
+    # Every HTML pattern needs a "<"; plain prose skips the regex work
+    has_tags = "<" in raw
+    # Line breaks are not printable, so this is a single tag-free line: nothing to filter
+    if not has_tags and raw.isprintable():
+        return raw if len(raw) <= max_chars else raw[:max_chars].rstrip()
+    if has_tags:
+        # Fast path: strip full HTML documents.
+        raw = _HTML_DOC_RE.sub("", raw)
+        raw = _HTML_BLOCK_RE.sub("", raw)
+
+    # Line-level filtering; runs of blank lines collapse to one as they are collected.
     lines = []
+    # Length of "\n".join(lines) once the leading whitespace of lines[0] (at most
+    # len(lines[0])) is discounted; past max_chars later lines cannot reach the result.
+    collected = 0
     for line in raw.splitlines():
-        stripped = line.strip()
-        if not stripped:
-            lines.append("")
+        if not line or line.isspace():
+            if lines and lines[-1]:
+                lines.append("")
+                collected += 1
             continue
-        if looks_like_html(stripped) or _META_LIKE_RE.search(stripped) or _TAG_ONLY_LINE_RE.match(stripped):
+        # Only lines that may be rejected need a stripped copy
+        if has_tags and "<" in line and _is_html_line(line.strip()):
             continue
+        if lines:
+            collected += 1 + len(line)
         lines.append(line)
+        if collected >= max_chars >= 0:
+            break
 
-    cleaned = "\n".join(lines)
-    cleaned = re.sub(r"\n{3,}", "\n\n", cleaned).strip()
+    # Dropped, blanked or collapsed lines and "\r\n" breaks all shorten the output,
+    # so equal length plus only "\n" breaks means the join would rebuild raw
+    if lines and collected + len(lines[0]) == len(raw) and raw.count("\n") == len(lines) - 1:
+        cleaned = raw.strip()
+    else:
+        cleaned = "\n".join(lines).strip()
 
     if len(cleaned) > max_chars:
         cleaned = cleaned[:max_chars].rstrip()
 
     return cleaned
 
+
+def strip_json_code_fence(text: str) -> str:
+    """
+    Remove a Markdown code fence (```json ... ``` or ``` ... ```) around model JSON output.
+
+    Only the fence itself is removed, so JSON that happens to start or end
+    with backticks or the letters of "json" (e.g. a bare null) is kept intact.
+    An unterminated fence (truncated output) is handled as well.
+    """
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned[7:] if cleaned.startswith("```json") else cleaned[3:]
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-3]
+    return cleaned.strip()
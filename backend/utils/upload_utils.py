@@ -0,0 +1,83 @@
+"""
+Upload utilities - spool multipart uploads straight into the upload folder
+"""
+import io
+import os
+import logging
+import tempfile
+from flask import Request, current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_TMP_DIRNAME = '.upload_tmp'
+
+# Requests up to this size keep their files in memory (werkzeug's default is 500KB),
+# so typical product photos are written to disk exactly once, by save_upload()
+MEMORY_SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
+# Copy buffer for file.save() fallbacks (werkzeug's default is 16KB)
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def _get_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Mode of hard-linked uploads: temp files are created owner-only (0600), while
+# file.save() creates files according to the umask like any other file. Read
+# once at import, since os.umask() can only be read by changing it.
+UPLOAD_FILE_MODE = 0o666 & ~_get_umask()
+
+
+class UploadRequest(Request):
+    """
+    Request class that spools uploaded files into UPLOAD_FOLDER.
+
+    Werkzeug spools large uploads into an anonymous temp file that file.save()
+    then copies byte by byte into its destination. Spooling into a named temp
+    file on the same filesystem lets save_upload() hard-link it into place
+    instead, so each uploaded byte is written to disk only once. Small requests
+    stay in memory entirely.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= MEMORY_SPOOL_MAX_SIZE:
+            return io.BytesIO()
+        if not has_app_context():
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+        tmp_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], UPLOAD_TMP_DIRNAME)
+        try:
+            os.makedirs(tmp_dir, exist_ok=True)
+            # Deleted when werkzeug closes the request files at the end of the request
+            return tempfile.NamedTemporaryFile(mode='rb+', dir=tmp_dir, prefix='upload_')
+        except OSError as e:
+            logger.warning(f"Failed to spool upload into {tmp_dir}, falling back to default: {e}")
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+def save_upload(file, dest_path: str) -> None:
+    """
+    Save an uploaded FileStorage to dest_path.
+
+    Hard-links the spooled temp file when possible, otherwise falls back to
+    a regular copy via file.save() with a 1MB buffer.
+
+    Args:
+        file: FileStorage object from Flask request
+        dest_path: Absolute destination path
+    """
+    stream = file.stream
+    spooled_path = getattr(stream, 'name', None)
+    if isinstance(spooled_path, str) and os.path.isfile(spooled_path):
+        try:
+            stream.flush()
+            os.link(spooled_path, dest_path)
+            os.chmod(dest_path, UPLOAD_FILE_MODE)
+            return
+        except OSError:
+            # Cross-device, unsupported filesystem or existing target: copy instead
+            pass
+    file.save(dest_path, buffer_size=COPY_BUFFER_SIZE)
@@ -8,27 +8,32 @@ against accidental HTML being treated as model output.
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 from typing import Optional
 from urllib.parse import urlsplit, urlunsplit
 
 
+# Every alternative starts with "<": the shared literal prefix lets the regex
+# engine skip ahead with a fast character search instead of trying each branch
 _HTML_LIKE_RE = re.compile(
-    r"(?is)"
-    r"<!doctype\s+html|"
-    r"<html\b|"
-    r"<head\b|"
-    r"<meta\b|"
-    r"<script\b|"
-    r"<body\b|"
-    r"</html>|</head>|</body>"
+    r"(?is)<(?:"
+    r"!doctype\s+html|"
+    r"(?:html|head|meta|script|body)\b|"
+    r"/(?:html|head|body)>"
+    r")"
 )
 
 
 def looks_like_html(text: Optional[str]) -> bool:
     if not text:
         return False
-    snippet = str(text).lstrip()[:4096]
-    return bool(_HTML_LIKE_RE.search(snippet))
+    if not isinstance(text, str):
+        text = str(text)
+    # Plain text (most model output) has no "<" at all
+    if "<" not in text:
+        return False
+    snippet = text.lstrip()[:4096]
+    return _HTML_LIKE_RE.search(snippet) is not None
 
 
 def normalize_openai_api_base(api_base: Optional[str]) -> Optional[str]:
@@ -44,7 +49,12 @@ def normalize_openai_api_base(api_base: Optional[str]) -> Optional[str]:
     raw = str(api_base).strip()
     if not raw:
         return None
+    return _normalize_openai_api_base(raw)
+
 
+@lru_cache(maxsize=256)
+def _normalize_openai_api_base(raw: str) -> str:
+    """Pure URL rewrite behind normalize_openai_api_base, memoized per input."""
     try:
         parts = urlsplit(raw)
         if not parts.scheme or not parts.netloc:
@@ -602,6 +602,7 @@ export const associateMaterialsToProject = async (
 
 /**
  * 产品图片识别（批量）
+ * 后端以异步任务执行识别，这里轮询任务直到完成，返回合并后的识别结果
  * @param materialUrls 图片URL列表
  * @param prompt 可选的覆盖提示词
  */
@@ -609,13 +610,36 @@ export const captionMaterials = async (
   materialUrls: string[],
   prompt?: string
 ): Promise<ApiResponse<{ captions: Array<{ url: string; caption: string }>; combined_caption: string }>> => {
-  const response = await apiClient.post<
-    ApiResponse<{ captions: Array<{ url: string; caption: string }>; combined_caption: string }>
-  >('/api/materials/caption', {
-    material_urls: materialUrls,
-    ...(prompt ? { prompt } : {}),
-  });
-  return response.data;
+  const response = await apiClient.post<ApiResponse<{ task_id: string; status: string }>>(
+    '/api/materials/caption',
+    {
+      material_urls: materialUrls,
+      ...(prompt ? { prompt } : {}),
+    }
+  );
+  const taskId = response.data.data?.task_id;
+  if (!taskId) {
+    throw new Error(response.data.error || '未返回任务ID');
+  }
+
+  const maxAttempts = 90; // ~3min
+  for (let attempt = 0; attempt < maxAttempts; attempt++) {
+    await new Promise((resolve) => setTimeout(resolve, 2000));
+    const task = (await getTaskStatus('global', taskId)).data;
+    if (task?.status === 'COMPLETED') {
+      return {
+        success: true,
+        data: {
+          captions: task.progress?.captions || [],
+          combined_caption: task.progress?.combined_caption || '',
+        },
+      };
+    }
+    if (task?.status === 'FAILED') {
+      throw new Error(task.error_message || '产品图片识别失败');
+    }
+  }
+  throw new Error('产品图片识别超时');
 };
 
 // ===== 用户模板 =====